@@ -0,0 +1,450 @@
+"""
+Grade document analysis used by AI verification.
+
+GradeDocumentAnalyzer takes its randomness from an injected random.Random, so
+a run is reproducible given a seed and two analyzer versions can be compared
+on the same inputs (see the replay_verification command). Production
+verification uses an unseeded analyzer, as before.
+
+New analyzer versions subclass GradeDocumentAnalyzer, set a new `version`
+and register themselves in ANALYZERS.
+"""
+import random
+from decimal import Decimal
+from django.conf import settings
+from .keyword_matcher import get_filename_matcher
+
+
+class GradeDocumentAnalyzer:
+    version = '1'
+    
+    def __init__(self, rng=None, seed=None):
+        self.rng = rng if rng is not None else random.Random(seed)
+    
+    def weighted_choice(self, choices):
+        """Weighted random selection for more realistic results"""
+        total = sum(choices.values())
+        r = self.rng.uniform(0, total)
+        upto = 0
+        for choice, weight in choices.items():
+            if upto + weight >= r:
+                return choice
+            upto += weight
+        return list(choices.keys())[-1]
+    
+    def validate(self, document, filename=None):
+        """
+        Advanced validation to determine if uploaded document is actually a grade document
+        Uses multiple validation techniques to prevent random image acceptance.
+        filename overrides document.name for the filename heuristics.
+        """
+        filename = filename or document.name
+        
+        try:
+            validation_score = 0
+            reasons = []
+            
+            # 1. File extension validation (basic)
+            file_extension = filename.lower().split('.')[-1]
+            if file_extension in ['pdf', 'png', 'jpg', 'jpeg']:
+                validation_score += 20
+                reasons.append(f"Valid file extension: {file_extension}")
+            else:
+                return {
+                    'is_valid': False,
+                    'confidence': 0,
+                    'reason': f"Invalid file extension: {file_extension}. Only PDF, PNG, JPG files are allowed for grade documents."
+                }
+            
+            # 2. File size validation - grade documents should have reasonable size
+            if document.size < 50000:  # Increased from 10KB to 50KB - grade documents are typically larger
+                return {
+                    'is_valid': False,
+                    'confidence': 0,
+                    'reason': f"File too small ({document.size} bytes). Grade documents are typically larger than 50KB. This appears to be a low-quality image or icon, not a grade document."
+                }
+            elif document.size > 10000000:  # More than 10MB is suspiciously large
+                return {
+                    'is_valid': False,
+                    'confidence': 0,
+                    'reason': f"File too large ({document.size} bytes). Grade documents should be under 10MB."
+                }
+            else:
+                validation_score += 15
+                reasons.append(f"Appropriate file size: {document.size} bytes")
+            
+            # 3. Filename pattern analysis - look for grade-related keywords
+            filename_lower = filename.lower()
+            # Every keyword category is matched in one pass (rules: api/rules/filename_rules.json)
+            filename_hits = get_filename_matcher().match(filename_lower)
+            
+            keyword_matches = len(filename_hits['grade_keywords'])
+            if keyword_matches >= 1:
+                validation_score += min(keyword_matches * 10, 30)  # Max 30 points for filename
+                reasons.append(f"Grade-related keywords found in filename: {keyword_matches}")
+            else:
+                # Not necessarily invalid, but lower confidence
+                reasons.append("No grade-related keywords in filename")
+            
+            # 4. File header/magic number validation (basic)
+            try:
+                document.seek(0)  # Reset file pointer
+                file_header = document.read(8)  # Read first 8 bytes
+                document.seek(0)  # Reset again
+                
+                # Check for common file signatures
+                if file_header.startswith(b'\x89PNG\r\n\x1a\n'):
+                    validation_score += 20
+                    reasons.append("Valid PNG file signature detected")
+                elif file_header.startswith(b'\xff\xd8\xff'):
+                    validation_score += 20
+                    reasons.append("Valid JPEG file signature detected")
+                elif file_header.startswith(b'%PDF'):
+                    validation_score += 25
+                    reasons.append("Valid PDF file signature detected")
+                else:
+                    return {
+                        'is_valid': False,
+                        'confidence': 0,
+                        'reason': "Invalid file format - file appears to be corrupted or not a valid image/PDF."
+                    }
+                    
+            except Exception as e:
+                reasons.append(f"File header validation error: {str(e)}")
+                validation_score += 5
+            
+            # 5. Image content analysis (basic, for image files)
+            if file_extension in ['png', 'jpg', 'jpeg']:
+                try:
+                    # Try to import PIL for image validation
+                    from PIL import Image
+                    
+                    document.seek(0)
+                    image = Image.open(document)
+                    width, height = image.size
+                    
+                    # Grade documents are typically in landscape or portrait orientation
+                    # and have reasonable dimensions
+                    if width < 200 or height < 200:
+                        return {
+                            'is_valid': False,
+                            'confidence': 0,
+                            'reason': f"Image too small ({width}x{height}). Grade documents should be at least 200x200 pixels. This appears to be an icon or low-quality image."
+                        }
+                    
+                    # Grade documents should have reasonable minimum dimensions
+                    if width < 400 and height < 400:
+                        return {
+                            'is_valid': False,
+                            'confidence': 0,
+                            'reason': f"Image dimensions too small ({width}x{height}). Grade documents typically need to be at least 400x400 pixels to contain readable text."
+                        }
+                    
+                    if width > 5000 or height > 5000:
+                        reasons.append(f"Very large image ({width}x{height}) - may affect processing")
+                    else:
+                        validation_score += 10
+                        reasons.append(f"Appropriate image dimensions: {width}x{height}")
+                    
+                    # Check aspect ratio - grade documents usually have reasonable aspect ratios
+                    aspect_ratio = max(width, height) / min(width, height)
+                    if aspect_ratio > 4:  # Reduced from 5 to 4 - stricter aspect ratio check
+                        return {
+                            'is_valid': False,
+                            'confidence': 0,
+                            'reason': f"Unusual aspect ratio ({aspect_ratio:.2f}). Grade documents typically have more balanced dimensions (close to portrait or landscape format)."
+                        }
+                    else:
+                        validation_score += 15  # Increased reward for good aspect ratio
+                        reasons.append(f"Good aspect ratio: {aspect_ratio:.2f}")
+                    
+                    # Additional check: Grade documents should not be perfect squares (usually random images)
+                    if abs(width - height) < 10:  # Nearly perfect square
+                        validation_score -= 10  # Penalize square images
+                        reasons.append("Warning: Square image detected (uncommon for grade documents)")
+                        
+                except ImportError:
+                    # PIL not available, skip detailed image analysis
+                    reasons.append("Detailed image analysis skipped (PIL not available)")
+                    validation_score += 5  # Reduced points when can't analyze
+                except Exception as e:
+                    reasons.append(f"Image analysis error: {str(e)}")
+                    validation_score += 2  # Very low points for analysis errors
+                finally:
+                    document.seek(0)  # Reset file pointer
+            
+            # 6. Content-based validation - look for suspicious patterns
+            # Random images often have very simple or completely random names
+            suspicious_matches = len(filename_hits['suspicious_patterns'])
+            if suspicious_matches > 0:
+                validation_score -= suspicious_matches * 5  # Reduce score for suspicious patterns
+                reasons.append(f"Suspicious filename patterns detected: {suspicious_matches}")
+            
+            # 7. Additional heuristic checks
+            # Grade documents from TCU often have specific patterns
+            if filename_hits['tcu_markers']:
+                validation_score += 15
+                reasons.append("TCU-related filename detected")
+            
+            # Check for academic terms
+            term_matches = len(filename_hits['academic_terms'])
+            if term_matches > 0:
+                validation_score += min(term_matches * 5, 15)
+                reasons.append(f"Academic terms found in filename: {term_matches}")
+            
+            # Calculate final confidence
+            max_possible_score = 110  # Theoretical maximum
+            confidence = min(100, max(0, (validation_score / max_possible_score) * 100))
+            
+            # Determine if document passes validation - MUCH MORE STRICT NOW
+            is_valid = confidence >= 70  # Increased from 50% to 70% - much stricter!
+            
+            # Additional strict check - require at least one grade-related keyword in filename
+            has_grade_keywords = bool(filename_hits['grade_keywords'])
+            
+            if not has_grade_keywords:
+                return {
+                    'is_valid': False,
+                    'confidence': max(0, confidence - 30),  # Heavily penalize lack of keywords
+                    'reason': "Document filename does not contain grade-related keywords. Please rename your file to include words like 'grades', 'transcript', 'TCU', etc. (e.g., 'TCU_Grades_2024_Midterm.pdf')"
+                }
+            
+            # Extra strict check for suspicious filenames
+            # The first rule in file order that matched is the one reported
+            if filename_hits['highly_suspicious']:
+                suspicious = filename_hits['highly_suspicious'][0]
+                return {
+                    'is_valid': False,
+                    'confidence': 0,
+                    'reason': f"Filename contains suspicious pattern '{suspicious}'. This appears to be a random image, not a grade document. Please upload your actual TCU grade report."
+                }
+            
+            print(f"📋 Document validation completed:")
+            print(f"   Score: {validation_score}/{max_possible_score}")
+            print(f"   Confidence: {confidence:.1f}%")
+            print(f"   Valid: {'YES' if is_valid else 'NO'}")
+            print(f"   Has grade keywords: {'YES' if has_grade_keywords else 'NO'}")
+            for reason in reasons:
+                print(f"   - {reason}")
+            
+            if not is_valid:
+                return {
+                    'is_valid': False,
+                    'confidence': confidence,
+                    'reason': f"Document failed strict validation (confidence: {confidence:.1f}%). This doesn't appear to be a grade document. Please upload your actual grade report or transcript with a descriptive filename containing words like 'grades', 'TCU', 'transcript', etc."
+                }
+            
+            return {
+                'is_valid': True,
+                'confidence': confidence,
+                'reasons': reasons
+            }
+            
+        except Exception as e:
+            print(f"Error during document validation: {str(e)}")
+            return {
+                'is_valid': False,
+                'confidence': 0,
+                'reason': f"Document validation error: {str(e)}. Please try uploading a different file."
+            }
+    
+    def analyze(self, document, filename=None):
+        """
+        Enhanced AI document analysis with strict grade document validation
+        Now includes actual document content verification to prevent random image acceptance
+        """
+        filename = filename or document.name
+        print(f"🤖 Enhanced AI analyzing document: {filename} ({document.size} bytes)")
+        
+        # STEP 1: Advanced file validation beyond just extension
+        file_extension = filename.lower().split('.')[-1]
+        
+        # STEP 2: Strict document validation - reject obvious non-grade documents
+        validation_result = self.validate(document, filename)
+        if not validation_result['is_valid']:
+            print(f"❌ Document validation FAILED: {validation_result['reason']}")
+            raise ValueError(f"Document validation failed: {validation_result['reason']}")
+        
+        print(f"✅ Document validation PASSED: {validation_result['confidence']}% confidence it's a grade document")
+        
+        # STEP 3: Enhanced quality assessment based on validation results
+        is_high_quality = (
+            document.size > 300000 or 
+            file_extension in ['pdf', 'png'] or
+            validation_result['confidence'] >= 80
+        )
+        
+        print(f"📄 Document quality: {'High' if is_high_quality else 'Standard'} ({file_extension.upper()})")
+        
+        # Enhanced AI to simulate "reading" actual TCU grade documents  
+        if is_high_quality:
+            print("✅ High-quality document detected - using enhanced OCR accuracy")
+            # Simulate realistic TCU course loads (most students take 8 subjects × 3 units = 24)
+            units_patterns = {
+                24: 0.60,  # Most common: 8 subjects × 3 units (standard full load)
+                21: 0.20,  # 7 subjects × 3 units (slightly reduced load)
+                18: 0.15,  # 6 subjects × 3 units (lighter load)
+                27: 0.05   # 9 subjects × 3 units (heavy load)
+            }
+            
+            # More realistic SWA distribution for TCU merit-eligible students
+            swa_patterns = {
+                Decimal('95.00'): 0.08,  # Magna Cum Laude level
+                Decimal('92.50'): 0.12,  # Cum Laude level  
+                Decimal('90.00'): 0.25,  # Merit eligible (common for good students)
+                Decimal('89.50'): 0.20,  # Merit eligible
+                Decimal('88.75'): 0.15,  # Merit threshold exactly
+                Decimal('87.50'): 0.10,  # Just below merit
+                Decimal('85.00'): 0.10   # Average performance
+            }
+            
+            academic_issues_rate = 0.05  # Only 5% chance of issues for clear documents
+            
+        else:
+            print("⚠️ Standard quality document - using standard OCR accuracy")
+            # For unclear documents, still favor realistic unit counts
+            units_patterns = {
+                24: 0.45,  # Still most likely 24 units (8 subjects × 3 units)
+                21: 0.25,  # 7 subjects × 3 units
+                18: 0.20,  # 6 subjects × 3 units  
+                15: 0.10   # 5 subjects × 3 units (minimum)
+            }
+            
+            swa_patterns = {
+                Decimal('90.00'): 0.15,
+                Decimal('89.00'): 0.20,
+                Decimal('88.75'): 0.25,  # Merit threshold
+                Decimal('87.00'): 0.20,
+                Decimal('85.00'): 0.15,
+                Decimal('82.00'): 0.05
+            }
+            
+            academic_issues_rate = 0.15  # 15% chance of issues for unclear documents
+            
+            academic_issues_rate = 0.25  # 25% chance of issues for unclear documents
+        
+        # Extract units with enhanced pattern recognition
+        extracted_units = self.weighted_choice(units_patterns)
+        
+        # Smart AI: Simulate detecting course patterns from grade documents
+        # Most TCU students take standard 3-unit courses (8 courses = 24 units)
+        if filename.lower().find('grades') != -1 or document.size > 500000:
+            # For grade documents or large files, favor standard 24-unit loads
+            print("📋 AI detected grade document pattern - analyzing course structure")
+            if self.rng.random() < 0.75:  # 75% chance to detect standard pattern
+                extracted_units = 24  # Most common: 8 subjects × 3 units each
+                print(f"🎯 AI detected: Standard 8-course load = {extracted_units} units")
+            elif self.rng.random() < 0.20:  # 20% chance for 7 courses
+                extracted_units = 21
+                print(f"🎯 AI detected: 7-course load = {extracted_units} units")
+        
+        # Extract SWA with realistic distribution
+        extracted_swa = self.weighted_choice(swa_patterns)
+        
+        # Smart logic for academic issues based on SWA
+        if extracted_swa >= Decimal('95.00'):
+            # Excellent students rarely have issues
+            has_inc_withdrawn = self.rng.random() < 0.02  # 2% chance
+            has_failed_dropped = False  # Excellent students don't fail
+            print(f"🏆 Excellent student detected (SWA: {extracted_swa}) - minimal issues")
+            
+        elif extracted_swa >= Decimal('88.75'):
+            # Merit-eligible students have low issue rates
+            has_inc_withdrawn = self.rng.random() < 0.05  # 5% chance
+            has_failed_dropped = self.rng.random() < 0.03  # 3% chance
+            print(f"⭐ Merit-eligible student detected (SWA: {extracted_swa}) - low issues")
+            
+        elif extracted_swa >= Decimal('85.00'):
+            # Good students have moderate issue rates
+            has_inc_withdrawn = self.rng.random() < academic_issues_rate
+            has_failed_dropped = self.rng.random() < (academic_issues_rate * 0.5)
+            print(f"👍 Good student detected (SWA: {extracted_swa}) - moderate issues")
+            
+        else:
+            # Struggling students have higher issue rates
+            has_inc_withdrawn = self.rng.random() < (academic_issues_rate * 1.5)
+            has_failed_dropped = self.rng.random() < academic_issues_rate
+            print(f"📚 Student needs support (SWA: {extracted_swa}) - higher issues")
+        
+        # Additional validation - ensure merit eligibility requirements (Official TCU)
+        is_merit_eligible = (
+            extracted_units >= 15 and
+            extracted_swa >= Decimal('88.75') and  # SWA of 88.75 or higher
+            not has_inc_withdrawn and
+            not has_failed_dropped
+        )
+        
+        # Final quality check and logging
+        print(f"📊 AI EXTRACTION RESULTS:")
+        print(f"   📚 Units Enrolled: {extracted_units}")
+        print(f"   📈 SWA: {extracted_swa}")
+        print(f"   ❌ Has INC/Withdrawn: {has_inc_withdrawn}")
+        print(f"   ❌ Has Failed/Dropped: {has_failed_dropped}")
+        print(f"   🏆 Merit Eligible: {'YES' if is_merit_eligible else 'NO'}")
+        
+        if is_merit_eligible:
+            print(f"   💰 Estimated Total Allowance: ₱10,000 (Base: ₱5,000 + Merit: ₱5,000)")
+            # Pre-calculate expected allowances for merit-eligible students
+            expected_base = Decimal('5000.00')
+            expected_merit = Decimal('5000.00') 
+            expected_total = expected_base + expected_merit
+        else:
+            print(f"   💰 Estimated Total Allowance: ₱5,000 (Base only)")
+            # Pre-calculate expected allowances for non-merit students
+            expected_base = Decimal('5000.00')
+            expected_merit = Decimal('0.00')
+            expected_total = expected_base + expected_merit
+        
+        # Additional confidence scoring based on document quality and results
+        confidence_factors = []
+        if is_high_quality:
+            confidence_factors.append(("High quality document", 25))
+        else:
+            confidence_factors.append(("Standard quality document", 15))
+            
+        if file_extension == 'pdf':
+            confidence_factors.append(("PDF format (preferred)", 20))
+        elif file_extension in ['png', 'jpg', 'jpeg']:
+            confidence_factors.append(("Image format (good)", 15))
+        else:
+            confidence_factors.append(("Other format", 10))
+            
+        if extracted_swa >= Decimal('88.75'):
+            confidence_factors.append(("Merit-eligible grades detected", 15))
+        
+        if extracted_units >= 15:
+            confidence_factors.append(("Adequate unit load", 10))
+            
+        total_confidence = sum(factor[1] for factor in confidence_factors)
+        base_confidence = 60  # Base confidence level
+        final_confidence = min(98, base_confidence + total_confidence)
+        
+        print(f"   🎯 AI Confidence: {final_confidence}% (factors: {', '.join(f[0] for f in confidence_factors)})")
+        
+        return {
+            'units_enrolled': extracted_units,
+            'swa_grade': extracted_swa,
+            'has_inc_withdrawn': has_inc_withdrawn,
+            'has_failed_dropped': has_failed_dropped,
+            'confidence_score': Decimal(str(final_confidence)),
+            'analysis_notes': f"Enhanced AI analysis with {final_confidence}% confidence. Merit eligible: {'Yes' if is_merit_eligible else 'No'}",
+            'is_merit_eligible': is_merit_eligible,
+            'expected_base_allowance': expected_base,
+            'expected_merit_incentive': expected_merit,
+            'expected_total_allowance': expected_total
+        }
+
+
+ANALYZERS = {
+    GradeDocumentAnalyzer.version: GradeDocumentAnalyzer,
+}
+
+
+def get_analyzer(version=None, rng=None, seed=None):
+    """An analyzer of the given version (AI_ANALYZER_VERSION by default)"""
+    version = version or getattr(settings, 'AI_ANALYZER_VERSION', GradeDocumentAnalyzer.version)
+    try:
+        analyzer_class = ANALYZERS[version]
+    except KeyError:
+        raise ValueError(f"Unknown analyzer version '{version}'. Available: {', '.join(sorted(ANALYZERS))}")
+    return analyzer_class(rng=rng, seed=seed)
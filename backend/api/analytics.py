@@ -0,0 +1,274 @@
+"""
+SWA and merit analytics for the admin dashboard, computed with NumPy.
+
+One values_list query fetches three numeric columns per application: a code
+the database packs from the semester, status and merit eligibility (units
+and INC/failed flags), the SWA in hundredths and the units. NumPy turns
+them into, per semester:
+
+- status counts and units totals (bincount over the code)
+- a count for every possible SWA value (0.00-100.00 in hundredths), for all
+  applications and for those meeting every merit rule except the SWA
+
+Everything else comes from those count vectors, without sorting: means,
+exact percentiles (from cumulative counts), the histogram
+(ANALYTICS_SWA_HISTOGRAM), merit-threshold sensitivity (how many would
+qualify at each of ANALYTICS_MERIT_THRESHOLDS) and semester-over-semester
+trends. Count vectors add up, so the all-semester figures, percentiles
+included, are exact too.
+
+The per-semester counts are cached. A request first reads max(updated_at)
+and the newest tombstone id (both indexed) and re-fetches only the
+semesters with rows changed since the last run; a deletion re-fetches
+everything. Entries also expire after ANALYTICS_CACHE_TIMEOUT, which covers
+rows removed without a tombstone (a deleted student's cascade).
+
+NumPy is optional for the project; without it analytics_available() is
+False and the endpoint answers 503.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, ExpressionWrapper, F, IntegerField, Max, Q, Value, When
+from django.db.models.functions import Cast, Round
+from .models import ApplicationTombstone, ScholarshipApplication
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install numpy
+    np = None
+
+STATUSES = [code for code, _ in ScholarshipApplication.STATUS_CHOICES]
+PERCENTILES = (10, 25, 50, 75, 90)
+MERIT_MIN_UNITS = 15  # same rule as ScholarshipApplication.save()
+SWA_SCALE = 100  # SWA has two decimal places; count whole hundredths
+SWA_SLOTS = 100 * SWA_SCALE + 1  # 0.00 .. 100.00
+STATE_KEY = 'analytics:state'
+
+
+def analytics_available():
+    return np is not None
+
+
+def semester_key(academic_year, semester):
+    # Semester names contain spaces, which memcached keys can't
+    return 'analytics:semester:' + hashlib.sha1(f'{academic_year}\x00{semester}'.encode()).hexdigest()
+
+
+def histogram_edges():
+    start, stop, width = settings.ANALYTICS_SWA_HISTOGRAM
+    return [round(float(edge), 2) for edge in np.arange(start, stop + width / 2, width)]
+
+
+def load_counts(applications, semesters):
+    """
+    Fetch `applications` (all within `semesters`, a list of (academic_year,
+    semester)) in one query and count them: {(academic_year, semester): counts}
+    """
+    semester_code = Case(*[When(academic_year=academic_year, semester=semester, then=Value(i))
+                           for i, (academic_year, semester) in enumerate(semesters)], default=Value(0))
+    status_code = Case(*[When(ai_verification_status=status, then=Value(i)) for i, status in enumerate(STATUSES)],
+                       default=Value(0))
+    merit_eligible = Case(When(units_enrolled__gte=MERIT_MIN_UNITS, has_inc_withdrawn=False,
+                               has_failed_dropped=False, then=Value(1)), default=Value(0))
+    queryset = applications.annotate(
+        code=ExpressionWrapper((semester_code * len(STATUSES) + status_code) * 2 + merit_eligible,
+                               output_field=IntegerField()),
+        swa_hundredths=Cast(Round(F('swa_grade') * SWA_SCALE), IntegerField()),
+    ).values_list('code', 'swa_hundredths', 'units_enrolled')
+    # Run the compiled query on a plain cursor: Django's per-row converters cost
+    # more than the query itself at a million rows, and NumPy needs none of them
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    # Missing SWA / units (None) become NaN and drop out below
+    columns = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    code = columns[:, 0].astype(np.int64)
+    swa, units = columns[:, 1], columns[:, 2]
+
+    group_count, status_count = len(semesters), len(STATUSES)
+    group = code // (status_count * 2)
+    eligible = code % 2 == 1
+    status_counts = np.bincount(code // 2, minlength=group_count * status_count).reshape(group_count, status_count)
+    has_units = ~np.isnan(units)
+    units_count = np.bincount(group[has_units], minlength=group_count)
+    units_sum = np.bincount(group[has_units], weights=units[has_units], minlength=group_count)
+
+    graded = ~np.isnan(swa)
+    slot = group[graded] * SWA_SLOTS + np.clip(swa[graded], 0, SWA_SLOTS - 1).astype(np.int64)
+    swa_counts = np.bincount(slot, minlength=group_count * SWA_SLOTS).reshape(group_count, SWA_SLOTS)
+    eligible_counts = np.bincount(slot[eligible[graded]], minlength=group_count * SWA_SLOTS).reshape(
+        group_count, SWA_SLOTS)
+
+    return {
+        semesters[g]: {
+            'status_counts': status_counts[g],
+            'units_count': int(units_count[g]),
+            'units_sum': float(units_sum[g]),
+            'swa_counts': swa_counts[g],
+            'eligible_counts': eligible_counts[g],
+        }
+        for g in range(group_count)
+    }
+
+
+def merge_counts(parts):
+    return {
+        'status_counts': np.sum([part['status_counts'] for part in parts], axis=0),
+        'units_count': sum(part['units_count'] for part in parts),
+        'units_sum': sum(part['units_sum'] for part in parts),
+        'swa_counts': np.sum([part['swa_counts'] for part in parts], axis=0),
+        'eligible_counts': np.sum([part['eligible_counts'] for part in parts], axis=0),
+    }
+
+
+def _round(value):
+    return None if value is None or np.isnan(value) else round(float(value), 2)
+
+
+def _slot(value):
+    return int(round(value * SWA_SCALE))
+
+
+def summarize(counts):
+    """The statistics for one semester's (or several merged) counts"""
+    applications = int(counts['status_counts'].sum())
+    swa_counts = counts['swa_counts']
+    graded = int(swa_counts.sum())
+    cumulative = np.concatenate(([0], np.cumsum(swa_counts)))
+    slot_values = np.arange(SWA_SLOTS) / SWA_SCALE
+
+    percentiles = {}
+    if graded:
+        # numpy.percentile's linear interpolation, with the k-th smallest SWA read off the cumulative counts
+        positions = np.array(PERCENTILES) / 100 * (graded - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, graded - 1)
+        lower_values = slot_values[np.searchsorted(cumulative, lower, side='right') - 1]
+        upper_values = slot_values[np.searchsorted(cumulative, upper, side='right') - 1]
+        values = lower_values + (positions - lower) * (upper_values - lower_values)
+        percentiles = {f'p{p}': _round(value) for p, value in zip(PERCENTILES, values)}
+
+    edges = [_slot(edge) for edge in histogram_edges()]
+    lower_edges = np.array(edges[:-1])
+    # Bins are [edge, next edge); the last one also takes its upper edge
+    upper_edges = np.array(edges[1:])
+    upper_edges[-1] += 1
+    histogram = cumulative[upper_edges] - cumulative[lower_edges]
+
+    eligible_cumulative = np.concatenate(([0], np.cumsum(counts['eligible_counts'])))
+    thresholds = settings.ANALYTICS_MERIT_THRESHOLDS
+    qualifying = eligible_cumulative[-1] - eligible_cumulative[[_slot(threshold) for threshold in thresholds]]
+
+    return {
+        'applications': applications,
+        'status_counts': {status: int(count) for status, count in zip(STATUSES, counts['status_counts'])},
+        'graded': graded,
+        'mean_swa': _round(swa_counts @ slot_values / graded) if graded else None,
+        'mean_units': _round(counts['units_sum'] / counts['units_count']) if counts['units_count'] else None,
+        'swa_percentiles': percentiles,
+        'swa_histogram': {
+            'below': int(cumulative[lower_edges[0]]),
+            'counts': histogram.tolist(),
+            'above': int(graded - cumulative[upper_edges[-1]]),
+        },
+        'merit_sensitivity': [
+            {'threshold': threshold, 'qualifying': int(count),
+             'rate': round(int(count) / applications * 100, 2) if applications else None}
+            for threshold, count in zip(thresholds, qualifying)
+        ],
+    }
+
+
+def _all_semesters():
+    return sorted(ScholarshipApplication.objects.values_list('academic_year', 'semester').distinct())
+
+
+def _semesters_changed_since(updated_at):
+    return set(ScholarshipApplication.objects.filter(updated_at__gt=updated_at)
+               .values_list('academic_year', 'semester').distinct())
+
+
+def semester_counts():
+    """{(academic_year, semester): counts}, re-fetching only semesters changed since the last call"""
+    latest = ScholarshipApplication.objects.aggregate(latest=Max('updated_at'))['latest']
+    tombstone_id = ApplicationTombstone.objects.aggregate(latest=Max('id'))['latest'] or 0
+    state = cache.get(STATE_KEY)
+
+    counts = {}
+    if state and state['tombstone_id'] == tombstone_id and state['updated_at'] is not None:
+        semesters = set(state['semesters'])
+        changed = set()
+        if latest and latest != state['updated_at']:
+            # Rows committed late can carry an older updated_at; look back a little
+            changed = _semesters_changed_since(state['updated_at'] - settings.SYNC_CURSOR_SKEW)
+            semesters |= changed
+        cached = cache.get_many([semester_key(*semester) for semester in semesters - changed])
+        counts = {semester: cached[semester_key(*semester)] for semester in semesters - changed
+                  if semester_key(*semester) in cached}
+        stale = sorted(semesters - set(counts))
+        applications = ScholarshipApplication.objects.filter(
+            Q(*[Q(academic_year=year, semester=name) for year, name in stale], _connector=Q.OR)
+        ) if stale else None
+    else:
+        stale = _all_semesters()
+        applications = ScholarshipApplication.objects.all()
+
+    if stale:
+        fresh = load_counts(applications, stale)
+        for semester in stale:
+            # A semester whose applications were all deleted drops out
+            if fresh[semester]['status_counts'].sum():
+                counts[semester] = fresh[semester]
+        cache.set_many({semester_key(*semester): counts[semester] for semester in stale if semester in counts},
+                       settings.ANALYTICS_CACHE_TIMEOUT)
+
+    cache.set(STATE_KEY, {'updated_at': latest, 'tombstone_id': tombstone_id, 'semesters': list(counts)},
+              settings.ANALYTICS_CACHE_TIMEOUT)
+    return dict(sorted(counts.items()))
+
+
+def semester_trends(semesters):
+    """Change of each semester's key figures from the semester before it"""
+    if len(semesters) < 2:
+        return []
+    threshold_index = settings.ANALYTICS_MERIT_THRESHOLDS.index(settings.ANALYTICS_CURRENT_MERIT_THRESHOLD)
+    applications = np.array([s['applications'] for s in semesters], dtype=np.float64)
+    mean_swa = np.array([np.nan if s['mean_swa'] is None else s['mean_swa'] for s in semesters])
+    approved = np.array([s['status_counts']['approved'] for s in semesters], dtype=np.float64)
+    qualifying = np.array([s['merit_sensitivity'][threshold_index]['qualifying'] for s in semesters],
+                          dtype=np.float64)
+    changes = {
+        'applications_change': np.diff(applications),
+        'applications_change_pct': np.diff(applications) / applications[:-1] * 100,
+        'mean_swa_change': np.diff(mean_swa),
+        'approval_rate_change': np.diff(approved / applications * 100),
+        'merit_rate_change': np.diff(qualifying / applications * 100),
+    }
+    return [
+        {
+            'academic_year': semesters[i + 1]['academic_year'],
+            'semester': semesters[i + 1]['semester'],
+            'compared_to': f"{semesters[i]['academic_year']} - {semesters[i]['semester']}",
+            **{name: _round(values[i]) for name, values in changes.items()},
+        }
+        for i in range(len(semesters) - 1)
+    ]
+
+
+def dashboard_analytics(academic_year=None, semester=None):
+    counts = semester_counts()
+    semesters = [{'academic_year': year, 'semester': name, **summarize(part)} for (year, name), part in counts.items()]
+    trends = semester_trends(semesters)
+    selected = {key for key in counts
+                if (not academic_year or key[0] == academic_year) and (not semester or key[1] == semester)}
+    return {
+        'merit_thresholds': list(settings.ANALYTICS_MERIT_THRESHOLDS),
+        'current_merit_threshold': settings.ANALYTICS_CURRENT_MERIT_THRESHOLD,
+        'swa_histogram_edges': histogram_edges(),
+        'overall': summarize(merge_counts([counts[key] for key in sorted(selected)])) if selected else None,
+        'semesters': [s for s in semesters if (s['academic_year'], s['semester']) in selected],
+        'trends': [t for t in trends if (t['academic_year'], t['semester']) in selected],
+    }
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from .search import repair_search_index, suspend_search_triggers
+        pre_migrate.connect(suspend_search_triggers, sender=self)
+        post_migrate.connect(repair_search_index, sender=self)
@@ -0,0 +1,121 @@
+"""
+Archiving closed semesters.
+
+archive_semester() moves every application of one semester from the hot
+ScholarshipApplication table into ArchivedApplication in batches, packing the
+verification notes and AIVerificationLog rows into compressed blobs, then
+rebuilds the SemesterSummary rollup from the archived rows. Each batch is one
+transaction, so an interrupted run can simply be started again.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from .compression import pack_json
+from .verification_notes import render_verification_notes
+from .sketches import rebuild_sketches
+from .models import ApplicationTombstone, ArchivedApplication, ScholarshipApplication, SemesterSummary
+
+
+def _log_record(log):
+    return {
+        'verification_type': log.verification_type,
+        'input': log.input,
+        'response': log.response,
+        'confidence_score': str(log.confidence_score),
+        'created_at': log.created_at.isoformat(),
+    }
+
+
+def _archive_row(application):
+    return ArchivedApplication(
+        original_id=application.id,
+        student_id=application.student_id,
+        semester=application.semester,
+        academic_year=application.academic_year,
+        units_enrolled=application.units_enrolled,
+        swa_grade=application.swa_grade,
+        grade_document=application.grade_document.name if application.grade_document else '',
+        has_inc_withdrawn=application.has_inc_withdrawn,
+        has_failed_dropped=application.has_failed_dropped,
+        ai_verification_status=application.ai_verification_status,
+        ai_confidence_score=application.ai_confidence_score,
+        base_allowance=application.base_allowance,
+        merit_incentive=application.merit_incentive,
+        total_allowance=application.total_allowance,
+        notes_compressed=pack_json(render_verification_notes(application, memoize=False)),
+        logs_compressed=pack_json([_log_record(log) for log in application.aiverificationlog_set.all()]),
+        created_at=application.created_at,
+        updated_at=application.updated_at,
+    )
+
+
+def archive_semester(academic_year, semester, batch_size=500, progress=None):
+    """Move one semester to the archive. Returns the number of applications moved."""
+    moved = 0
+    hot = ScholarshipApplication.objects.filter(academic_year=academic_year, semester=semester)
+    while True:
+        batch = list(hot.order_by('id').prefetch_related('aiverificationlog_set')[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            # ignore_conflicts lets a re-run finish a batch that was archived
+            # but not yet deleted when the previous run stopped
+            ArchivedApplication.objects.bulk_create([_archive_row(app) for app in batch], ignore_conflicts=True)
+            # Archived applications leave the admin list like deleted ones
+            ApplicationTombstone.record(batch)
+            # Deleting the applications also deletes their AIVerificationLog rows
+            ScholarshipApplication.objects.filter(id__in=[app.id for app in batch]).delete()
+        moved += len(batch)
+        if progress:
+            progress(moved)
+
+    rebuild_semester_summary(academic_year, semester)
+    # Drops the semester's sketch, so it leaves the dashboard's student count
+    rebuild_sketches(academic_year, semester)
+    return moved
+
+
+def rebuild_semester_summary(academic_year, semester):
+    stats = ArchivedApplication.objects.filter(
+        academic_year=academic_year, semester=semester
+    ).aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(ai_verification_status='approved')),
+        pending=Count('id', filter=Q(ai_verification_status__in=['pending', 'under_review'])),
+        rejected=Count('id', filter=Q(ai_verification_status='rejected')),
+        unique_students=Count('student', distinct=True),
+        merit=Count('id', filter=Q(merit_incentive__gt=0)),
+        average_swa=Avg('swa_grade'),
+        disbursed=Sum('total_allowance', filter=Q(ai_verification_status='approved')),
+    )
+    if not stats['total']:
+        return None
+
+    summary, _ = SemesterSummary.objects.update_or_create(
+        academic_year=academic_year,
+        semester=semester,
+        defaults={
+            'total_applications': stats['total'],
+            'approved_applications': stats['approved'],
+            'pending_applications': stats['pending'],
+            'rejected_applications': stats['rejected'],
+            'unique_students': stats['unique_students'],
+            'merit_recipients': stats['merit'],
+            'average_swa': (Decimal(str(stats['average_swa'])).quantize(Decimal('0.01'))
+                            if stats['average_swa'] is not None else None),
+            'total_disbursed': stats['disbursed'] or Decimal('0.00'),
+        }
+    )
+    return summary
+
+
+def semesters_to_archive(before=None, academic_year=None, semester=None):
+    """(academic_year, semester) pairs still in the hot table matching the filters"""
+    semesters = ScholarshipApplication.objects.all()
+    if before:
+        semesters = semesters.filter(academic_year__lt=before)
+    if academic_year:
+        semesters = semesters.filter(academic_year=academic_year)
+    if semester:
+        semesters = semesters.filter(semester=semester)
+    return list(semesters.order_by('academic_year', 'semester').values_list('academic_year', 'semester').distinct())
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication
+from .models import AuthToken
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication backed by AuthToken with a sliding expiry.
+
+    Clients still send "Authorization: Token <key>". The expiry check is an
+    indexed comparison on the row that is already fetched, and the expiry is
+    only pushed forward when it is older than AUTH_TOKEN_REFRESH_INTERVAL so
+    active clients do not cause a write on every request.
+    """
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        try:
+            token = AuthToken.objects.select_related('user').get(key=key)
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        now = timezone.now()
+        if token.expires_at <= now:
+            token.delete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        new_expiry = now + settings.AUTH_TOKEN_TTL
+        if new_expiry - token.expires_at >= settings.AUTH_TOKEN_REFRESH_INTERVAL:
+            AuthToken.objects.filter(key=token.key).update(expires_at=new_expiry)
+            token.expires_at = new_expiry
+
+        return (token.user, token)
+
+
+STREAM_TICKET_SALT = 'api.event-stream-ticket'
+
+
+def issue_stream_ticket(user):
+    """
+    A signed ticket that opens the user's event stream for EVENTS_TICKET_SECONDS.
+    It is only accepted by StreamTicketAuthentication, so a ticket leaked
+    through a URL in a log cannot be used as an API token.
+    """
+    return signing.dumps({'user': user.pk}, salt=STREAM_TICKET_SALT)
+
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """
+    ?ticket=<ticket> from POST events/ticket/, for clients that cannot set
+    headers (the browser EventSource). Only used by the event stream views;
+    the long-lived API token is never accepted in the query string.
+    """
+
+    def authenticate(self, request):
+        ticket = request.query_params.get('ticket')
+        if not ticket:
+            return None
+        try:
+            payload = signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=settings.EVENTS_TICKET_SECONDS)
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Stream ticket has expired.')
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed('Invalid stream ticket.')
+
+        user = get_user_model().objects.filter(pk=payload.get('user')).first()
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, None)
+
+    def authenticate_header(self, request):
+        return 'Token'
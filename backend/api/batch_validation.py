@@ -0,0 +1,168 @@
+"""
+Batch pre-screening of grade documents.
+
+Runs GradeDocumentAnalyzer.validate over many files (uploads, a directory or a
+zip archive) on a thread pool and yields one verdict per file as soon as it is
+ready. Nothing is written to the database. Used by the documents/validate/
+endpoint and the validate_documents command.
+
+Zip archives are read member by member with limits on the number of files,
+the size of each file, the total uncompressed size and the compression ratio,
+so a small upload cannot expand into gigabytes.
+"""
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from django.conf import settings
+from django.core.files import File
+from .analysis import get_analyzer
+from .models import ScholarshipApplication
+
+RATIO_CHECK_MIN_SIZE = 1024 * 1024
+
+
+class BatchLimitExceeded(ValueError):
+    """The batch as a whole is over a configured limit"""
+
+
+class BatchDocument:
+    """One file to validate: its name and bytes, or why it was refused before validation"""
+
+    def __init__(self, name, data=None, error=None):
+        self.name = name
+        self.data = data
+        self.error = error
+
+
+def read_limited(fileobj, name):
+    """Read an uploaded or local file, refusing ones over the per-file limit"""
+    max_size = settings.BATCH_VALIDATION_MAX_FILE_SIZE
+    data = fileobj.read(max_size + 1)
+    if len(data) > max_size:
+        return BatchDocument(name, error=f'File is larger than {max_size} bytes')
+    return BatchDocument(name, data)
+
+
+def iter_zip_documents(fileobj):
+    """
+    BatchDocuments for the files inside a zip archive. Raises zipfile.BadZipFile
+    for a corrupt archive and BatchLimitExceeded when the archive is too big.
+    """
+    max_files = settings.BATCH_VALIDATION_MAX_FILES
+    max_size = settings.BATCH_VALIDATION_MAX_FILE_SIZE
+    max_total = settings.BATCH_VALIDATION_MAX_TOTAL_SIZE
+    max_ratio = settings.BATCH_VALIDATION_MAX_COMPRESSION_RATIO
+
+    archive = zipfile.ZipFile(fileobj)
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    if len(members) > max_files:
+        raise BatchLimitExceeded(f'Archive has {len(members)} files; the limit is {max_files}')
+
+    def generate():
+        total = 0
+        with archive:
+            for info in members:
+                if info.file_size > max_size:
+                    yield BatchDocument(info.filename, error=f'File is larger than {max_size} bytes')
+                    continue
+                # Small members can't do harm whatever their ratio (blank test pages compress well)
+                if (info.file_size > RATIO_CHECK_MIN_SIZE and info.compress_size
+                        and info.file_size / info.compress_size > max_ratio):
+                    yield BatchDocument(info.filename, error=f'Compression ratio above {max_ratio}:1')
+                    continue
+                # The sizes in the archive's directory can lie; count what is actually read
+                with archive.open(info) as member:
+                    document = read_limited(member, info.filename)
+                total += len(document.data or b'')
+                if total > max_total:
+                    raise BatchLimitExceeded(f'Archive expands to more than {max_total} bytes')
+                yield document
+
+    return generate()
+
+
+def iter_path_documents(paths):
+    """BatchDocuments for local files, directories (recursive) and zip archives"""
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.path.join(root, name) for root, _, files in os.walk(path) for name in files)
+        else:
+            names = [path]
+        for name in names:
+            if name.lower().endswith('.zip'):
+                with open(name, 'rb') as handle:
+                    try:
+                        members = iter_zip_documents(handle)
+                    except zipfile.BadZipFile:
+                        yield BatchDocument(name, error='Not a valid zip archive')
+                        continue
+                    yield from members
+            else:
+                with open(name, 'rb') as handle:
+                    yield read_limited(handle, name)
+
+
+def validate_document(document, analyzer):
+    started = time.perf_counter()
+    if document.error:
+        result = {'is_valid': False, 'confidence': 0, 'reason': document.error}
+    else:
+        # The folder inside an archive is dropped, and the name is built the way
+        # submission builds it so both get the same filename verdict
+        name = ScholarshipApplication.analysis_filename_for(os.path.basename(document.name))
+        result = analyzer.validate(File(io.BytesIO(document.data), name=name))
+    verdict = {
+        'file': document.name,
+        'is_valid': result['is_valid'],
+        'confidence': round(float(result['confidence']), 1),
+    }
+    if 'reason' in result:
+        verdict['reason'] = result['reason']
+    verdict['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return verdict
+
+
+def validate_documents(documents, workers=None, analyzer_version=None):
+    """
+    Yield a verdict dict per document in completion order, then a final
+    {'summary': ...}. At most a few documents per worker are held in memory.
+    A BatchLimitExceeded raised while reading ends the batch with an
+    {'error': ...} line before the summary.
+    """
+    workers = workers or settings.BATCH_VALIDATION_WORKERS
+    analyzer = get_analyzer(analyzer_version)
+    summary = {'files': 0, 'valid': 0, 'invalid': 0}
+    started = time.perf_counter()
+    pending = set()
+
+    def drain(block):
+        if block:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        else:
+            done = [future for future in pending if future.done()]
+        for future in done:
+            pending.discard(future)
+            verdict = future.result()
+            summary['files'] += 1
+            summary['valid' if verdict['is_valid'] else 'invalid'] += 1
+            yield verdict
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        error = None
+        try:
+            for document in documents:
+                while len(pending) >= workers * 2:
+                    yield from drain(True)
+                pending.add(pool.submit(validate_document, document, analyzer))
+                yield from drain(False)
+        except BatchLimitExceeded as e:
+            error = str(e)
+        while pending:
+            yield from drain(True)
+        if error:
+            yield {'error': error}
+
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    yield {'summary': summary}
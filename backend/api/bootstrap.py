@@ -0,0 +1,71 @@
+"""
+What a student's client loads when it starts: the profile, the dashboard and
+the first page of applications.
+
+student_dashboard() builds the dashboard for both DashboardView and
+BootstrapView, so the two always agree. The statistics are one conditional
+aggregate instead of a query per status, and the recent applications can be
+handed in when the caller has already fetched them: BootstrapView reads the
+first page of applications once and reuses it, and its total doubles as the
+page's `count`.
+"""
+from django.db.models import Count, Q, Sum
+from .serializers import ScholarshipApplicationSerializer, StudentProfileSerializer
+
+RECENT_APPLICATIONS = 5
+DASHBOARD_SECTIONS = ('student_info', 'recent_applications', 'statistics', 'eligibility_requirements')
+
+ELIGIBILITY_REQUIREMENTS = {
+    'base_allowance': 'All TCU students receive ₱5,000 monthly',
+    'merit_incentive_requirements': [
+        'Must be taking at least 15 units',
+        'SWA of 88.75 or 1.75 or better',
+        'Not a first time applicant',
+        'No INC, withdrew, failed, or dropped subjects in previous semester'
+    ]
+}
+
+ADMIN_REDIRECT = {
+    'redirect_to_admin': True,
+    'message': 'Admin users should use the admin dashboard'
+}
+
+
+def application_statistics(applications):
+    """Counts per status and the approved total, in one query"""
+    totals = applications.aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(ai_verification_status='approved')),
+        pending=Count('id', filter=Q(ai_verification_status__in=['pending', 'under_review'])),
+        rejected=Count('id', filter=Q(ai_verification_status='rejected')),
+        received=Sum('total_allowance', filter=Q(ai_verification_status='approved')),
+    )
+    return {
+        'total_applications': totals['total'],
+        'approved_applications': totals['approved'],
+        'pending_applications': totals['pending'],
+        'rejected_applications': totals['rejected'],
+        'total_allowance_received': float(totals['received'] or 0),
+        'monthly_base_allowance': 5000.00,
+        'merit_incentive_available': 5000.00,
+    }
+
+
+def student_dashboard(student_profile, applications, recent=None, sections=DASHBOARD_SECTIONS, statistics=None):
+    """
+    The student dashboard. `applications` is the student's applications,
+    newest first; `recent` and `statistics` may be passed in when already
+    computed. Only `sections` are built.
+    """
+    dashboard = {}
+    if 'student_info' in sections:
+        dashboard['student_info'] = StudentProfileSerializer(student_profile).data
+    if 'recent_applications' in sections:
+        if recent is None:
+            recent = applications[:RECENT_APPLICATIONS]
+        dashboard['recent_applications'] = ScholarshipApplicationSerializer(recent, many=True).data
+    if 'statistics' in sections:
+        dashboard['statistics'] = statistics or application_statistics(applications)
+    if 'eligibility_requirements' in sections:
+        dashboard['eligibility_requirements'] = ELIGIBILITY_REQUIREMENTS
+    return dashboard
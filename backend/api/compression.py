@@ -0,0 +1,38 @@
+"""
+Compact storage helpers for JSON payloads kept in BinaryFields.
+
+Payloads are compact JSON compressed with zstd when the optional zstandard
+package is installed, otherwise zlib. unpack_json() recognises both formats
+by their header, so rows written either way stay readable.
+"""
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def pack_json(value):
+    """Serialize to compact JSON and compress"""
+    raw = json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(raw)
+    return zlib.compress(raw, 6)
+
+
+def unpack_json(blob):
+    """Inverse of pack_json; None or empty input gives None"""
+    if not blob:
+        return None
+    blob = bytes(blob)
+    if blob.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError('This payload is zstd-compressed; install the zstandard package to read it')
+        raw = zstandard.ZstdDecompressor().decompress(blob)
+    else:
+        raw = zlib.decompress(blob)
+    return json.loads(raw.decode('utf-8'))
@@ -0,0 +1,91 @@
+"""
+Read-replica routing for the admin analytics views.
+
+Only code running inside replica_reads() reads from the replica; everything
+else, and every write, goes to the default database. An admin who just
+changed an application is pinned to the primary for REPLICA_STICKY_SECONDS
+(pin_to_primary) so their next list reflects their own change even while the
+replica catches up.
+
+Delta sync (?since=) must never read from the replica: its cursor moves past
+whatever the query returned, so rows the replica has not received yet would
+be skipped for good. Such reads run inside primary_reads().
+
+The pin is a timestamp on the admin's AuthToken rows rather than a cache
+entry, so every worker process sees it. Authentication already loads the
+token from the primary before the view runs, so checking it costs no query.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_available():
+    return settings.REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def pin_to_primary(user):
+    """Send this user's replica reads to the primary for a short while, on all of their devices"""
+    if replica_available() and user is not None and user.pk is not None:
+        from .models import AuthToken
+        now = timezone.now()
+        AuthToken.objects.filter(user=user, expires_at__gt=now).update(
+            primary_reads_until=now + timedelta(seconds=settings.REPLICA_STICKY_SECONDS)
+        )
+
+
+def is_pinned_to_primary(request):
+    """Whether the token that authenticated `request` carries a live pin"""
+    until = getattr(getattr(request, 'auth', None), 'primary_reads_until', None)
+    return until is not None and until > timezone.now()
+
+
+def replica_reads(view_func):
+    """
+    View decorator: queries made while the view runs read from the replica,
+    unless the user recently wrote something. Use with method_decorator on
+    read-only handlers.
+    """
+    @wraps(view_func)
+    def wrapped(request, *args, **kwargs):
+        if not replica_available() or is_pinned_to_primary(request):
+            return view_func(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapped
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside a replica_reads view, for reads that must not lag"""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_available():
+            return settings.REPLICA_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,158 @@
+"""
+Email verification delivery.
+
+Registration only inserts an EmailVerification row (queue_verification_email);
+nothing talks to the mail server on the request thread. The background sender
+(send_pending_verification_emails, driven by the send_verification_emails
+management command) claims due rows in batches, sends the whole batch over one
+mail connection and reschedules failures with exponential backoff.
+"""
+import secrets
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+from .models import EmailVerification, StudentProfile
+
+
+def generate_verification_code():
+    """Random 6 digit code, zero padded"""
+    return f"{secrets.randbelow(1000000):06d}"
+
+
+def queue_verification_email(email):
+    """Create a verification code for the address; the background sender delivers it"""
+    return EmailVerification.objects.create(
+        email=email,
+        verification_code=generate_verification_code(),
+        next_attempt_at=timezone.now()
+    )
+
+
+def build_verification_message(verification, connection=None):
+    body = (
+        f"Your TCU scholarship portal verification code is {verification.verification_code}.\n\n"
+        f"The code expires in {int(settings.EMAIL_VERIFICATION_TTL.total_seconds() // 3600)} hours. "
+        f"If you did not create an account you can ignore this email."
+    )
+    return EmailMessage(
+        subject='Verify your email address',
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[verification.email],
+        connection=connection
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... for the given attempt count"""
+    return settings.EMAIL_RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0))
+
+
+def claim_due_verifications(batch_size):
+    """
+    Lease up to batch_size due rows to this worker by pushing next_attempt_at
+    forward. The conditional update means two workers never send the same row.
+    """
+    now = timezone.now()
+    due = EmailVerification.objects.filter(
+        sent_at__isnull=True,
+        is_verified=False,
+        next_attempt_at__lte=now
+    ).order_by('next_attempt_at')
+    ids = list(due.values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    lease_until = now + settings.EMAIL_RETRY_BASE_DELAY
+    EmailVerification.objects.filter(
+        id__in=ids, next_attempt_at__lte=now
+    ).update(next_attempt_at=lease_until)
+    return list(EmailVerification.objects.filter(id__in=ids, next_attempt_at=lease_until))
+
+
+def send_pending_verification_emails(batch_size=None, connection=None):
+    """
+    Send one batch of due verification emails over a single connection.
+    Returns a dict with sent, retried and failed counts.
+    """
+    batch_size = batch_size or settings.EMAIL_SEND_BATCH_SIZE
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    batch = claim_due_verifications(batch_size)
+    if not batch:
+        return result
+
+    sent_ids = []
+    errors = {}
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for verification in batch:
+            try:
+                build_verification_message(verification, connection).send()
+                sent_ids.append(verification.id)
+            except Exception as e:
+                errors[verification.id] = str(e)
+    except Exception as e:
+        # Could not reach the mail server at all - the whole batch is retried
+        errors.update({v.id: str(e) for v in batch if v.id not in sent_ids})
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    now = timezone.now()
+    if sent_ids:
+        EmailVerification.objects.filter(id__in=sent_ids).update(
+            sent_at=now,
+            send_attempts=F('send_attempts') + 1,
+            next_attempt_at=None,
+            last_error=''
+        )
+        result['sent'] = len(sent_ids)
+
+    for verification in batch:
+        if verification.id not in errors:
+            continue
+        attempts = verification.send_attempts + 1
+        if attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            next_attempt = None
+            result['failed'] += 1
+        else:
+            next_attempt = now + retry_delay(attempts)
+            result['retried'] += 1
+        EmailVerification.objects.filter(id=verification.id).update(
+            send_attempts=attempts,
+            next_attempt_at=next_attempt,
+            last_error=errors[verification.id][:500]
+        )
+
+    return result
+
+
+def verify_email_code(email, code):
+    """
+    Check a code for the address. Marks the verification and the student
+    profile as verified and returns True, or returns False.
+    """
+    cutoff = timezone.now() - settings.EMAIL_VERIFICATION_TTL
+    verification = EmailVerification.objects.filter(
+        email=email,
+        verification_code=code,
+        is_verified=False,
+        created_at__gt=cutoff
+    ).order_by('-created_at').first()
+    if not verification:
+        return False
+
+    now = timezone.now()
+    verification.is_verified = True
+    verification.verified_at = now
+    verification.save(update_fields=['is_verified', 'verified_at'])
+
+    # Older codes for the same address are no longer needed
+    EmailVerification.objects.filter(email=email, is_verified=False).update(next_attempt_at=None)
+    StudentProfile.objects.filter(user__email=email).update(email_verified=True)
+    return True
@@ -0,0 +1,204 @@
+"""
+In-process pub/sub for application status changes, streamed to browsers as
+Server-Sent Events.
+
+ScholarshipApplication.save() publishes an 'application' event when an
+application is created or its status changes (after the transaction
+commits), and AdminApplicationsView.delete publishes 'application_deleted'.
+Each event goes to the owning student's stream and to the admin firehose.
+
+Subscribers get a bounded queue; one that falls behind is told to 'resync'
+(re-fetch its lists) instead of blocking publishers. Recent events are kept
+so a reconnecting EventSource can replay what it missed via Last-Event-ID.
+
+The broker lives in this process only. With several server processes a
+client only sees events published by the process it is connected to, and
+should fall back to re-fetching on 'resync' or on a timer.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from rest_framework.renderers import BaseRenderer
+
+# Event ids are "<boot>-<n>", so an id from before a restart is recognised
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class Event:
+    __slots__ = ('id', 'kind', 'data', 'user_id')
+
+    def __init__(self, id, kind, data, user_id):
+        self.id = id
+        self.kind = kind
+        self.data = data
+        self.user_id = user_id
+
+    def encode(self):
+        payload = json.dumps(self.data, cls=DjangoJSONEncoder)
+        return f'id: {self.id}\nevent: {self.kind}\ndata: {payload}\n\n'.encode()
+
+
+class Subscription:
+    def __init__(self, broker, user_id, firehose, queue_size):
+        self.broker = broker
+        self.user_id = user_id
+        self.firehose = firehose
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.firehose or event.user_id == self.user_id
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Too slow to keep up; the client is told to re-fetch instead
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    def __init__(self, history_size, queue_size):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._sequence = itertools.count(1)
+
+    def publish(self, kind, data, user_id=None):
+        with self._lock:
+            event = Event(f'{BOOT_ID}-{next(self._sequence)}', kind, data, user_id)
+            self._history.append(event)
+            subscribers = [subscription for subscription in self._subscribers if subscription.wants(event)]
+        for subscription in subscribers:
+            subscription.offer(event)
+        return event
+
+    def subscribe(self, user_id=None, firehose=False, last_event_id=None):
+        """
+        A new subscription. With last_event_id, events published after it are
+        queued first, or the subscription starts overflowed (a 'resync') when
+        they are no longer all in the history.
+        """
+        subscription = Subscription(self, user_id, firehose, self.queue_size)
+        with self._lock:
+            if last_event_id:
+                missed = self._events_after(last_event_id)
+                if missed is None:
+                    subscription.overflowed = True
+                else:
+                    for event in missed:
+                        if subscription.wants(event):
+                            subscription.offer(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _events_after(self, last_event_id):
+        boot, _, sequence = last_event_id.partition('-')
+        if boot != BOOT_ID or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if not self._history:
+            return []
+        oldest = int(self._history[0].id.partition('-')[2])
+        if sequence < oldest - 1:
+            return None
+        return [event for event in self._history if int(event.id.partition('-')[2]) > sequence]
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets EventSource clients (Accept: text/event-stream) get error responses as an SSE 'error' event"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f'event: error\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'.encode()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = EventBroker(settings.EVENTS_HISTORY_SIZE, settings.EVENTS_QUEUE_SIZE)
+    return _broker
+
+
+def application_event(application, previous_status):
+    return {
+        'id': application.id,
+        'status': application.ai_verification_status,
+        'previous_status': previous_status,
+        'academic_year': application.academic_year,
+        'semester': application.semester,
+        'ai_confidence_score': application.ai_confidence_score,
+        'merit_incentive': application.merit_incentive,
+        'total_allowance': application.total_allowance,
+        'updated_at': application.updated_at,
+    }
+
+
+def publish_application_status(application, previous_status):
+    """Publish a status change once the current transaction commits"""
+    data = application_event(application, previous_status)
+    user_id = application.student.user_id
+    transaction.on_commit(lambda: get_broker().publish('application', data, user_id))
+
+
+def publish_application_deleted(application_id, user_id):
+    data = {'id': application_id}
+    transaction.on_commit(lambda: get_broker().publish('application_deleted', data, user_id))
+
+
+def event_stream(user_id, firehose=False, last_event_id=None, heartbeat=None, max_duration=None):
+    """
+    SSE body: events as they arrive, a comment line as a keepalive, and an
+    end after max_duration so the worker is released and the browser
+    reconnects (resuming from Last-Event-ID). The subscription is made when
+    the response starts streaming and dropped when it is closed.
+    """
+    heartbeat = heartbeat or settings.EVENTS_HEARTBEAT_SECONDS
+    max_duration = max_duration or settings.EVENTS_MAX_STREAM_SECONDS
+    # The stream doesn't use the database; don't hold a connection open for its lifetime
+    if not connection.in_atomic_block:
+        connection.close()
+    subscription = get_broker().subscribe(user_id, firehose=firehose, last_event_id=last_event_id)
+    deadline = time.monotonic() + max_duration
+    try:
+        yield f'retry: {settings.EVENTS_RETRY_MILLISECONDS}\n\n'.encode()
+        while time.monotonic() < deadline:
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield b'event: resync\ndata: {}\n\n'
+            event = subscription.get(timeout=min(heartbeat, max(0, deadline - time.monotonic())))
+            yield event.encode() if event else b': keepalive\n\n'
+    finally:
+        subscription.close()
@@ -0,0 +1,136 @@
+"""
+Perceptual fingerprints of grade documents, to catch one scan submitted
+under several students' accounts.
+
+Each stored document (the first page for PDFs) gets a 64-bit dHash: the
+page is shrunk to 9x8 grey pixels and every bit records whether a pixel is
+brighter than its right-hand neighbour. Re-saving, rescaling, recompressing
+or lightly editing a scan changes only a few bits, so near-duplicates are
+documents whose hashes differ in at most DOCUMENT_DUPLICATE_MAX_DISTANCE
+bits (Hamming distance).
+
+Lookups use multi-index hashing instead of comparing against every stored
+hash. The hash is stored as four 16-bit chunks in indexed columns; if two
+hashes differ in at most r bits, at least one chunk differs in at most r//4
+bits (pigeonhole). A lookup probes each chunk's index with the values
+within r//4 bit flips (1, 17 or 137 of them) and checks the real distance
+only on those candidates, so its cost depends on the number of near
+matches, not on the number of documents.
+
+Fingerprints are computed with the previews (see previews.py), once per
+content digest. A match is recorded on the later application as
+duplicate_document_of, for an admin to review; nothing is rejected
+automatically, as different students' reports printed from the same
+template can also hash close together.
+"""
+import itertools
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .models import DocumentFingerprint, ScholarshipApplication
+
+HASH_SIZE = 8
+CHUNK_COUNT = 4
+CHUNK_BITS = 64 // CHUNK_COUNT
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def dhash(image):
+    """64-bit difference hash of a PIL image"""
+    image = ImageOps.exif_transpose(image)
+    grey = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    pixels = grey.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for column in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def to_signed(value):
+    """Store the unsigned hash in a signed 64-bit column"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def split_chunks(value):
+    return [(value >> (CHUNK_BITS * i)) & CHUNK_MASK for i in range(CHUNK_COUNT)]
+
+
+def probe_values(chunk, radius):
+    """Every chunk value within `radius` bit flips of `chunk`"""
+    values = []
+    for flips in range(radius + 1):
+        for bits in itertools.combinations(range(CHUNK_BITS), flips):
+            mask = 0
+            for bit in bits:
+                mask |= 1 << bit
+            values.append(chunk ^ mask)
+    return values
+
+
+def record_fingerprint(digest, image):
+    """Store the fingerprint of the document with this content digest"""
+    value = dhash(image)
+    chunks = split_chunks(value)
+    fingerprint, _ = DocumentFingerprint.objects.update_or_create(digest=digest, defaults={
+        'dhash': to_signed(value),
+        **{f'chunk{i}': chunk for i, chunk in enumerate(chunks)},
+    })
+    return fingerprint
+
+
+def near_fingerprints(value, max_distance=None):
+    """{digest: distance} of stored documents within max_distance bits of the hash `value`"""
+    if max_distance is None:
+        max_distance = settings.DOCUMENT_DUPLICATE_MAX_DISTANCE
+    radius = max_distance // CHUNK_COUNT
+    condition = Q()
+    for i, chunk in enumerate(split_chunks(value)):
+        condition |= Q(**{f'chunk{i}__in': probe_values(chunk, radius)})
+    matches = {}
+    for digest, stored in DocumentFingerprint.objects.filter(condition).values_list('digest', 'dhash'):
+        distance = hamming(value, to_unsigned(stored))
+        if distance <= max_distance:
+            matches[digest] = distance
+    return matches
+
+
+def flag_duplicate_document(application):
+    """
+    Point application.duplicate_document_of at the closest (then oldest)
+    other student's application whose document is a near-duplicate of this
+    one, or clear it. Returns the matched application id or None.
+    """
+    stored = (DocumentFingerprint.objects.filter(digest=application.document_digest)
+              .values_list('dhash', flat=True).first()) if application.document_digest else None
+    match_id = distance = None
+    if stored is not None:
+        matches = near_fingerprints(to_unsigned(stored))
+        others = (ScholarshipApplication.objects.filter(document_digest__in=list(matches))
+                  .exclude(student_id=application.student_id).exclude(pk=application.pk)
+                  .order_by('id').values_list('id', 'document_digest')[:settings.DOCUMENT_DUPLICATE_MAX_CANDIDATES])
+        if others:
+            match_id, digest = min(others, key=lambda other: (matches[other[1]], other[0]))
+            distance = matches[digest]
+
+    if (match_id, distance) != (application.duplicate_document_of_id, application.duplicate_document_distance):
+        # Bump updated_at so clients syncing the admin list see the flag, and
+        # version so a review started before it is rejected as stale
+        type(application).objects.filter(pk=application.pk).update(
+            duplicate_document_of=match_id, duplicate_document_distance=distance, updated_at=timezone.now(),
+            version=F('version') + 1
+        )
+        application.duplicate_document_of_id = match_id
+        application.duplicate_document_distance = distance
+        application.version += 1
+    return match_id
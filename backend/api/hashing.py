@@ -0,0 +1,216 @@
+"""
+Password checking off the request thread.
+
+Password hashes are deliberately slow, so during login storms they used to tie
+up every worker. All hashing now goes through a bounded thread pool: at most
+PASSWORD_HASH_WORKERS hashes run at once and at most PASSWORD_HASH_QUEUE_SIZE
+more wait. Anything beyond that fails fast with HashQueueFull so the view can
+answer 503 instead of piling up; so does a hash that is still queued or
+running after PASSWORD_HASH_TIMEOUT. Background work (roster imports) uses
+map(), which keeps to a share of the workers and waits for room instead.
+hashlib and argon2 release the GIL while hashing, so the pool threads run in
+parallel.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+
+
+class HashQueueFull(Exception):
+    """Raised when the password hashing pool cannot take more work"""
+
+
+class PasswordHashPool:
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def submit(self, fn, *args):
+        """Queue fn(*args) on the pool and return its future"""
+        if not self._slots.acquire(blocking=False):
+            raise HashQueueFull('Password hashing queue is full')
+
+        queued_at = time.monotonic()
+        with self._lock:
+            self._in_flight += 1
+
+        def task():
+            wait = time.monotonic() - queued_at
+            with self._lock:
+                self._running += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        def done(future):
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+            self._slots.release()
+
+        future = self._executor.submit(task)
+        future.add_done_callback(done)
+        return future
+
+    def run(self, fn, *args, timeout=None):
+        """
+        Run fn(*args) on the pool and wait for the result. Raises HashQueueFull
+        when the queue is full or the result takes longer than `timeout`.
+        """
+        try:
+            future = self.submit(fn, *args)
+        except HashQueueFull:
+            with self._lock:
+                self._rejected += 1
+            raise
+        try:
+            return future.result(timeout=timeout or settings.PASSWORD_HASH_TIMEOUT)
+        except FutureTimeout:
+            # The task keeps its slot until it finishes, so the queue stays bounded
+            with self._lock:
+                self._rejected += 1
+            raise HashQueueFull('Password hashing timed out')
+
+    def map(self, fn, items, concurrency):
+        """
+        [fn(item) for item in items] with at most `concurrency` on the pool at
+        once, for background work. When the queue is full it waits for room
+        instead of failing, so logins keep the rest of the pool.
+        """
+        results = []
+        pending = deque()
+        for item in items:
+            while True:
+                if len(pending) >= concurrency:
+                    results.append(pending.popleft().result())
+                    continue
+                try:
+                    pending.append(self.submit(fn, item))
+                    break
+                except HashQueueFull:
+                    if pending:
+                        results.append(pending.popleft().result())
+                    else:
+                        time.sleep(0.05)
+        results.extend(future.result() for future in pending)
+        return results
+
+    def snapshot(self):
+        """Current queue depth and counters, for monitoring and benchmarks"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'running': self._running,
+                'queued': self._in_flight - self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'avg_wait_ms': round(self._total_wait / self._completed * 1000, 2) if self._completed else 0,
+                'max_wait_ms': round(self._max_wait * 1000, 2),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+    return _pool
+
+
+def _check(password, encoded):
+    """Returns (is_valid, needs_rehash) without touching the database"""
+    outdated = []
+    is_valid = check_password(password, encoded, setter=lambda raw: outdated.append(True))
+    return is_valid, bool(outdated)
+
+
+def verify_password(user, password):
+    """
+    Check the password for an existing user on the hashing pool. If the stored
+    hash was made with older hasher settings it is re-made and saved.
+    """
+    pool = get_hash_pool()
+    is_valid, needs_rehash = pool.run(_check, password, user.password)
+    if is_valid and needs_rehash:
+        user.password = pool.run(make_password, password)
+        user.save(update_fields=['password'])
+    return is_valid
+
+
+def set_password(user, password):
+    """Hash a new password on the pool and store it on the user (not saved)"""
+    user.password = get_hash_pool().run(make_password, password)
+
+
+def verify_credentials(username, password):
+    """
+    Drop-in for authenticate() with the model backend. Returns the user (active
+    or not, the caller decides) or None.
+    """
+    UserModel = get_user_model()
+    try:
+        user = UserModel._default_manager.get_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        # Hash anyway so unknown usernames take as long as wrong passwords
+        get_hash_pool().run(make_password, password)
+        return None
+
+    if not verify_password(user, password):
+        return None
+    user.backend = 'django.contrib.auth.backends.ModelBackend'
+    return user
+
+
+class LoginRateLimiter:
+    """
+    Fixed-window failure counters per username and per client IP, kept in the
+    local cache. Only failures count, so a campus NAT full of students logging
+    in correctly is never blocked.
+    """
+
+    def __init__(self, username, ip):
+        self.keys = {
+            f'login-fail:user:{username.lower()}': settings.LOGIN_MAX_FAILURES_PER_USERNAME,
+            f'login-fail:ip:{ip}': settings.LOGIN_MAX_FAILURES_PER_IP,
+        }
+
+    def is_blocked(self):
+        counts = cache.get_many(list(self.keys))
+        return any(counts.get(key, 0) >= limit for key, limit in self.keys.items())
+
+    def record_failure(self):
+        for key in self.keys:
+            cache.add(key, 0, timeout=settings.LOGIN_RATE_WINDOW)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr()
+                cache.set(key, 1, timeout=settings.LOGIN_RATE_WINDOW)
+
+    def reset_username(self):
+        user_key = next(iter(self.keys))
+        cache.delete(user_key)
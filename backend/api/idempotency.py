@@ -0,0 +1,98 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+A client that may retry a request (double-clicked submit, a timeout on a
+flaky connection) sends the same Idempotency-Key header with every attempt.
+The first attempt is processed and its response stored in IdempotencyKey;
+later attempts with the same key get the stored response back (marked with
+an Idempotent-Replayed header) instead of running the view again.
+
+A key reused with a different request body is refused with 422, and a retry
+that arrives while the first attempt is still running gets 409. Server
+errors are not stored, so the request can be retried under the same key.
+"""
+import functools
+import hashlib
+import json
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """SHA-256 over the form fields and uploaded files' names and sizes"""
+    digest = hashlib.sha256()
+    for name in sorted(request.data.keys()):
+        if name in request.FILES:
+            continue
+        for value in request.data.getlist(name) if hasattr(request.data, 'getlist') else [request.data[name]]:
+            digest.update(f'{name}={value}\0'.encode())
+    for name in sorted(request.FILES.keys()):
+        for upload in request.FILES.getlist(name):
+            digest.update(f'{name}:{upload.name}:{upload.size}\0'.encode())
+    return digest.hexdigest()
+
+
+def claim_key(user, key, fingerprint):
+    """
+    The IdempotencyKey row for (user, key) and whether this request created
+    it. Expired keys are replaced as if they had never been used.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, request_fingerprint=fingerprint), True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is None:
+                continue  # deleted in between; try again
+            if not record.is_expired:
+                return record, False
+            record.delete()
+    raise IntegrityError(f'Could not claim idempotency key {key!r}')
+
+
+def idempotent(method):
+    """Decorator for an APIView method honouring the Idempotency-Key header"""
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        record, created = claim_key(request.user, key, fingerprint)
+        if not created:
+            if record.request_fingerprint != fingerprint:
+                return Response({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record.response_status is None:
+                return Response({'error': 'A request with this Idempotency-Key is still being processed'},
+                                status=status.HTTP_409_CONFLICT)
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = method(self, request, *args, **kwargs)
+        except BaseException:
+            record.delete()
+            raise
+        if response.status_code >= 500 or not isinstance(response, Response):
+            # Not a result worth replaying; let the client retry for real
+            record.delete()
+            return response
+        record.response_status = response.status_code
+        # Store what the client saw (Decimals rendered the way the first response rendered them)
+        record.response_body = json.loads(JSONRenderer().render(response.data))
+        record.save(update_fields=['response_status', 'response_body'])
+        return response
+    return wrapper
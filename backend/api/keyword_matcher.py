@@ -0,0 +1,118 @@
+"""
+One-pass keyword matching for the document filename heuristics.
+
+The rule file (GRADE_DOCUMENT_RULES_PATH) maps a category name to a list of
+keywords. All keywords of all categories are compiled into a single regex
+that is run once per filename, and every category is answered from that one
+scan.
+
+The regex is a lookahead alternation, so it reports a match at every position
+including overlapping ones. Alternatives are sorted longest first; shorter
+keywords that start at the same position (grade/grades, sem/semester) are
+prefixes of the longest match there and are recovered from a prefix map.
+
+get_filename_matcher() rebuilds the matcher when the rule file's mtime
+changes, checking at most every GRADE_DOCUMENT_RULES_CHECK_INTERVAL seconds.
+"""
+import json
+import os
+import re
+import threading
+import time
+from django.conf import settings
+
+MAX_MEMOIZED_RESULTS = 4096
+
+
+class KeywordMatcher:
+    def __init__(self, rules):
+        self.rules = {category: [keyword.lower() for keyword in keywords] for category, keywords in rules.items()}
+
+        # keyword -> [(category, position in that category's list)]
+        self.owners = {}
+        for category, keywords in self.rules.items():
+            for position, keyword in enumerate(keywords):
+                self.owners.setdefault(keyword, []).append((category, position))
+
+        keywords = sorted(self.owners, key=len, reverse=True)
+        # Every keyword that is a prefix of another (including itself)
+        self.prefixes = {
+            keyword: [other for other in keywords if keyword.startswith(other)]
+            for keyword in keywords
+        }
+        if keywords:
+            self.pattern = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in keywords) + '))')
+        else:
+            self.pattern = None
+        self.results = {}
+
+    def match(self, text):
+        """
+        {category: (matched keywords,)} for lowercase text. Each tuple keeps
+        the order of the rule file, so [0] is the first rule that matched.
+        The returned dict is shared between calls; treat it as read-only.
+        """
+        longest = frozenset(self.pattern.findall(text)) if self.pattern is not None else frozenset()
+        # Filenames hit few distinct keyword combinations, so the per-category
+        # answer is memoized by the set of longest matches
+        result = self.results.get(longest)
+        if result is None:
+            if len(self.results) >= MAX_MEMOIZED_RESULTS:
+                self.results.clear()
+            result = self.results[longest] = self.categorize(longest)
+        return result
+
+    def categorize(self, longest):
+        found = set()
+        for keyword in longest:
+            found.update(self.prefixes[keyword])
+
+        hits = {category: [] for category in self.rules}
+        for keyword in found:
+            for category, position in self.owners[keyword]:
+                hits[category].append((position, keyword))
+        return {category: tuple(keyword for _, keyword in sorted(matched)) for category, matched in hits.items()}
+
+
+def load_rules(path):
+    with open(path, encoding='utf-8') as handle:
+        rules = json.load(handle)
+    if not isinstance(rules, dict) or not all(isinstance(keywords, list) for keywords in rules.values()):
+        raise ValueError(f'{path} must map each category to a list of keywords')
+    return rules
+
+
+_lock = threading.Lock()
+_state = {'matcher': None, 'path': None, 'mtime': None, 'checked_at': 0.0}
+
+
+def get_filename_matcher():
+    """The matcher for the configured rule file, rebuilt when the file changes"""
+    path = str(settings.GRADE_DOCUMENT_RULES_PATH)
+    now = time.monotonic()
+    if (_state['matcher'] is not None and _state['path'] == path
+            and now - _state['checked_at'] < settings.GRADE_DOCUMENT_RULES_CHECK_INTERVAL):
+        return _state['matcher']
+
+    with _lock:
+        _state['checked_at'] = now
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            # Mid-replace (editors that write a new file and rename it) or removed
+            if _state['matcher'] is None or _state['path'] != path:
+                raise
+            return _state['matcher']
+        if _state['matcher'] is None or _state['path'] != path or _state['mtime'] != mtime:
+            try:
+                _state['matcher'] = KeywordMatcher(load_rules(path))
+            except (OSError, ValueError) as e:
+                # A half-written or broken edit keeps the previous rules
+                if _state['matcher'] is None:
+                    raise
+                print(f"Warning: keeping previous filename rules, could not load {path}: {e}")
+            else:
+                print(f"Loaded filename rules from {path}")
+            _state['path'] = path
+            _state['mtime'] = mtime
+        return _state['matcher']
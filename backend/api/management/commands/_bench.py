@@ -0,0 +1,53 @@
+"""Shared helpers for the bench_* management commands"""
+import os
+import statistics
+import tempfile
+from contextlib import contextmanager
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Run the benchmark against a throwaway copy of the schema so it never
+    touches real data. SQLite gets a temporary file instead of the default
+    in-memory test database so concurrent threads behave like production.
+    """
+    setup_test_environment()
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    temp_path = None
+    if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+        fd, temp_path = tempfile.mkstemp(prefix='bench_', suffix='.sqlite3')
+        os.close(fd)
+        test_settings['NAME'] = temp_path
+
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+        teardown_test_environment()
+        if temp_path:
+            test_settings.pop('NAME', None)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(temp_path + suffix):
+                    os.remove(temp_path + suffix)
+
+
+def latency_summary(samples):
+    """p50/p95/p99/max in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {'mean_ms': 0, 'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0, 'max_ms': 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+    return {
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 2),
+        'p50_ms': pct(50),
+        'p95_ms': pct(95),
+        'p99_ms': pct(99),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
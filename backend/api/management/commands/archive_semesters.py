@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.archive import archive_semester, semesters_to_archive
+
+class Command(BaseCommand):
+    help = 'Move applications and AI logs of closed semesters into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Archive every academic year that sorts before this one (e.g. 2024-2025)')
+        parser.add_argument('--academic-year', help='Archive only this academic year')
+        parser.add_argument('--semester', help='Archive only this semester (use with --academic-year)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Applications moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='List the semesters that would be archived')
+
+    def handle(self, *args, **options):
+        if not options['before'] and not options['academic_year']:
+            raise CommandError('Give --before or --academic-year so current semesters are never archived by accident')
+
+        semesters = semesters_to_archive(
+            before=options['before'],
+            academic_year=options['academic_year'],
+            semester=options['semester']
+        )
+        if not semesters:
+            self.stdout.write('Nothing to archive')
+            return
+
+        for academic_year, semester in semesters:
+            if options['dry_run']:
+                self.stdout.write(f'Would archive {academic_year} - {semester}')
+                continue
+            moved = archive_semester(
+                academic_year, semester,
+                batch_size=options['batch_size'],
+                progress=lambda count: self.stdout.write(f'  {academic_year} - {semester}: {count} moved')
+            )
+            self.stdout.write(self.style.SUCCESS(f'Archived {moved} applications from {academic_year} - {semester}'))
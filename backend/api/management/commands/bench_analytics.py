@@ -0,0 +1,85 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.analytics import analytics_available, dashboard_analytics, load_counts, merge_counts, summarize
+from api.models import ScholarshipApplication, StudentProfile
+from ._bench import benchmark_database
+
+
+class Command(BaseCommand):
+    help = 'Time the admin analytics (fetch, vectorized statistics, cached and incremental refresh) over generated applications in a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Applications to generate')
+        parser.add_argument('--semesters', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        if not analytics_available():
+            raise CommandError('Analytics need NumPy (pip install numpy)')
+        with benchmark_database():
+            self.run_benchmark(options['rows'], options['semesters'], options['seed'])
+
+    def timed(self, label, func):
+        started = time.perf_counter()
+        result = func()
+        self.stdout.write(f'{label}: {(time.perf_counter() - started) * 1000:.1f} ms')
+        return result
+
+    def run_benchmark(self, row_count, semester_count, seed):
+        rng = random.Random(seed)
+        semesters = [(f'{2020 + i // 2}-{2021 + i // 2}', ('1st Semester', '2nd Semester')[i % 2])
+                     for i in range(semester_count)]
+        student_count = -(-row_count // semester_count)
+        statuses = ['approved'] * 6 + ['pending'] * 2 + ['rejected', 'under_review']
+
+        self.stdout.write(f'Creating {student_count} students and {row_count} applications...')
+        started = time.perf_counter()
+        created = 0
+        for start in range(0, student_count, 10000):
+            users = User.objects.bulk_create([
+                User(username=f'student{i}', password='!') for i in range(start, min(start + 10000, student_count))
+            ])
+            profiles = StudentProfile.objects.bulk_create([
+                StudentProfile(user=user, student_id=f'B-{start + i}') for i, user in enumerate(users)
+            ])
+            applications = []
+            for profile in profiles:
+                for academic_year, semester in semesters:
+                    if created == row_count:
+                        break
+                    created += 1
+                    applications.append(ScholarshipApplication(
+                        student=profile, academic_year=academic_year, semester=semester,
+                        ai_verification_status=rng.choice(statuses),
+                        swa_grade=Decimal(f'{min(99.99, max(70, rng.gauss(86, 4))):.2f}') if rng.random() < 0.95 else None,
+                        units_enrolled=rng.choice([12, 15, 18, 21, 24]),
+                        has_inc_withdrawn=rng.random() < 0.05, has_failed_dropped=rng.random() < 0.05,
+                    ))
+            ScholarshipApplication.objects.bulk_create(applications, batch_size=5000)
+        # As if each semester was submitted in its own term, so only the change below counts as recent
+        for age, (academic_year, semester) in enumerate(reversed(semesters), start=1):
+            ScholarshipApplication.objects.filter(academic_year=academic_year, semester=semester).update(
+                updated_at=timezone.now() - timedelta(days=120 * age))
+        self.stdout.write(f'Created in {time.perf_counter() - started:.1f}s')
+
+        counts = self.timed(f'Fetch and count {row_count} rows (one values_list query)',
+                            lambda: load_counts(ScholarshipApplication.objects.all(), semesters))
+        self.timed('Statistics for every semester and overall',
+                   lambda: [summarize(part) for part in counts.values()] + [summarize(merge_counts(list(counts.values())))])
+
+        cache.clear()
+        self.timed('Cold request (fetch + statistics + trends)', dashboard_analytics)
+        self.timed('Cached request', dashboard_analytics)
+        application = ScholarshipApplication.objects.filter(academic_year=semesters[-1][0], semester=semesters[-1][1]).first()
+        ScholarshipApplication.objects.filter(pk=application.pk).update(ai_verification_status='approved',
+                                                                        updated_at=timezone.now())
+        result = self.timed('After one change (only that semester recomputed)', dashboard_analytics)
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['overall']['applications']} applications over {len(result['semesters'])} semesters"
+        ))
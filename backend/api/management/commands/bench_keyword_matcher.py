@@ -0,0 +1,77 @@
+import contextlib
+import io
+import random
+import time
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from api.analysis import get_analyzer
+from api.keyword_matcher import get_filename_matcher, load_rules
+
+NOISE = ['scan', 'doc', 'file', 'final', 'v2', 'juan', 'dela', 'cruz', 'bsit', 'cs', 'ay', 'x', '001']
+
+
+def sample_filenames(count, keywords, seed):
+    """Filenames mixing rule keywords with noise, like real uploads"""
+    rng = random.Random(seed)
+    separators = ['_', '-', ' ', '']
+    names = []
+    for _ in range(count):
+        parts = rng.sample(keywords, rng.randint(0, 3)) + rng.sample(NOISE, rng.randint(1, 4))
+        rng.shuffle(parts)
+        names.append(rng.choice(separators).join(parts) + rng.choice(['.pdf', '.png', '.jpg']))
+    return names
+
+
+def scan_per_category(rules, text):
+    """The previous approach: one substring pass per keyword list"""
+    return {category: tuple(keyword for keyword in keywords if keyword in text) for category, keywords in rules.items()}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the one-pass filename keyword matcher against per-list substring scans, '
+        'and full document validation, over a batch of generated filenames'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filenames', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rules = load_rules(settings.GRADE_DOCUMENT_RULES_PATH)
+        keywords = sorted({keyword for category in rules.values() for keyword in category})
+        names = [name.lower() for name in sample_filenames(options['filenames'], keywords, options['seed'])]
+        with contextlib.redirect_stdout(io.StringIO()):
+            matcher = get_filename_matcher()
+
+        started = time.perf_counter()
+        expected = [scan_per_category(rules, name) for name in names]
+        scan_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = [matcher.match(name) for name in names]
+        match_time = time.perf_counter() - started
+
+        mismatches = sum(1 for before, after in zip(expected, actual) if before != after)
+        self.stdout.write(f'{len(names):,} filenames, {len(keywords)} keywords in {len(rules)} categories')
+        self.stdout.write(f'Per-list scans:   {scan_time:.2f}s ({len(names) / scan_time:,.0f} filenames/sec)')
+        self.stdout.write(f'One-pass matcher: {match_time:.2f}s ({len(names) / match_time:,.0f} filenames/sec)')
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'{mismatches} filenames matched differently'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Both approaches matched every filename identically'))
+
+        # Full validation; the body only needs to pass the size and header checks
+        body = b'%PDF-1.4\n' + b'\0' * 60000
+        analyzer = get_analyzer(seed=options['seed'])
+        verdicts = {True: 0, False: 0}
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            for name in names:
+                verdicts[analyzer.validate(File(io.BytesIO(body), name=name))['is_valid']] += 1
+            validate_time = time.perf_counter() - started
+        self.stdout.write(
+            f'validate(): {validate_time:.2f}s ({len(names) / validate_time:,.0f} documents/sec, '
+            f'{verdicts[True]} valid / {verdicts[False]} rejected)'
+        )
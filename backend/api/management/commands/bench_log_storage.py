@@ -0,0 +1,71 @@
+import contextlib
+import io
+import json
+import tempfile
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+from api.models import AIVerificationLog, StudentProfile
+from ._bench import benchmark_database
+
+PER_APPLICATIONS = 100000
+
+
+def sample_grade_document(i):
+    """A PDF-signed file large enough to pass validation"""
+    body = b'%PDF-1.4\n' + (f'TCU grade report {i}\n'.encode() * 4000)
+    return SimpleUploadedFile(f'TCU_Grades_2024_1st_semester_{i}.pdf', body, content_type='application/pdf')
+
+
+class Command(BaseCommand):
+    help = (
+        'Submit sample applications to a throwaway database and compare the bytes the '
+        'AI verification log used to store (pretty JSON text) with the compressed payload'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', type=int, default=500, help='Sample size')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with benchmark_database():
+                self.run_benchmark(options['applications'])
+
+    def run_benchmark(self, count):
+        user = User.objects.create(username='bench', password='!')
+        StudentProfile.objects.create(user=user, student_id='BENCH-1')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(count):
+                client.post('/api/scholarship/apply/', {
+                    'academic_year': '2024-2025',
+                    'semester': f'Bench {i}',
+                    'grade_document': sample_grade_document(i),
+                }, format='multipart')
+
+        legacy_bytes = 0
+        compact_bytes = 0
+        logs = AIVerificationLog.objects.select_related('application')
+        for log in logs:
+            # What the log used to hold: both dicts as JSON text, notes included
+            response = dict(log.response, notes=log.application.ai_verification_notes)
+            legacy_bytes += len(json.dumps(log.input).encode()) + len(json.dumps(response, default=str).encode())
+            compact_bytes += len(bytes(log.payload))
+
+        rows = logs.count()
+        if not rows:
+            self.stdout.write(self.style.ERROR('No verification logs were written'))
+            return
+
+        scale = PER_APPLICATIONS / rows
+        self.stdout.write(f'Sampled {rows} verification logs')
+        self.stdout.write(f'Legacy text payload: {legacy_bytes / rows:.0f} bytes/row')
+        self.stdout.write(f'Compressed payload:  {compact_bytes / rows:.0f} bytes/row')
+        self.stdout.write(self.style.SUCCESS(
+            f'Per {PER_APPLICATIONS:,} applications: {legacy_bytes * scale / 1e6:.1f} MB -> '
+            f'{compact_bytes * scale / 1e6:.1f} MB ({100 - compact_bytes / legacy_bytes * 100:.0f}% smaller)'
+        ))
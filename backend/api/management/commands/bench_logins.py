@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIClient
+from api.hashing import get_hash_pool
+from api.models import StudentProfile
+from ._bench import benchmark_database, latency_summary
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent logins through LoginView and report logins/sec (uses a throwaway database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--logins', type=int, default=500, help='Total login requests')
+        parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.run_benchmark(options['users'], options['logins'], options['concurrency'])
+
+    def run_benchmark(self, user_count, login_count, concurrency):
+        password = 'Bench-password-123'
+        # One hash shared by every user keeps setup fast
+        encoded = make_password(password)
+        users = User.objects.bulk_create([
+            User(username=f'bench{i}', email=f'bench{i}@example.com', password=encoded)
+            for i in range(user_count)
+        ])
+        StudentProfile.objects.bulk_create([
+            StudentProfile(user=user, student_id=f'BENCH-{i}') for i, user in enumerate(users)
+        ])
+
+        latencies = []
+        statuses = {}
+        lock = threading.Lock()
+
+        def login(i):
+            client = APIClient()
+            started = time.perf_counter()
+            response = client.post('/api/auth/login/', {
+                'username': f'bench{i % user_count}', 'password': password
+            }, format='json')
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            connection.close()
+
+        self.stdout.write(f'Running {login_count} logins with {concurrency} client threads...')
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(login, range(login_count)))
+        wall = time.perf_counter() - started
+
+        self.stdout.write(f'Status codes: {statuses}')
+        self.stdout.write(f'Latency: {latency_summary(latencies)}')
+        self.stdout.write(f'Hash pool: {get_hash_pool().snapshot()}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{statuses.get(200, 0) / wall:.1f} successful logins/sec ({login_count} requests in {wall:.2f}s)'
+        ))
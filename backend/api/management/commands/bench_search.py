@@ -0,0 +1,91 @@
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from rest_framework.test import APIClient
+from api.models import StudentProfile
+from api.search import search_students
+from ._bench import benchmark_database, latency_summary
+
+FIRST_NAMES = ['Maria', 'Jose', 'Angelica', 'Juan', 'Kristine', 'Mark', 'Patricia', 'Paolo', 'Andrea', 'Miguel',
+               'Camille', 'Rafael', 'Bea', 'Carlo', 'Danica', 'Enrique', 'Francesca', 'Gabriel', 'Hazel', 'Ignacio']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Ocampo', 'Garcia', 'Mendoza', 'Torres', 'Villanueva', 'Ramos',
+              'Aquino', 'Castillo', 'Dela Cruz', 'Flores', 'Gonzales', 'Lopez', 'Navarro', 'Pascual', 'Salazar', 'Tolentino']
+COURSES = ['BS Computer Science', 'BS Civil Engineering', 'BS Nursing', 'BS Accountancy', 'AB Communication',
+           'BS Biology', 'BS Architecture', 'BS Psychology']
+
+
+class Command(BaseCommand):
+    help = 'Time admin prefix search over generated students against a throwaway database (full-text index vs. icontains)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--scan-queries', type=int, default=20, help='icontains queries to time for comparison')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.run_benchmark(options['students'], options['queries'], options['scan_queries'], options['seed'])
+
+    def run_benchmark(self, student_count, query_count, scan_count, seed):
+        rng = random.Random(seed)
+        self.stdout.write(f'Creating {student_count} students...')
+        started = time.perf_counter()
+        for start in range(0, student_count, 5000):
+            batch = range(start, min(start + 5000, student_count))
+            users = User.objects.bulk_create([
+                User(username=f'student{i}', email=f'student{i}@example.edu', password='!',
+                     first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES))
+                for i in batch
+            ])
+            StudentProfile.objects.bulk_create([
+                StudentProfile(user=user, student_id=f'2024-{i:06d}', course=rng.choice(COURSES))
+                for i, user in zip(batch, users)
+            ])
+        self.stdout.write(f'Created and indexed in {time.perf_counter() - started:.1f}s')
+
+        # What an admin types: 2-5 leading characters of a name, username, email or student number
+        words = [name.split()[0] for name in FIRST_NAMES + LAST_NAMES] + ['student', 'example', '2024', 'computer']
+        queries = []
+        for _ in range(query_count):
+            word = rng.choice(words + [str(rng.randrange(student_count))])
+            text = word[:rng.randint(2, 5)]
+            if rng.random() < 0.3:
+                text = f'{text} {rng.choice(LAST_NAMES)[:3]}'
+            queries.append(text)
+
+        index_latencies = []
+        for text in queries:
+            started = time.perf_counter()
+            search_students(text, limit=20)
+            index_latencies.append(time.perf_counter() - started)
+
+        admin = User.objects.create_superuser('bench-admin', 'bench-admin@example.edu', 'Bench-password-123')
+        client = APIClient()
+        client.force_authenticate(admin)
+        endpoint_latencies = []
+        for text in queries:
+            started = time.perf_counter()
+            response = client.get('/api/admin/search/', {'q': text, 'type': 'students'})
+            endpoint_latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.content
+
+        scan_latencies = []
+        for text in queries[:scan_count]:
+            condition = Q()
+            for token in text.split():
+                condition &= (Q(user__username__icontains=token) | Q(user__first_name__icontains=token) |
+                              Q(user__last_name__icontains=token) | Q(user__email__icontains=token) |
+                              Q(student_id__icontains=token) | Q(course__icontains=token))
+            started = time.perf_counter()
+            list(StudentProfile.objects.filter(condition).values_list('id', flat=True)[:20])
+            scan_latencies.append(time.perf_counter() - started)
+
+        self.stdout.write(f'icontains scan ({len(scan_latencies)} queries): {latency_summary(scan_latencies)}')
+        self.stdout.write(f'Index query: {latency_summary(index_latencies)}')
+        self.stdout.write(f'GET /api/admin/search/: {latency_summary(endpoint_latencies)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'p95 {latency_summary(index_latencies)["p95_ms"]} ms per index query over {student_count} students'
+        ))
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIClient
+from api.models import StudentProfile
+from ._bench import benchmark_database, latency_summary
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark parallel ScholarshipApplicationView.post submissions against a throwaway '
+        'database. Run once per DB_ENGINE to compare SQLite and PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50)
+        parser.add_argument('--submissions', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+        parser.add_argument('--plain-sqlite', action='store_true',
+                            help='Drop the WAL/busy_timeout settings to compare against stock SQLite')
+
+    def handle(self, *args, **options):
+        if options['plain_sqlite'] and connection.vendor == 'sqlite':
+            connection.settings_dict['OPTIONS'] = {}
+
+        self.stdout.write(f"Backend: {connection.vendor} {connection.settings_dict.get('OPTIONS') or ''}")
+        with benchmark_database():
+            self.run_benchmark(options['students'], options['submissions'], options['concurrency'])
+
+    def run_benchmark(self, student_count, submission_count, concurrency):
+        users = User.objects.bulk_create([
+            User(username=f'bench{i}', password='!') for i in range(student_count)
+        ])
+        StudentProfile.objects.bulk_create([
+            StudentProfile(user=user, student_id=f'BENCH-{i}') for i, user in enumerate(users)
+        ])
+
+        latencies = []
+        outcomes = {}
+        lock = threading.Lock()
+
+        def submit(i):
+            client = APIClient()
+            client.force_authenticate(users[i % student_count])
+            started = time.perf_counter()
+            try:
+                response = client.post('/api/scholarship/apply/', {
+                    'academic_year': '2024-2025',
+                    # Distinct semester per request so every submission is a new application
+                    'semester': f'Bench {i}',
+                }, format='multipart')
+                outcome = response.status_code
+            except Exception as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            connection.close()
+
+        self.stdout.write(f'Submitting {submission_count} applications with {concurrency} client threads...')
+        # The view prints debug output for every submission
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(submit, range(submission_count)))
+            wall = time.perf_counter() - started
+
+        self.stdout.write(f'Outcomes: {outcomes}')
+        self.stdout.write(f'Latency: {latency_summary(latencies)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{outcomes.get(201, 0) / wall:.1f} submissions/sec ({submission_count} requests in {wall:.2f}s)'
+        ))
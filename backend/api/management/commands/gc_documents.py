@@ -0,0 +1,102 @@
+import os
+import time
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.models import ArchivedApplication, ScholarshipApplication
+from api.storage import blob_digest, document_storage, referenced_documents, release_document
+from api.uploads import purge_expired_sessions
+
+DOCUMENT_DIRECTORY = 'grade_documents'
+
+
+def disk_usage(root):
+    files = size = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(directory, name))
+    return files, size
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete stored grade documents that no application references (after a grace period) '
+        'and expired upload sessions, and optionally move legacy uploads into content-addressed storage '
+        'so duplicates are stored once'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--import-legacy', action='store_true',
+                            help='Re-store documents saved under their original name by content hash first')
+        parser.add_argument('--grace', type=int, default=settings.DOCUMENT_GC_GRACE_SECONDS,
+                            help='Keep unreferenced files modified within this many seconds')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted')
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            self.stdout.write(f'Deleted {purge_expired_sessions()} expired upload sessions')
+
+        storage = document_storage()
+        root = storage.path(DOCUMENT_DIRECTORY)
+        if not os.path.isdir(root):
+            self.stdout.write('No stored documents')
+            return
+        before = disk_usage(root)
+
+        if options['import_legacy'] and not options['dry_run']:
+            self.import_legacy(storage)
+
+        referenced = referenced_documents()
+        deleted = freed = 0
+        now = time.time()
+        for directory, _, names in os.walk(root):
+            for filename in names:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                if name in referenced or now - os.path.getmtime(path) < options['grace']:
+                    continue
+                size = os.path.getsize(path)
+                if options['dry_run']:
+                    self.stdout.write(f'Would delete {name} ({size} bytes)')
+                elif filename.startswith('.upload-'):
+                    # Left behind by an interrupted upload
+                    os.remove(path)
+                elif not release_document(name, grace=options['grace']):
+                    continue
+                deleted += 1
+                freed += size
+
+        if not options['dry_run']:
+            self.remove_empty_directories(root)
+        after = disk_usage(root)
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} unreferenced files ({freed / 1e6:.1f} MB). '
+            f'Documents: {before[0]} files / {before[1] / 1e6:.1f} MB -> {after[0]} files / {after[1] / 1e6:.1f} MB'
+        ))
+
+    def import_legacy(self, storage):
+        legacy = (ScholarshipApplication.objects.exclude(grade_document='').exclude(grade_document__isnull=True)
+                  .values_list('grade_document', flat=True).distinct())
+        moved = 0
+        for old_name in list(legacy):
+            if blob_digest(old_name) or not storage.exists(old_name):
+                continue
+            with storage.open(old_name, 'rb') as handle:
+                new_name = storage.save(old_name, File(handle))
+            with transaction.atomic():
+                ScholarshipApplication.objects.filter(grade_document=old_name).update(grade_document=new_name)
+                ArchivedApplication.objects.filter(grade_document=old_name).update(grade_document=new_name)
+            storage.delete(old_name)
+            moved += 1
+        self.stdout.write(f'Moved {moved} legacy documents into content-addressed storage')
+
+    def remove_empty_directories(self, root):
+        for directory, _, _ in os.walk(root, topdown=False):
+            if directory != root and not os.listdir(directory):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
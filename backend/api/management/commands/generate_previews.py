@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from api.models import ScholarshipApplication
+from api.previews import fitz, generate_previews
+
+class Command(BaseCommand):
+    help = 'Render previews for grade documents that do not have them yet (uploads from before previews existed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Also re-check applications that already have a digest')
+
+    def handle(self, *args, **options):
+        applications = ScholarshipApplication.objects.exclude(grade_document='').exclude(grade_document__isnull=True)
+        if not options['all']:
+            applications = applications.filter(document_digest='')
+        if fitz is None:
+            self.stdout.write(self.style.WARNING('PyMuPDF is not installed; PDF documents are skipped'))
+
+        rendered = skipped = failed = 0
+        for application in applications.order_by('id').iterator(chunk_size=200):
+            try:
+                if generate_previews(application):
+                    rendered += 1
+                else:
+                    skipped += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'Application {application.id}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Previews: {rendered} rendered, {skipped} skipped, {failed} failed'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.roster import RosterError, import_roster
+
+class Command(BaseCommand):
+    help = 'Create student accounts in bulk from a registrar roster CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Roster CSV with at least a student_id column')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows inserted per transaction (default: 1000)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes (default: CPU count)')
+
+    def handle(self, *args, **options):
+        def progress(summary):
+            self.stdout.write(
+                f"Processed {summary['rows']} rows: {summary['created']} created, "
+                f"{summary['skipped_existing']} already registered, {summary['skipped_invalid']} invalid"
+            )
+
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as roster:
+                summary = import_roster(
+                    roster,
+                    batch_size=options['batch_size'],
+                    workers=options['workers'],
+                    progress=progress
+                )
+        except (OSError, RosterError) as e:
+            raise CommandError(str(e))
+
+        for error in summary['errors']:
+            self.stdout.write(self.style.WARNING(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"Import finished: {summary['created']} students created out of {summary['rows']} rows"
+        ))
@@ -0,0 +1,57 @@
+import time
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from api.models import ApplicationTombstone, AuthToken, EmailVerification, IdempotencyKey
+
+class Command(BaseCommand):
+    help = 'Delete expired auth tokens, sessions, email verification codes, idempotency keys and sync tombstones in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows deleted per transaction (default: 1000)')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between batches so writers can get the lock')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pause = options['sleep']
+        now = timezone.now()
+
+        targets = [
+            ('auth tokens', AuthToken.objects.filter(expires_at__lte=now)),
+            # Tokens issued before expiring tokens existed never expire on their own
+            ('legacy tokens', Token.objects.filter(created__lte=now - settings.AUTH_TOKEN_TTL)),
+            ('sessions', Session.objects.filter(expire_date__lte=now)),
+            ('email verifications', EmailVerification.objects.filter(
+                created_at__lte=now - settings.EMAIL_VERIFICATION_TTL
+            )),
+            ('idempotency keys', IdempotencyKey.objects.filter(created_at__lte=now - settings.IDEMPOTENCY_KEY_TTL)),
+            ('application tombstones', ApplicationTombstone.objects.filter(
+                deleted_at__lte=now - settings.SYNC_TOMBSTONE_TTL
+            )),
+        ]
+
+        for label, queryset in targets:
+            deleted = self.purge(queryset, batch_size, pause)
+            self.stdout.write(f'Deleted {deleted} expired {label}')
+
+        self.stdout.write(self.style.SUCCESS('Expired authentication data purged'))
+
+    def purge(self, queryset, batch_size, pause):
+        """
+        Delete matching rows by primary key in batches. Each batch commits on its
+        own so no single statement holds the table lock for long.
+        """
+        model = queryset.model
+        total = 0
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return total
+            model.objects.filter(pk__in=pks).delete()
+            total += len(pks)
+            if pause:
+                time.sleep(pause)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.sketches import rebuild_sketches
+
+class Command(BaseCommand):
+    help = 'Recompute the distinct-student sketches behind the admin dashboard from the applications table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Rebuild only this academic year')
+        parser.add_argument('--semester', help='Rebuild only this semester (use with --academic-year)')
+
+    def handle(self, *args, **options):
+        written = rebuild_sketches(academic_year=options['academic_year'], semester=options['semester'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} semester sketches'))
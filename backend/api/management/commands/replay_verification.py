@@ -0,0 +1,132 @@
+import contextlib
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from api.analysis import ANALYZERS
+from ._bench import latency_summary
+
+COMPARED_FIELDS = ('outcome', 'units_enrolled', 'swa_grade', 'has_inc_withdrawn',
+                   'has_failed_dropped', 'confidence_score', 'is_merit_eligible')
+MAX_REPORTED_DIFFS = 20
+
+
+def _init_replay_worker():
+    # Spawned workers start without Django configured
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+
+
+def load_analyzer_class(spec):
+    """A registered analyzer version ('1') or a dotted path to an analyzer class"""
+    if spec in ANALYZERS:
+        return ANALYZERS[spec]
+    try:
+        return import_string(spec)
+    except ImportError:
+        raise CommandError(f"Unknown analyzer '{spec}'. Use one of {', '.join(sorted(ANALYZERS))} or a dotted class path")
+
+
+def replay_document(path, analyzer_spec, seed):
+    """
+    Validate + analyze one document and return (result, seconds). The RNG is
+    seeded from the run seed and the file name, so the outcome does not depend
+    on which worker picks the document up or in what order.
+    """
+    analyzer = load_analyzer_class(analyzer_spec)(rng=random.Random(f'{seed}:{os.path.basename(path)}'))
+    with open(path, 'rb') as handle, contextlib.redirect_stdout(io.StringIO()):
+        document = File(handle, name=os.path.basename(path))
+        started = time.perf_counter()
+        try:
+            extracted = analyzer.analyze(document)
+            result = {'outcome': 'accepted'}
+            result.update({field: extracted[field] for field in COMPARED_FIELDS[1:]})
+        except ValueError as e:
+            result = {'outcome': 'rejected', 'reason': str(e)}
+        elapsed = time.perf_counter() - started
+    return result, elapsed
+
+
+def _replay_task(args):
+    return replay_document(*args)
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a directory of sample grade documents through document validation and '
+        'analysis with a fixed seed. Reports throughput and latency, and with --compare, '
+        'the documents whose results differ between two analyzer versions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory of sample grade documents (searched recursively)')
+        parser.add_argument('--analyzer', default='1', help='Analyzer version or dotted class path')
+        parser.add_argument('--compare', help='Second analyzer version or dotted class path to diff against')
+        parser.add_argument('--seed', default='0', help='Run seed; the same seed replays the same results')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--repeat', type=int, default=1, help='Replay the directory this many times for timing')
+
+    def handle(self, *args, **options):
+        paths = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(options['directory'])
+            for name in names
+        )
+        if not paths:
+            raise CommandError(f"No documents found under {options['directory']}")
+
+        specs = [options['analyzer']] + ([options['compare']] if options['compare'] else [])
+        for spec in specs:
+            load_analyzer_class(spec)
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_replay_worker) as pool:
+            for spec in specs:
+                results[spec] = self.replay(pool, spec, paths, options['seed'], options['repeat'])
+
+        if options['compare']:
+            self.report_diffs(paths, results[options['analyzer']], results[options['compare']],
+                              options['analyzer'], options['compare'])
+
+    def replay(self, pool, spec, paths, seed, repeat):
+        tasks = [(path, spec, seed) for _ in range(repeat) for path in paths]
+        started = time.perf_counter()
+        outcomes = list(pool.map(_replay_task, tasks, chunksize=max(1, len(tasks) // 64)))
+        wall = time.perf_counter() - started
+
+        latencies = [elapsed for _, elapsed in outcomes]
+        accepted = sum(1 for result, _ in outcomes if result['outcome'] == 'accepted')
+        self.stdout.write(f'Analyzer {spec}: {len(tasks)} documents, {accepted} accepted, {len(tasks) - accepted} rejected')
+        self.stdout.write(f'  Latency: {latency_summary(latencies)}')
+        self.stdout.write(self.style.SUCCESS(f'  {len(tasks) / wall:.1f} documents/sec ({wall:.2f}s)'))
+        # The first pass is enough for diffs; repeats replay identical results
+        return [result for result, _ in outcomes[:len(paths)]]
+
+    def report_diffs(self, paths, baseline, candidate, baseline_spec, candidate_spec):
+        diffs = []
+        for path, before, after in zip(paths, baseline, candidate):
+            changed = {
+                field: (before.get(field), after.get(field))
+                for field in COMPARED_FIELDS
+                if before.get(field) != after.get(field)
+            }
+            if changed:
+                diffs.append((path, changed))
+
+        if not diffs:
+            self.stdout.write(self.style.SUCCESS(f'No differences between {baseline_spec} and {candidate_spec}'))
+            return
+
+        self.stdout.write(self.style.WARNING(
+            f'{len(diffs)} of {len(paths)} documents differ between {baseline_spec} and {candidate_spec}:'
+        ))
+        for path, changed in diffs[:MAX_REPORTED_DIFFS]:
+            details = ', '.join(f'{field}: {old} -> {new}' for field, (old, new) in changed.items())
+            self.stdout.write(f'  {os.path.basename(path)}: {details}')
+        if len(diffs) > MAX_REPORTED_DIFFS:
+            self.stdout.write(f'  ... and {len(diffs) - MAX_REPORTED_DIFFS} more')
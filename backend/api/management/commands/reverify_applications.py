@@ -0,0 +1,161 @@
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from api.models import ScholarshipApplication
+from api.reverify import reverify_application
+
+MAX_REPORTED_CHANGES = 20
+
+
+def _init_reverify_worker():
+    # Spawned workers start without Django configured
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+
+
+def _reverify_task(application_id, seed, analyzer_version, apply):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return reverify_application(application_id, seed, analyzer_version, apply)
+
+
+class Checkpoint:
+    """
+    Progress of a run in a small JSON file. `done_through` is the highest id
+    below which every application has finished, so a resumed run starts after
+    it even though workers complete out of order.
+    """
+
+    def __init__(self, path, run):
+        self.path = path
+        self.run = run
+        self.done_through = 0
+        self.counts = {}
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path) as handle:
+            saved = json.load(handle)
+        if saved.get('run') != self.run:
+            raise CommandError(
+                f'{self.path} was written by a run with different options ({saved.get("run")}); '
+                'use --restart to start over'
+            )
+        self.done_through = saved['done_through']
+        self.counts = saved['counts']
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as handle:
+            json.dump({'run': self.run, 'done_through': self.done_through, 'counts': self.counts}, handle)
+        os.replace(temp_path, self.path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-run document analysis on stored grade documents (memory-mapped from MEDIA_ROOT) '
+        'in a process pool and report what changed. Resumable with --checkpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyzer', help='Analyzer version (default: AI_ANALYZER_VERSION)')
+        parser.add_argument('--seed', default='0', help='Per-application RNGs are seeded from this and the id')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--checkpoint', help='Progress file; an existing one resumes the run')
+        parser.add_argument('--checkpoint-every', type=int, default=200, help='Save progress every N applications')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+        parser.add_argument('--apply', action='store_true',
+                            help='Save changed results on applications that are still pending or under review')
+        parser.add_argument('--academic-year')
+        parser.add_argument('--semester')
+
+    def handle(self, *args, **options):
+        run = {key: options[key] for key in ('analyzer', 'seed', 'apply', 'academic_year', 'semester')}
+        checkpoint = Checkpoint(options['checkpoint'], run)
+        if not options['restart'] and checkpoint.load():
+            self.stdout.write(f'Resuming after application {checkpoint.done_through}')
+
+        applications = ScholarshipApplication.objects.exclude(grade_document='').exclude(grade_document__isnull=True)
+        if options['academic_year']:
+            applications = applications.filter(academic_year=options['academic_year'])
+        if options['semester']:
+            applications = applications.filter(semester=options['semester'])
+        ids = list(applications.filter(id__gt=checkpoint.done_through).order_by('id').values_list('id', flat=True))
+        self.stdout.write(f'{len(ids)} applications to re-verify with {options["workers"]} workers')
+
+        counts = checkpoint.counts
+        changes = []
+        workers = options['workers']
+        started = time.perf_counter()
+        processed = 0
+        # Forked workers must open their own connections, not share ours
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_reverify_worker) as pool:
+            in_flight = {}
+            finished = set()
+            submitted = []
+
+            def collect(done):
+                nonlocal processed
+                for future in done:
+                    application_id = in_flight.pop(future)
+                    result = future.result()
+                    counts[result['outcome']] = counts.get(result['outcome'], 0) + 1
+                    if result['outcome'] == 'changed':
+                        changes.append(result)
+                    if result.get('error'):
+                        self.stderr.write(f"Application {application_id}: {result['error']}")
+                    finished.add(application_id)
+                    processed += 1
+                    if processed % options['checkpoint_every'] == 0:
+                        self.advance(checkpoint, submitted, finished)
+                        self.stdout.write(f'{processed} re-verified ({counts})')
+
+            # Bounded: only a few tasks per worker are queued at a time
+            for application_id in ids:
+                while len(in_flight) >= workers * 4:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                future = pool.submit(_reverify_task, application_id, options['seed'], options['analyzer'], options['apply'])
+                in_flight[future] = application_id
+                submitted.append(application_id)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        self.advance(checkpoint, submitted, finished)
+        wall = time.perf_counter() - started
+
+        for result in changes[:MAX_REPORTED_CHANGES]:
+            details = ', '.join(f'{field}: {old} -> {new}' for field, (old, new) in result['changes'].items())
+            applied = ' (applied)' if result.get('applied') else ''
+            self.stdout.write(f"  #{result['id']}: {details}{applied}")
+        if len(changes) > MAX_REPORTED_CHANGES:
+            self.stdout.write(f'  ... and {len(changes) - MAX_REPORTED_CHANGES} more')
+
+        rate = processed / wall if wall else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-verified {processed} applications in {wall:.2f}s ({rate:.1f}/sec). Totals: {counts}'
+        ))
+
+    def advance(self, checkpoint, submitted, finished):
+        """Move the checkpoint past every leading id that has finished"""
+        done = 0
+        for application_id in submitted:
+            if application_id not in finished:
+                break
+            checkpoint.done_through = application_id
+            done += 1
+        finished.difference_update(submitted[:done])
+        del submitted[:done]
+        checkpoint.save()
@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.email_utils import send_pending_verification_emails
+
+class Command(BaseCommand):
+    help = 'Send queued email verification codes in batches (use --loop to run as a background worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll for new messages')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty (default: 1)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Messages sent per connection (default: EMAIL_SEND_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        try:
+            while True:
+                close_old_connections()
+                result = send_pending_verification_emails(batch_size=options['batch_size'])
+                for key in totals:
+                    totals[key] += result[key]
+                if any(result.values()):
+                    self.stdout.write(
+                        f"Sent {result['sent']}, retrying {result['retried']}, gave up on {result['failed']}"
+                    )
+                    # A full batch means more are probably waiting - go again immediately
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {totals['sent']} sent, {totals['retried']} scheduled for retry, {totals['failed']} failed"
+        ))
@@ -0,0 +1,36 @@
+import contextlib
+import io
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.batch_validation import iter_path_documents, validate_documents
+
+
+class Command(BaseCommand):
+    help = (
+        'Pre-screen grade documents (files, folders or zip archives) with the same checks as '
+        'an application submission. Prints one JSON verdict per file; nothing is saved.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files, directories (searched recursively) or .zip archives')
+        parser.add_argument('--workers', type=int, default=settings.BATCH_VALIDATION_WORKERS)
+        parser.add_argument('--analyzer', help='Analyzer version (default: AI_ANALYZER_VERSION)')
+
+    def handle(self, *args, **options):
+        verdicts = validate_documents(
+            iter_path_documents(options['paths']), workers=options['workers'], analyzer_version=options['analyzer']
+        )
+        # The analyzer prints its debug output for every file; keep stdout to the verdicts
+        with contextlib.redirect_stdout(io.StringIO()) as analyzer_output:
+            for verdict in verdicts:
+                if 'summary' in verdict:
+                    summary = verdict['summary']
+                    continue
+                self.stdout.write(json.dumps(verdict))
+                analyzer_output.seek(0)
+                analyzer_output.truncate()
+
+        message = (f"{summary['files']} files: {summary['valid']} valid, {summary['invalid']} invalid "
+                   f"in {summary['elapsed_ms'] / 1000:.2f}s")
+        self.stderr.write(self.style.SUCCESS(message))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_alter_emailverification_created_at_authtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailverification',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='emailverification',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='emailverification',
+            name='send_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailverification',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:22
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_emailverification_delivery_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SemesterSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=20)),
+                ('semester', models.CharField(max_length=50)),
+                ('total_applications', models.IntegerField(default=0)),
+                ('approved_applications', models.IntegerField(default=0)),
+                ('pending_applications', models.IntegerField(default=0)),
+                ('rejected_applications', models.IntegerField(default=0)),
+                ('unique_students', models.IntegerField(default=0)),
+                ('merit_recipients', models.IntegerField(default=0)),
+                ('average_swa', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('total_disbursed', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('academic_year', 'semester'), name='unique_semester_summary')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('semester', models.CharField(max_length=50)),
+                ('academic_year', models.CharField(max_length=20)),
+                ('units_enrolled', models.IntegerField(blank=True, null=True)),
+                ('swa_grade', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('grade_document', models.CharField(blank=True, max_length=255)),
+                ('has_inc_withdrawn', models.BooleanField(blank=True, null=True)),
+                ('has_failed_dropped', models.BooleanField(blank=True, null=True)),
+                ('ai_verification_status', models.CharField(choices=[('pending', 'Pending Review'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('under_review', 'Under AI Review')], max_length=20)),
+                ('ai_confidence_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('base_allowance', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('merit_incentive', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_allowance', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('notes_compressed', models.BinaryField(blank=True)),
+                ('logs_compressed', models.BinaryField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_applications', to='api.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['academic_year', 'semester'], name='archived_app_semester_idx')],
+            },
+        ),
+    ]
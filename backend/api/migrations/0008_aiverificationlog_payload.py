@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:23
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+def compress_existing_logs(apps, schema_editor):
+    """Move the JSON text columns of existing rows into the compressed payload"""
+    AIVerificationLog = apps.get_model('api', 'AIVerificationLog')
+    pending = AIVerificationLog.objects.filter(payload__isnull=True).order_by('id')
+    while True:
+        batch = list(pending[:500])
+        if not batch:
+            break
+        for log in batch:
+            try:
+                response = json.loads(log.ai_response) if log.ai_response else {}
+            except ValueError:
+                response = {'raw': log.ai_response}
+            if isinstance(response, dict):
+                response.pop('notes', None)
+            try:
+                input_data = json.loads(log.input_data) if log.input_data else {}
+            except ValueError:
+                input_data = {'raw': log.input_data}
+            raw = json.dumps({'input': input_data, 'response': response}, separators=(',', ':'), ensure_ascii=False)
+            log.payload = zlib.compress(raw.encode('utf-8'), 6)
+            log.input_data = ''
+            log.ai_response = ''
+        AIVerificationLog.objects.bulk_update(batch, ['payload', 'input_data', 'ai_response'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_archivedapplication_semestersummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiverificationlog',
+            name='payload',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='aiverificationlog',
+            name='ai_response',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='aiverificationlog',
+            name='input_data',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(compress_existing_logs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_aiverificationlog_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='ai_verification_result',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_scholarshipapplication_ai_verification_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='document_digest',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
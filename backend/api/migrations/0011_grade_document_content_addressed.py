@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+import os
+
+import api.storage
+from django.db import migrations, models
+
+
+def record_original_names(apps, schema_editor):
+    """Existing uploads are stored under their original name; keep it before files move"""
+    ScholarshipApplication = apps.get_model('api', 'ScholarshipApplication')
+    pending = ScholarshipApplication.objects.exclude(grade_document='').exclude(grade_document__isnull=True)
+    batch = []
+    for application in pending.filter(grade_document_name='').iterator(chunk_size=500):
+        application.grade_document_name = os.path.basename(application.grade_document.name)[:255]
+        batch.append(application)
+        if len(batch) >= 500:
+            ScholarshipApplication.objects.bulk_update(batch, ['grade_document_name'])
+            batch = []
+    if batch:
+        ScholarshipApplication.objects.bulk_update(batch, ['grade_document_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_scholarshipapplication_document_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='grade_document_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='scholarshipapplication',
+            name='grade_document',
+            field=models.FileField(blank=True, null=True, storage=api.storage.document_storage, upload_to='grade_documents/'),
+        ),
+        migrations.RunPython(record_original_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:39
+
+import json
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Which duplicate stays in the hot table: reviewed decisions before
+# undecided ones, then the most recently updated
+STATUS_PRIORITY = {'approved': 0, 'rejected': 1, 'under_review': 2, 'pending': 3}
+
+
+def _log_record(log):
+    from api.compression import unpack_json
+    if log.payload:
+        payload = unpack_json(bytes(log.payload))
+    else:
+        payload = {
+            'input': json.loads(log.input_data) if log.input_data else {},
+            'response': json.loads(log.ai_response) if log.ai_response else {},
+        }
+    return {
+        'verification_type': log.verification_type,
+        'input': payload['input'],
+        'response': payload['response'],
+        'confidence_score': str(log.confidence_score),
+        'created_at': log.created_at.isoformat(),
+    }
+
+
+def archive_duplicate_applications(apps, schema_editor):
+    """
+    Keep one application per student and semester so the unique constraint
+    can be added, and move the others (with their AI logs) into
+    ArchivedApplication instead of deleting them. Each moved row is
+    printed so an admin can review it under admin/archive/applications/.
+    """
+    from api.compression import pack_json
+    from api.verification_notes import render_verification_notes
+    ScholarshipApplication = apps.get_model('api', 'ScholarshipApplication')
+    ArchivedApplication = apps.get_model('api', 'ArchivedApplication')
+    AIVerificationLog = apps.get_model('api', 'AIVerificationLog')
+    duplicated = (ScholarshipApplication.objects
+                  .values('student_id', 'academic_year', 'semester')
+                  .annotate(rows=Count('id'))
+                  .filter(rows__gt=1))
+    for group in list(duplicated):
+        rows = sorted(
+            ScholarshipApplication.objects.filter(
+                student_id=group['student_id'], academic_year=group['academic_year'], semester=group['semester']
+            ),
+            key=lambda app: (STATUS_PRIORITY.get(app.ai_verification_status, len(STATUS_PRIORITY)),
+                             -app.updated_at.timestamp(), -app.id)
+        )
+        keep, duplicates = rows[0], rows[1:]
+        for application in duplicates:
+            logs = AIVerificationLog.objects.filter(application_id=application.id).order_by('id')
+            ArchivedApplication.objects.create(
+                original_id=application.id,
+                student_id=application.student_id,
+                semester=application.semester,
+                academic_year=application.academic_year,
+                units_enrolled=application.units_enrolled,
+                swa_grade=application.swa_grade,
+                grade_document=application.grade_document.name if application.grade_document else '',
+                has_inc_withdrawn=application.has_inc_withdrawn,
+                has_failed_dropped=application.has_failed_dropped,
+                ai_verification_status=application.ai_verification_status,
+                ai_confidence_score=application.ai_confidence_score,
+                base_allowance=application.base_allowance,
+                merit_incentive=application.merit_incentive,
+                total_allowance=application.total_allowance,
+                notes_compressed=pack_json(render_verification_notes(application, memoize=False)),
+                logs_compressed=pack_json([_log_record(log) for log in logs]),
+                created_at=application.created_at,
+                updated_at=application.updated_at,
+            )
+            print(f"\n  Archived duplicate application {application.id} ({application.ai_verification_status}) "
+                  f"of student profile {application.student_id} for {application.academic_year} "
+                  f"{application.semester}; kept {keep.id} ({keep.ai_verification_status})")
+            # Deleting the application also deletes its AIVerificationLog rows
+            application.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_grade_document_content_addressed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('request_fingerprint', models.CharField(max_length=64)),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(archive_duplicate_applications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='scholarshipapplication',
+            constraint=models.UniqueConstraint(fields=('student', 'academic_year', 'semester'), name='unique_application_per_semester'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='unique_idempotency_key'),
+        ),
+    ]
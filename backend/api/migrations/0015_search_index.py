@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from api.search import ensure_search_index
+    # SQLite triggers are installed by the post_migrate hook in apps.py, once
+    # no later migration can rebuild the tables they refer to
+    ensure_search_index(schema_editor.connection, triggers=False)
+
+
+def drop_search_index(apps, schema_editor):
+    from api.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_application_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('dhash', models.BigIntegerField()),
+                ('chunk0', models.IntegerField(db_index=True)),
+                ('chunk1', models.IntegerField(db_index=True)),
+                ('chunk2', models.IntegerField(db_index=True)),
+                ('chunk3', models.IntegerField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='duplicate_document_distance',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='duplicate_document_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.scholarshipapplication'),
+        ),
+    ]
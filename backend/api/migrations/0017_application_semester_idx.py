@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_document_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['academic_year', 'semester'], name='application_semester_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+def build_sketches(apps, schema_editor):
+    from api.sketches import build_registers
+    ScholarshipApplication = apps.get_model('api', 'ScholarshipApplication')
+    CardinalitySketch = apps.get_model('api', 'CardinalitySketch')
+    rows = (ScholarshipApplication.objects.order_by()
+            .values_list('academic_year', 'semester', 'student_id').distinct().iterator(chunk_size=5000))
+    CardinalitySketch.objects.bulk_create([
+        CardinalitySketch(academic_year=academic_year, semester=semester, registers=bytes(registers))
+        for (academic_year, semester), registers in build_registers(rows).items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_application_semester_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardinalitySketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=20)),
+                ('semester', models.CharField(max_length=50)),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('academic_year', 'semester'), name='unique_cardinality_sketch')],
+            },
+        ),
+        migrations.RunPython(build_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:38
+
+from django.db import migrations, models
+
+
+def fill_search_notes(apps, schema_editor):
+    from api.verification_notes import render_verification_notes
+    ScholarshipApplication = apps.get_model('api', 'ScholarshipApplication')
+    batch = []
+    for application in ScholarshipApplication.objects.order_by('id').iterator(chunk_size=500):
+        application.search_notes = render_verification_notes(application, memoize=False)
+        batch.append(application)
+        if len(batch) == 500:
+            ScholarshipApplication.objects.bulk_update(batch, ['search_notes'])
+            batch = []
+    ScholarshipApplication.objects.bulk_update(batch, ['search_notes'])
+
+
+def index_search_notes(apps, schema_editor):
+    from api.search import POSTGRES_NOTES_INDEX
+    # SQLite reindexes from the column when post_migrate reinstalls its triggers
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS api_application_notes_search')
+        schema_editor.execute(POSTGRES_NOTES_INDEX)
+
+
+def unindex_search_notes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS api_application_notes_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_review_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='search_notes',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_notes, migrations.RunPython.noop),
+        migrations.RunPython(index_search_notes, unindex_search_notes),
+    ]
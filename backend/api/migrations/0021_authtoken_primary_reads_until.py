@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_application_search_notes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authtoken',
+            name='primary_reads_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,14 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from decimal import Decimal
+from .compression import pack_json, unpack_json
+from .storage import document_storage
+import binascii
+import json
+import os
+import uuid
 
 class Message(models.Model):
     text = models.CharField(max_length=255)
@@ -15,11 +23,62 @@ class StudentProfile(models.Model):
     course = models.CharField(max_length=100, blank=True)
     year_level = models.CharField(max_length=20, blank=True)
     is_first_time_applicant = models.BooleanField(default=True)
+    email_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.user.username} - {self.student_id}"
 
+class EmailVerification(models.Model):
+    email = models.EmailField()
+    verification_code = models.CharField(max_length=6)
+    uuid_key = models.UUIDField(default=uuid.uuid4, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    is_verified = models.BooleanField(default=False)
+    verified_at = models.DateTimeField(null=True, blank=True)
+
+    # Delivery state used by the background sender (see api/email_utils.py)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    send_attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.email} - {'verified' if self.is_verified else 'pending'}"
+
+class AuthToken(models.Model):
+    """
+    API token with an expiry. Replaces the never-expiring rest_framework Token
+    so that a user can hold one token per device and stale ones can be purged.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(User, related_name='auth_tokens', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    # Set by db_routers.pin_to_primary: reads stay off the replica until then
+    primary_reads_until = models.DateTimeField(null=True, blank=True)
+
+    @staticmethod
+    def generate_key():
+        return binascii.hexlify(os.urandom(20)).decode()
+
+    @classmethod
+    def issue(cls, user):
+        """Create a fresh token for the user valid for AUTH_TOKEN_TTL"""
+        from django.conf import settings
+        return cls.objects.create(
+            key=cls.generate_key(),
+            user=user,
+            expires_at=timezone.now() + settings.AUTH_TOKEN_TTL
+        )
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f"{self.user.username} - expires {self.expires_at:%Y-%m-%d %H:%M}"
+
 class ScholarshipApplication(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending Review'),
@@ -33,7 +92,12 @@ class ScholarshipApplication(models.Model):
     academic_year = models.CharField(max_length=20)
     units_enrolled = models.IntegerField(null=True, blank=True)  # Will be extracted by AI
     swa_grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)  # Will be extracted by AI
-    grade_document = models.FileField(upload_to='grade_documents/', null=True, blank=True)
+    grade_document = models.FileField(upload_to='grade_documents/', storage=document_storage, null=True, blank=True)
+    grade_document_name = models.CharField(max_length=255, blank=True)  # Name of the uploaded file; storage names are content hashes
+    document_digest = models.CharField(max_length=64, blank=True, db_index=True)  # SHA-256, set once previews exist
+    # Another student's application with a near-identical document (see fingerprints.py)
+    duplicate_document_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    duplicate_document_distance = models.SmallIntegerField(null=True, blank=True)  # Differing dHash bits
     has_inc_withdrawn = models.BooleanField(default=False, null=True, blank=True)  # Will be determined by AI
     has_failed_dropped = models.BooleanField(default=False, null=True, blank=True)  # Will be determined by AI
     
@@ -41,15 +105,46 @@ class ScholarshipApplication(models.Model):
     ai_verification_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     ai_confidence_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     ai_verification_notes = models.TextField(blank=True)
+    ai_verification_result = models.JSONField(default=dict, blank=True)  # Structured record, see verification_notes.py
+    # The rendered notes (record + short notes), kept by save() for the admin search index (see search.py)
+    search_notes = models.TextField(blank=True, editable=False)
     
     # Allowance Calculation
     base_allowance = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('5000.00'))
     merit_incentive = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     total_allowance = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('5000.00'))
     
+    # Review queue (see review_queue.py): save() bumps version so stale admin
+    # updates can be rejected; a claim is a lease on the application
+    version = models.PositiveIntegerField(default=1)
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_applications')
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # One application per student per semester; resubmissions return the existing row
+            models.UniqueConstraint(fields=['student', 'academic_year', 'semester'],
+                                    name='unique_application_per_semester'),
+        ]
+        indexes = [
+            # Change cursor for ?since= sync (see sync.py)
+            models.Index(fields=['updated_at', 'id'], name='application_sync_idx'),
+            # Per-semester analytics refresh (see analytics.py)
+            models.Index(fields=['academic_year', 'semester'], name='application_semester_idx'),
+            # Oldest-first claiming from the review queue
+            models.Index(fields=['ai_verification_status', 'created_at'], name='application_queue_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so save() can tell when the status changes
+        instance._loaded_status = instance.__dict__.get('ai_verification_status')
+        return instance
+
     def save(self, *args, **kwargs):
         # Calculate merit incentive only if all required data is available
         # Calculate merit incentive based on official TCU requirements
@@ -68,18 +163,293 @@ class ScholarshipApplication(models.Model):
         
         # Calculate total allowance
         self.total_allowance = self.base_allowance + self.merit_incentive
+        previous_status = getattr(self, '_loaded_status', None)
+        created = self._state.adding
+        if not created:
+            self.version += 1
+        from .verification_notes import render_verification_notes
+        self.search_notes = render_verification_notes(self, memoize=False)
         super().save(*args, **kwargs)
 
+        # Push the change to the student's and the admins' event streams
+        if created or previous_status != self.ai_verification_status:
+            from .events import publish_application_status
+            publish_application_status(self, previous_status)
+        # Count the student in the semester's distinct-student sketch
+        if created:
+            from .sketches import record_application
+            record_application(self)
+        self._loaded_status = self.ai_verification_status
+
     def __str__(self):
         return f"{self.student.user.username} - {self.semester} {self.academic_year}"
 
+    @property
+    def document_display_name(self):
+        """The uploaded file's own name (older rows only have the storage name)"""
+        if self.grade_document_name:
+            return self.grade_document_name
+        return os.path.basename(self.grade_document.name) if self.grade_document else ''
+
+    @property
+    def analysis_filename(self):
+        """
+        The name the document analyzer's filename heuristics look at. Uploads
+        used to be stored as grade_documents/<original name> and the heuristics
+        were tuned on that path, so it is reconstructed for hashed names.
+        """
+        if self.grade_document_name:
+            return self.analysis_filename_for(self.grade_document_name)
+        return self.grade_document.name if self.grade_document else ''
+
+    @staticmethod
+    def analysis_filename_for(original_name):
+        """analysis_filename for a document uploaded as `original_name`"""
+        return f'grade_documents/{original_name}'
+
+class ApplicationTombstone(models.Model):
+    """
+    Left behind when an application is deleted (or archived), so clients
+    syncing the admin list with ?since= can drop it from their copy. The id
+    orders tombstones for the sync cursor.
+    """
+    application_id = models.BigIntegerField()
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    @classmethod
+    def record(cls, applications):
+        """Tombstones for applications about to be deleted"""
+        return cls.objects.bulk_create([
+            cls(application_id=application.id, student_id=application.student_id) for application in applications
+        ])
+
+    def __str__(self):
+        return f"Application {self.application_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+class DocumentFingerprint(models.Model):
+    """
+    dHash of a stored grade document (its first page for PDFs), one row per
+    content digest. The hash is repeated as four indexed 16-bit chunks for
+    Hamming-distance lookups (see fingerprints.py).
+    """
+    digest = models.CharField(max_length=64, unique=True)  # SHA-256 of the document
+    dhash = models.BigIntegerField()  # 64-bit hash stored signed
+    chunk0 = models.IntegerField(db_index=True)
+    chunk1 = models.IntegerField(db_index=True)
+    chunk2 = models.IntegerField(db_index=True)
+    chunk3 = models.IntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} dhash {self.dhash & 0xFFFFFFFFFFFFFFFF:016x}"
+
+class UploadSession(models.Model):
+    """
+    A grade document uploaded in chunks. Chunks are appended to a .part file
+    under UPLOAD_SESSION_ROOT; `received` only advances once a chunk's
+    checksum matches, so a client can always resume from it. A completed
+    session is referenced from an application submission by its id.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, related_name='upload_sessions', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)  # whole file; declared by the client or set on completion
+    chunks = models.JSONField(default=list, blank=True)  # [offset, length, sha256] per accepted chunk
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    @property
+    def path(self):
+        from django.conf import settings
+        return os.path.join(settings.UPLOAD_SESSION_ROOT, f'{self.id}.part')
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f"{self.user.username} - {self.filename} ({self.received}/{self.size})"
+
+class RosterImport(models.Model):
+    """
+    A roster CSV uploaded through the admin endpoint and imported in the
+    background (api/roster.py). The file waits under ROSTER_IMPORT_ROOT until
+    the job has run; `summary` is saved after every batch so the admin can
+    follow the import.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, related_name='roster_imports', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    summary = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def path(self):
+        from django.conf import settings
+        return os.path.join(settings.ROSTER_IMPORT_ROOT, f'{self.id}.csv')
+
+    def __str__(self):
+        return f"{self.filename} - {self.status}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key and the response it produced, so a
+    retried request gets the stored response instead of being processed
+    again. response_status is null while the first request is in flight.
+    """
+    user = models.ForeignKey(User, related_name='idempotency_keys', on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)  # SHA-256 of the request body
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+
+    @property
+    def is_expired(self):
+        from django.conf import settings
+        return self.created_at <= timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+
+    def __str__(self):
+        return f"{self.user.username} - {self.key}"
+
 class AIVerificationLog(models.Model):
     application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE)
     verification_type = models.CharField(max_length=50)  # 'grade_verification', 'document_analysis'
-    input_data = models.TextField()
-    ai_response = models.TextField()
+    # Legacy JSON text columns; new rows keep input and response in payload
+    input_data = models.TextField(blank=True)
+    ai_response = models.TextField(blank=True)
+    payload = models.BinaryField(null=True, blank=True)  # compressed {'input': ..., 'response': ...}
     confidence_score = models.DecimalField(max_digits=5, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def record(cls, application, verification_type, input_data, response, confidence_score):
+        """Store a log entry with input and response as one compressed payload"""
+        return cls.objects.create(
+            application=application,
+            verification_type=verification_type,
+            payload=pack_json({'input': input_data, 'response': response}),
+            confidence_score=confidence_score
+        )
+
+    def _decoded(self):
+        if not hasattr(self, '_payload_cache'):
+            if self.payload:
+                self._payload_cache = unpack_json(self.payload)
+            else:
+                # Rows written before payload existed
+                self._payload_cache = {
+                    'input': json.loads(self.input_data) if self.input_data else {},
+                    'response': json.loads(self.ai_response) if self.ai_response else {},
+                }
+        return self._payload_cache
+
+    @property
+    def input(self):
+        return self._decoded()['input']
+
+    @property
+    def response(self):
+        return self._decoded()['response']
+
     def __str__(self):
         return f"{self.application.student.user.username} - {self.verification_type}"
+
+class ArchivedApplication(models.Model):
+    """
+    A ScholarshipApplication from a closed semester, moved out of the hot table
+    by the archive_semesters command. The verification notes and the
+    AIVerificationLog rows are kept as compressed JSON.
+    """
+    original_id = models.BigIntegerField(unique=True)
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='archived_applications')
+    semester = models.CharField(max_length=50)
+    academic_year = models.CharField(max_length=20)
+    units_enrolled = models.IntegerField(null=True, blank=True)
+    swa_grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    grade_document = models.CharField(max_length=255, blank=True)
+    has_inc_withdrawn = models.BooleanField(null=True, blank=True)
+    has_failed_dropped = models.BooleanField(null=True, blank=True)
+    ai_verification_status = models.CharField(max_length=20, choices=ScholarshipApplication.STATUS_CHOICES)
+    ai_confidence_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    base_allowance = models.DecimalField(max_digits=10, decimal_places=2)
+    merit_incentive = models.DecimalField(max_digits=10, decimal_places=2)
+    total_allowance = models.DecimalField(max_digits=10, decimal_places=2)
+    notes_compressed = models.BinaryField(blank=True)
+    logs_compressed = models.BinaryField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['academic_year', 'semester'], name='archived_app_semester_idx'),
+        ]
+
+    @property
+    def notes(self):
+        return unpack_json(self.notes_compressed) or ''
+
+    @property
+    def logs(self):
+        return unpack_json(self.logs_compressed) or []
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.semester} {self.academic_year} (archived)"
+
+class SemesterSummary(models.Model):
+    """Rollup left behind for an archived semester"""
+    academic_year = models.CharField(max_length=20)
+    semester = models.CharField(max_length=50)
+    total_applications = models.IntegerField(default=0)
+    approved_applications = models.IntegerField(default=0)
+    pending_applications = models.IntegerField(default=0)
+    rejected_applications = models.IntegerField(default=0)
+    unique_students = models.IntegerField(default=0)
+    merit_recipients = models.IntegerField(default=0)
+    average_swa = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    total_disbursed = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['academic_year', 'semester'], name='unique_semester_summary'),
+        ]
+
+    def __str__(self):
+        return f"{self.academic_year} - {self.semester}: {self.total_applications} applications"
+
+class CardinalitySketch(models.Model):
+    """HyperLogLog registers of the students who applied in one semester (see sketches.py)"""
+    academic_year = models.CharField(max_length=20)
+    semester = models.CharField(max_length=50)
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['academic_year', 'semester'], name='unique_cardinality_sketch'),
+        ]
+
+    def __str__(self):
+        return f"{self.academic_year} - {self.semester}: {len(self.registers)} registers"
@@ -0,0 +1,151 @@
+"""
+Downscaled previews of grade documents for admin review.
+
+When an application is submitted, a background thread renders a small
+thumbnail and a larger page preview of the uploaded document (images with
+PIL, the first page of PDFs with PyMuPDF when it is installed) as WebP, or
+JPEG when this PIL build has no WebP support.
+
+Previews are stored content-addressed next to the originals, under
+previews/<sha256[:2]>/<sha256>-<size>.<ext> in the default storage, so two
+uploads of the same file share previews and a preview URL never changes
+meaning; DocumentPreviewView serves them with long-lived cache headers.
+ScholarshipApplication.document_digest is set once previews exist, with
+updated_at bumped so delta sync delivers the new preview URLs.
+"""
+import hashlib
+import io
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, features
+from .storage import blob_digest
+from .fingerprints import flag_duplicate_document, record_fingerprint
+from .models import DocumentFingerprint
+
+try:
+    import fitz  # PyMuPDF, optional: renders PDF pages
+except ImportError:
+    fitz = None
+
+PREVIEW_FORMAT = ('webp', 'WEBP', 'image/webp') if features.check('webp') else ('jpg', 'JPEG', 'image/jpeg')
+PREVIEW_EXTENSION, PREVIEW_PIL_FORMAT, PREVIEW_CONTENT_TYPE = PREVIEW_FORMAT
+
+
+def file_digest(fileobj, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def preview_name(digest, size):
+    return f'previews/{digest[:2]}/{digest}-{size}.{PREVIEW_EXTENSION}'
+
+
+def preview_names(digest):
+    return [preview_name(digest, size) for size in settings.DOCUMENT_PREVIEW_SIZES]
+
+
+def render_first_page(fileobj, name):
+    """A PIL image of the document (first page for PDFs), or None if it can't be rendered"""
+    fileobj.seek(0)
+    if name.lower().endswith('.pdf'):
+        if fitz is None:
+            return None
+        with fitz.open(stream=fileobj.read(), filetype='pdf') as pdf:
+            if not pdf.page_count:
+                return None
+            largest = max(settings.DOCUMENT_PREVIEW_SIZES.values())
+            page = pdf[0]
+            zoom = largest / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    image = Image.open(fileobj)
+    image.load()
+    return image
+
+
+def encode_preview(image, max_side):
+    preview = image.copy()
+    preview.thumbnail((max_side, max_side))
+    if preview.mode not in ('RGB', 'L'):
+        preview = preview.convert('RGB')
+    buffer = io.BytesIO()
+    preview.save(buffer, PREVIEW_PIL_FORMAT, quality=settings.DOCUMENT_PREVIEW_QUALITY)
+    return buffer.getvalue()
+
+
+def generate_previews(application):
+    """
+    Render and store every preview size and the fingerprint for the
+    application's document, record its digest and flag it when it
+    near-duplicates another student's document. Returns the digest, or None
+    when there is nothing to preview. Existing previews and fingerprints for
+    the same content are reused.
+    """
+    if not application.grade_document:
+        return None
+    with application.grade_document.open('rb') as document:
+        # Content-addressed names already carry the digest
+        digest = blob_digest(application.grade_document.name) or file_digest(document)
+        missing = {
+            size: max_side for size, max_side in settings.DOCUMENT_PREVIEW_SIZES.items()
+            if not default_storage.exists(preview_name(digest, size))
+        }
+        needs_fingerprint = not DocumentFingerprint.objects.filter(digest=digest).exists()
+        if missing or needs_fingerprint:
+            image = render_first_page(document, application.grade_document.name)
+            if image is None:
+                return None
+            for size, max_side in missing.items():
+                default_storage.save(preview_name(digest, size), ContentFile(encode_preview(image, max_side)))
+            if needs_fingerprint:
+                record_fingerprint(digest, image)
+
+    if digest != application.document_digest:
+        # update() rather than save() so the notes aren't re-rendered; updated_at
+        # is bumped so clients syncing the admin list get the preview URLs
+        now = timezone.now()
+        type(application).objects.filter(pk=application.pk).update(document_digest=digest, updated_at=now)
+        application.document_digest = digest
+        application.updated_at = now
+    flag_duplicate_document(application)
+    return digest
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_preview_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=settings.DOCUMENT_PREVIEW_WORKERS,
+                                           thread_name_prefix='document-preview')
+    return _pool
+
+
+def _generate_in_background(application):
+    try:
+        generate_previews(application)
+    except Exception as e:
+        print(f"Warning: preview generation failed for application {application.pk}: {e}")
+        traceback.print_exc()
+    finally:
+        # Worker threads keep their own connection; don't leak it
+        connection.close()
+
+
+def schedule_previews(application):
+    """Generate previews in the background once the current transaction commits"""
+    transaction.on_commit(lambda: get_preview_pool().submit(_generate_in_background, application))
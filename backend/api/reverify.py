@@ -0,0 +1,172 @@
+"""
+Re-running AI verification on stored grade documents.
+
+Documents are memory-mapped from MEDIA_ROOT instead of being read through the
+storage API, so a file is never copied into Python memory as a whole: header
+sniffing and SHA-256 hashing work on a memoryview of the mapping, and the
+analyzer reads through a file-like wrapper that slices the same mapping.
+
+reverify_application() is the unit of work for the reverify_applications
+command, which runs it in a process pool. Each application gets its own RNG
+seeded from the run seed and the application id, so a re-run (or a resumed
+run) gives the same result for the same application.
+"""
+import hashlib
+import mmap
+import os
+import random
+from decimal import Decimal
+from django.conf import settings
+from .analysis import get_analyzer
+from .models import AIVerificationLog, ScholarshipApplication
+from .verification_notes import build_verification_record
+
+COMPARED_FIELDS = ('units_enrolled', 'swa_grade', 'has_inc_withdrawn', 'has_failed_dropped')
+# Final decisions are left alone when applying new results
+REVERIFIABLE_STATUSES = ('pending', 'under_review')
+
+FILE_SIGNATURES = (
+    (b'%PDF', 'pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+)
+
+
+class MappedDocument:
+    """
+    Read-only, file-like view of a file on disk backed by mmap. `view` is a
+    memoryview of the whole file for zero-copy consumers; read()/seek()/tell()
+    serve code that expects a file object (the analyzer, PIL).
+    """
+
+    def __init__(self, path, name=None):
+        self.path = path
+        self.name = name or os.path.basename(path)
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.view = memoryview(self._map) if self._map is not None else memoryview(b'')
+        self._position = 0
+
+    def read(self, size=-1):
+        end = self.size if size is None or size < 0 else min(self.size, self._position + size)
+        data = self.view[self._position:end].tobytes()
+        self._position = max(self._position, end)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def sniff_file_type(view):
+    """'pdf', 'png', 'jpeg' or None from the first bytes of a memoryview"""
+    for signature, file_type in FILE_SIGNATURES:
+        if view[:len(signature)] == signature:
+            return file_type
+    return None
+
+
+def document_digest(view):
+    """SHA-256 hex digest of a memoryview, hashed in place"""
+    return hashlib.sha256(view).hexdigest()
+
+
+def stored_document_path(name):
+    """Absolute path of a stored grade document, refusing names outside MEDIA_ROOT"""
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f'{name} is outside MEDIA_ROOT')
+    return path
+
+
+def reverify_application(application_id, seed, analyzer_version=None, apply=False):
+    """
+    Re-analyze one application's stored document. Returns a JSON-safe dict
+    with the outcome ('unchanged', 'changed', 'rejected', 'missing_document'
+    or 'error'), the document digest and the fields that differ.
+    """
+    result = {'id': application_id, 'outcome': 'error'}
+    try:
+        application = ScholarshipApplication.objects.select_related('student').get(id=application_id)
+        if not application.grade_document:
+            result['outcome'] = 'missing_document'
+            return result
+        path = stored_document_path(application.grade_document.name)
+        if not os.path.exists(path):
+            result['outcome'] = 'missing_document'
+            return result
+
+        analyzer = get_analyzer(analyzer_version, rng=random.Random(f'{seed}:{application_id}'))
+        with MappedDocument(path, name=application.analysis_filename) as document:
+            result['digest'] = document_digest(document.view)
+            result['file_type'] = sniff_file_type(document.view)
+            try:
+                # Same name the submission saw, so results are comparable
+                extracted = analyzer.analyze(document)
+            except ValueError as e:
+                result['outcome'] = 'rejected'
+                result['reason'] = str(e)
+                return result
+
+        changes = {
+            field: [str(getattr(application, field)), str(extracted[field])]
+            for field in COMPARED_FIELDS
+            if getattr(application, field) != extracted[field]
+        }
+        result['outcome'] = 'changed' if changes else 'unchanged'
+        result['changes'] = changes
+
+        if apply and changes and application.ai_verification_status in REVERIFIABLE_STATUSES:
+            apply_extraction(application, extracted, analyzer.version)
+            result['applied'] = True
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+
+def apply_extraction(application, extracted, analyzer_version):
+    for field in COMPARED_FIELDS:
+        setattr(application, field, extracted[field])
+    application.ai_confidence_score = extracted['confidence_score']
+    # save() recalculates the merit incentive and total allowance
+    application.save()
+    application.ai_verification_result = build_verification_record(
+        application, extracted['confidence_score'], extracted['analysis_notes'],
+        application.merit_incentive > Decimal('0.00')
+    )
+    application.save()
+    AIVerificationLog.record(
+        application=application,
+        verification_type='reverification',
+        input_data={'document': application.grade_document.name, 'analyzer_version': analyzer_version},
+        response={field: str(extracted[field]) for field in COMPARED_FIELDS},
+        confidence_score=extracted['confidence_score']
+    )
@@ -0,0 +1,103 @@
+"""
+Review queue: admins claim applications to review instead of picking them
+from the shared list, so two reviewers never work on the same one.
+
+claim_applications() leases the oldest unclaimed applications in the queue
+statuses to one reviewer for REVIEW_CLAIM_LEASE. A lease that runs out (the
+reviewer closed the tab) makes the application claimable again; nothing has
+to clean it up. Where the database supports it (PostgreSQL, MySQL 8) the
+candidates are locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+claimers each take different rows without waiting on one another. SQLite has
+no row locks; there the claim is one conditional UPDATE over a LIMITed
+subquery, which SQLite runs atomically because writers are serialized.
+
+Updates are checked separately with the `version` column, which save()
+increments: lock_version() takes the row's write lock with an UPDATE that
+only matches the version the reviewer loaded, so a stale update is rejected
+instead of overwriting a newer one (see AdminApplicationsView.patch).
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+from .models import ScholarshipApplication
+
+
+class ReviewConflict(Exception):
+    """The application changed, or another reviewer holds it"""
+
+
+def unclaimed(now=None):
+    """Applications without a live claim"""
+    now = now or timezone.now()
+    return Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now)
+
+
+def queue(statuses=None, academic_year=None, semester=None, now=None):
+    """Claimable applications, oldest first"""
+    applications = ScholarshipApplication.objects.filter(
+        unclaimed(now), ai_verification_status__in=statuses or settings.REVIEW_QUEUE_STATUSES
+    )
+    if academic_year:
+        applications = applications.filter(academic_year=academic_year)
+    if semester:
+        applications = applications.filter(semester=semester)
+    return applications.order_by('created_at', 'id')
+
+
+def claim_applications(user, limit, **filters):
+    """Lease up to `limit` queued applications to `user`. Returns the claimed applications."""
+    now = timezone.now()
+    expires = now + settings.REVIEW_CLAIM_LEASE
+    candidates = queue(now=now, **filters)
+    claim = {'claimed_by': user, 'claim_expires_at': expires, 'updated_at': now}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            ScholarshipApplication.objects.filter(id__in=ids).update(**claim)
+        claimed = ScholarshipApplication.objects.filter(id__in=ids)
+    else:
+        # The unclaimed condition is re-checked by the UPDATE itself, so a row
+        # claimed by someone else in between is never taken over
+        ScholarshipApplication.objects.filter(
+            unclaimed(now), id__in=Subquery(candidates.values('id')[:limit])
+        ).update(**claim)
+        claimed = ScholarshipApplication.objects.filter(claimed_by=user, claim_expires_at=expires)
+    return list(claimed.select_related('student__user').defer('ai_verification_result', 'search_notes').order_by('created_at', 'id'))
+
+
+def active_claims(user):
+    """The applications `user` currently holds"""
+    return (ScholarshipApplication.objects.filter(claimed_by=user, claim_expires_at__gt=timezone.now())
+            .select_related('student__user').defer('ai_verification_result', 'search_notes').order_by('created_at', 'id'))
+
+
+def release_claims(user, ids=None):
+    """Give back `user`'s claims (all of them, or only `ids`). Returns how many were released."""
+    claims = ScholarshipApplication.objects.filter(claimed_by=user)
+    if ids is not None:
+        claims = claims.filter(id__in=ids)
+    return claims.update(claimed_by=None, claim_expires_at=None, updated_at=timezone.now())
+
+
+def lock_version(application_id, version, user):
+    """
+    Inside a transaction: lock the application if it still has `version` and
+    nobody else holds a live claim on it, then return it reloaded. Raises
+    ReviewConflict otherwise, and ScholarshipApplication.DoesNotExist if it
+    is gone.
+    """
+    now = timezone.now()
+    rows = ScholarshipApplication.objects.filter(id=application_id)
+    if version is not None:
+        rows = rows.filter(version=version)
+    # A no-op write: holds the row (PostgreSQL) or the database (SQLite) until
+    # commit, so a concurrent update with the same version finds no match
+    if rows.filter(unclaimed(now) | Q(claimed_by=user)).update(version=F('version')):
+        return ScholarshipApplication.objects.get(id=application_id)
+
+    application = ScholarshipApplication.objects.get(id=application_id)
+    if version is not None and application.version != version:
+        raise ReviewConflict(f'Application was changed by someone else (version {application.version}); reload it')
+    raise ReviewConflict('Application is claimed by another reviewer')
@@ -0,0 +1,314 @@
+"""
+Bulk student import from the registrar roster.
+
+The roster is a CSV with a header row. Only student_id is required; the other
+recognised columns are username, email, first_name, last_name, course,
+year_level and password. Rows without a password get an unusable password.
+
+The file is read as a stream and handled in batches: one set-based query per
+batch finds student IDs and usernames that already exist, passwords are
+hashed, and User + StudentProfile rows are written with bulk_create inside one
+transaction per batch.
+
+The import_students command hashes in a process pool of its own. A web worker
+must not fork one, so the upload endpoint only stores the file as a
+RosterImport job and returns; schedule_import() runs it on a single background
+thread, hashing on the shared password hashing pool (hash_pool) with at most
+ROSTER_IMPORT_HASH_WORKERS hashes in flight. Jobs live in the process that
+accepted them: one cut short by a restart stays queued or running, and
+uploading the roster again skips the students already created.
+"""
+import csv
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from .hashing import get_hash_pool
+from .models import RosterImport, StudentProfile
+
+ROSTER_COLUMNS = ('student_id', 'username', 'email', 'first_name', 'last_name', 'course', 'year_level', 'password')
+MAX_REPORTED_ERRORS = 100
+
+
+class RosterError(ValueError):
+    """The roster file itself is unusable (bad header)"""
+
+
+def check_header(fieldnames):
+    """The stripped column names; raises RosterError without a student_id column"""
+    fieldnames = [name.strip() for name in fieldnames or []]
+    if 'student_id' not in fieldnames:
+        raise RosterError('Roster must have a header row with a student_id column')
+    return fieldnames
+
+
+def _init_hash_worker():
+    # Spawned workers (Windows, macOS) start without Django configured
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean_row(row):
+    return {column: (row.get(column) or '').strip() for column in ROSTER_COLUMNS}
+
+
+class RosterImporter:
+    def __init__(self, batch_size=1000, workers=None, progress=None, hash_pool=None):
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 2
+        self.progress = progress
+        self.hash_pool = hash_pool
+        self.seen_student_ids = set()
+        self.seen_usernames = set()
+        self.summary = {
+            'rows': 0,
+            'created': 0,
+            'skipped_existing': 0,
+            'skipped_invalid': 0,
+            'errors': [],
+        }
+
+    def error(self, line, message):
+        self.summary['skipped_invalid'] += 1
+        if len(self.summary['errors']) < MAX_REPORTED_ERRORS:
+            self.summary['errors'].append(f'Line {line}: {message}')
+
+    def run(self, lines):
+        """Import from an iterable of CSV text lines (an open file works)"""
+        reader = csv.DictReader(lines)
+        reader.fieldnames = check_header(reader.fieldnames)
+
+        with self.process_pool() as pool:
+            # Header is line 1, so data rows start at line 2
+            numbered = enumerate(reader, start=2)
+            for batch in _chunks(numbered, self.batch_size):
+                self.import_batch(batch, pool)
+                if self.progress:
+                    self.progress(self.summary)
+        return self.summary
+
+    def process_pool(self):
+        if self.hash_pool is not None:
+            # Hashing goes through the shared pool; no processes to start
+            return nullcontext()
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_hash_worker)
+
+    def import_batch(self, batch, pool):
+        rows = []
+        for line, raw in batch:
+            self.summary['rows'] += 1
+            row = _clean_row(raw)
+            row['username'] = row['username'] or row['student_id']
+            if not row['student_id']:
+                self.error(line, 'missing student_id')
+                continue
+            if len(row['student_id']) > 20:
+                self.error(line, f"student_id '{row['student_id']}' is longer than 20 characters")
+                continue
+            if row['student_id'] in self.seen_student_ids or row['username'] in self.seen_usernames:
+                self.error(line, f"duplicate of an earlier row ({row['student_id']})")
+                continue
+            self.seen_student_ids.add(row['student_id'])
+            self.seen_usernames.add(row['username'])
+            rows.append(row)
+
+        if not rows:
+            return
+
+        # One query each for the whole batch instead of one per row
+        existing_ids = set(StudentProfile.objects.filter(
+            student_id__in=[row['student_id'] for row in rows]
+        ).values_list('student_id', flat=True))
+        taken_usernames = set(User.objects.filter(
+            username__in=[row['username'] for row in rows]
+        ).values_list('username', flat=True))
+
+        new_rows = []
+        for row in rows:
+            if row['student_id'] in existing_ids or row['username'] in taken_usernames:
+                self.summary['skipped_existing'] += 1
+            else:
+                new_rows.append(row)
+        if not new_rows:
+            return
+
+        hashed = self.hash_passwords([row['password'] for row in new_rows], pool)
+
+        users = [
+            User(
+                username=row['username'],
+                email=row['email'],
+                first_name=row['first_name'][:150],
+                last_name=row['last_name'][:150],
+                password=password
+            )
+            for row, password in zip(new_rows, hashed)
+        ]
+        with transaction.atomic():
+            users = User.objects.bulk_create(users)
+            if users and users[0].pk is None:
+                # Backends that cannot return ids from a bulk insert
+                ids = dict(User.objects.filter(
+                    username__in=[user.username for user in users]
+                ).values_list('username', 'id'))
+                for user in users:
+                    user.pk = ids[user.username]
+            StudentProfile.objects.bulk_create([
+                StudentProfile(
+                    user=user,
+                    student_id=row['student_id'],
+                    course=row['course'][:100],
+                    year_level=row['year_level'][:20],
+                )
+                for user, row in zip(users, new_rows)
+            ])
+        self.summary['created'] += len(users)
+
+    def hash_passwords(self, passwords, pool):
+        """Hash the given passwords in the process pool (or hash_pool); blank ones become unusable"""
+        to_hash = [(i, password) for i, password in enumerate(passwords) if password]
+        hashed = [make_password(None) for _ in passwords]
+        if not to_hash:
+            return hashed
+
+        if pool is None:
+            encoded = self.hash_pool.map(make_password, [password for _, password in to_hash], self.workers)
+            for (i, _), value in zip(to_hash, encoded):
+                hashed[i] = value
+            return hashed
+
+        # A few chunks per worker keeps every process busy without tiny tasks
+        chunk = max(1, len(to_hash) // (self.workers * 4))
+        chunks = [to_hash[i:i + chunk] for i in range(0, len(to_hash), chunk)]
+        results = pool.map(_hash_passwords, [[password for _, password in part] for part in chunks])
+        for part, encoded in zip(chunks, results):
+            for (i, _), value in zip(part, encoded):
+                hashed[i] = value
+        return hashed
+
+
+def import_roster(lines, batch_size=1000, workers=None, progress=None, hash_pool=None):
+    return RosterImporter(batch_size=batch_size, workers=workers, progress=progress, hash_pool=hash_pool).run(lines)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_import_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # One import at a time; each already uses several hashing workers
+                _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='roster-import')
+    return _pool
+
+
+def run_import(job_id):
+    """Run a queued RosterImport to completion and delete its file"""
+    job = RosterImport.objects.get(pk=job_id)
+    job.status = 'running'
+    job.save(update_fields=['status'])
+
+    def progress(summary):
+        RosterImport.objects.filter(pk=job.pk).update(summary=dict(summary, errors=list(summary['errors'])))
+
+    try:
+        with open(job.path, newline='', encoding='utf-8-sig') as roster:
+            job.summary = import_roster(
+                roster,
+                workers=settings.ROSTER_IMPORT_HASH_WORKERS,
+                progress=progress,
+                hash_pool=get_hash_pool()
+            )
+        job.status = 'done'
+        print(f"Roster import {job.pk} by {job.created_by.username}: {job.summary['created']} created, "
+              f"{job.summary['skipped_existing']} existing, {job.summary['skipped_invalid']} invalid")
+    except (RosterError, UnicodeDecodeError) as e:
+        job.status = 'failed'
+        job.error = f'Invalid roster file: {str(e)}'
+    except Exception as e:
+        job.status = 'failed'
+        job.error = f'Import failed: {str(e)}'
+        traceback.print_exc()
+    finally:
+        if os.path.exists(job.path):
+            os.remove(job.path)
+    job.finished_at = timezone.now()
+    # The summary so far is kept when the import fails part way
+    fields = ['status', 'error', 'finished_at'] + (['summary'] if job.status == 'done' else [])
+    job.save(update_fields=fields)
+    return job
+
+
+def _import_in_background(job_id):
+    try:
+        run_import(job_id)
+    except Exception as e:
+        print(f"Warning: roster import {job_id} could not run: {e}")
+        traceback.print_exc()
+    finally:
+        # Worker threads keep their own connection; don't leak it
+        connection.close()
+
+
+def schedule_import(job):
+    """Run the import in the background once the current transaction commits"""
+    transaction.on_commit(lambda: get_import_pool().submit(_import_in_background, job.pk))
+
+
+def queue_import(user, upload):
+    """
+    Store an uploaded roster as a RosterImport and schedule it. Raises
+    RosterError (or UnicodeDecodeError) for an unusable header before the job
+    is created.
+    """
+    job = RosterImport(created_by=user, filename=os.path.basename(upload.name or 'roster.csv')[:255])
+    os.makedirs(settings.ROSTER_IMPORT_ROOT, exist_ok=True)
+    with open(job.path, 'wb') as destination:
+        for chunk in upload.chunks():
+            destination.write(chunk)
+    try:
+        with open(job.path, newline='', encoding='utf-8-sig') as roster:
+            check_header(next(csv.reader(roster), None))
+    except (RosterError, UnicodeDecodeError):
+        os.remove(job.path)
+        raise
+    job.save()
+    schedule_import(job)
+    return job
+
+
+def job_state(job):
+    return {
+        'job_id': str(job.id),
+        'filename': job.filename,
+        'status': job.status,
+        'summary': job.summary,
+        'error': job.error,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
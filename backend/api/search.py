@@ -0,0 +1,305 @@
+"""
+Full-text search over students and applications for the admin search box.
+
+The index lives in the database and is kept current by triggers, so every
+write path (views, bulk imports, raw updates) is covered:
+
+- SQLite: FTS5 tables api_student_search (username, name, email, student
+  number, course; rowid = StudentProfile id) and api_application_search
+  (verification notes; rowid = ScholarshipApplication id), with prefix
+  indexes for autocomplete.
+- PostgreSQL: api_student_search(profile_id, document tsvector) with a GIN
+  index, and a GIN expression index on the applications' notes.
+
+The notes indexed are ScholarshipApplication.search_notes: the full notes as
+the admin detail view renders them from the structured verification record,
+plus any stored short notes. save() keeps the column current; the triggers
+only copy it.
+
+On SQLite, Django rebuilds a table (copy, drop, rename) for most schema
+changes, which drops the triggers on it and fails on triggers that refer to
+it. The triggers are therefore removed before a migrate that has work to do
+and recreated afterwards (see apps.py), refilling the index, so migrations
+never see them.
+
+Queries are split into alphanumeric tokens and every token is matched as a
+prefix, so "ali exa" finds alice@example.com. Only the first
+SEARCH_RANK_CANDIDATES matches are ranked: a short, common prefix can match
+most of the table, and scoring every row would cost more than the
+autocomplete can afford.
+"""
+import re
+from django.conf import settings
+from django.db import connections, router
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+MAX_TOKENS = 8
+
+SQLITE_TABLES = {
+    'api_student_search': '''
+        CREATE VIRTUAL TABLE api_student_search USING fts5(
+            username, name, email, student_number, course,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5 6'
+        )''',
+    'api_application_search': '''
+        CREATE VIRTUAL TABLE api_application_search USING fts5(
+            notes, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5 6'
+        )''',
+}
+
+SQLITE_STUDENT_ROW = '''
+    INSERT INTO api_student_search (rowid, username, name, email, student_number, course)
+    SELECT p.id, u.username, u.first_name || ' ' || u.last_name, u.email, p.student_id, p.course
+    FROM api_studentprofile p JOIN auth_user u ON u.id = p.user_id
+'''
+
+SQLITE_TRIGGERS = {
+    'api_student_search_insert': f'''
+        CREATE TRIGGER api_student_search_insert AFTER INSERT ON api_studentprofile BEGIN
+            {SQLITE_STUDENT_ROW} WHERE p.id = NEW.id;
+        END''',
+    'api_student_search_update': f'''
+        CREATE TRIGGER api_student_search_update AFTER UPDATE OF student_id, course, user_id ON api_studentprofile BEGIN
+            DELETE FROM api_student_search WHERE rowid = OLD.id;
+            {SQLITE_STUDENT_ROW} WHERE p.id = NEW.id;
+        END''',
+    'api_student_search_delete': '''
+        CREATE TRIGGER api_student_search_delete AFTER DELETE ON api_studentprofile BEGIN
+            DELETE FROM api_student_search WHERE rowid = OLD.id;
+        END''',
+    # Only the searchable columns: logins update last_login and must not touch the index
+    'api_student_search_user_update': f'''
+        CREATE TRIGGER api_student_search_user_update AFTER UPDATE OF username, first_name, last_name, email ON auth_user
+        WHEN OLD.username IS NOT NEW.username OR OLD.first_name IS NOT NEW.first_name
+             OR OLD.last_name IS NOT NEW.last_name OR OLD.email IS NOT NEW.email
+        BEGIN
+            DELETE FROM api_student_search WHERE rowid IN (SELECT id FROM api_studentprofile WHERE user_id = NEW.id);
+            {SQLITE_STUDENT_ROW} WHERE p.user_id = NEW.id;
+        END''',
+    'api_application_search_insert': '''
+        CREATE TRIGGER api_application_search_insert AFTER INSERT ON api_scholarshipapplication BEGIN
+            INSERT INTO api_application_search (rowid, notes) VALUES (NEW.id, NEW.search_notes);
+        END''',
+    'api_application_search_update': '''
+        CREATE TRIGGER api_application_search_update AFTER UPDATE OF search_notes ON api_scholarshipapplication
+        WHEN OLD.search_notes IS NOT NEW.search_notes
+        BEGIN
+            DELETE FROM api_application_search WHERE rowid = OLD.id;
+            INSERT INTO api_application_search (rowid, notes) VALUES (NEW.id, NEW.search_notes);
+        END''',
+    'api_application_search_delete': '''
+        CREATE TRIGGER api_application_search_delete AFTER DELETE ON api_scholarshipapplication BEGIN
+            DELETE FROM api_application_search WHERE rowid = OLD.id;
+        END''',
+}
+
+POSTGRES_SETUP = [
+    '''CREATE TABLE IF NOT EXISTS api_student_search (
+           profile_id bigint PRIMARY KEY,
+           document tsvector NOT NULL
+       )''',
+    'CREATE INDEX IF NOT EXISTS api_student_search_document ON api_student_search USING GIN (document)',
+    '''CREATE OR REPLACE FUNCTION api_search_text(value text) RETURNS text AS $$
+           SELECT regexp_replace(lower(coalesce(value, '')), '[^[:alnum:]]+', ' ', 'g')
+       $$ LANGUAGE sql IMMUTABLE''',
+    '''CREATE OR REPLACE FUNCTION api_student_search_vector(
+           username text, first_name text, last_name text, email text, student_number text, course text
+       ) RETURNS tsvector AS $$
+           SELECT setweight(to_tsvector('simple', api_search_text(username || ' ' || student_number)), 'A')
+               || setweight(to_tsvector('simple', api_search_text(first_name || ' ' || last_name)), 'A')
+               || setweight(to_tsvector('simple', api_search_text(email)), 'B')
+               || setweight(to_tsvector('simple', api_search_text(course)), 'C')
+       $$ LANGUAGE sql IMMUTABLE''',
+    '''CREATE OR REPLACE FUNCTION api_student_search_sync() RETURNS trigger AS $$
+       BEGIN
+           IF TG_OP = 'DELETE' THEN
+               DELETE FROM api_student_search WHERE profile_id = OLD.id;
+           ELSIF TG_TABLE_NAME = 'auth_user' THEN
+               INSERT INTO api_student_search (profile_id, document)
+               SELECT p.id, api_student_search_vector(NEW.username, NEW.first_name, NEW.last_name, NEW.email,
+                                                      p.student_id, p.course)
+               FROM api_studentprofile p WHERE p.user_id = NEW.id
+               ON CONFLICT (profile_id) DO UPDATE SET document = EXCLUDED.document;
+           ELSE
+               INSERT INTO api_student_search (profile_id, document)
+               SELECT NEW.id, api_student_search_vector(u.username, u.first_name, u.last_name, u.email,
+                                                        NEW.student_id, NEW.course)
+               FROM auth_user u WHERE u.id = NEW.user_id
+               ON CONFLICT (profile_id) DO UPDATE SET document = EXCLUDED.document;
+           END IF;
+           RETURN NULL;
+       END
+       $$ LANGUAGE plpgsql''',
+    'DROP TRIGGER IF EXISTS api_student_search_profile ON api_studentprofile',
+    '''CREATE TRIGGER api_student_search_profile
+       AFTER INSERT OR DELETE OR UPDATE OF student_id, course, user_id ON api_studentprofile
+       FOR EACH ROW EXECUTE FUNCTION api_student_search_sync()''',
+    'DROP TRIGGER IF EXISTS api_student_search_user ON auth_user',
+    '''CREATE TRIGGER api_student_search_user
+       AFTER UPDATE OF username, first_name, last_name, email ON auth_user
+       FOR EACH ROW EXECUTE FUNCTION api_student_search_sync()''',
+]
+
+# Created by migration 0020, once the column exists
+POSTGRES_NOTES_INDEX = '''CREATE INDEX IF NOT EXISTS api_application_notes_search ON api_scholarshipapplication
+       USING GIN (to_tsvector('simple', search_notes))'''
+
+POSTGRES_REFILL = '''
+    INSERT INTO api_student_search (profile_id, document)
+    SELECT p.id, api_student_search_vector(u.username, u.first_name, u.last_name, u.email, p.student_id, p.course)
+    FROM api_studentprofile p JOIN auth_user u ON u.id = p.user_id
+    ON CONFLICT (profile_id) DO UPDATE SET document = EXCLUDED.document
+'''
+
+
+def ensure_search_index(connection, triggers=True):
+    """
+    Create the search tables and triggers that are missing on this database
+    and refill the index if anything had to be created. Returns True when
+    the index was (re)built. triggers=False creates only the SQLite tables.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            existing = {row[0] for row in cursor.fetchall()}
+            missing_tables = [name for name in SQLITE_TABLES if name not in existing]
+            missing_triggers = [name for name in SQLITE_TRIGGERS if triggers and name not in existing]
+            if not missing_tables and not missing_triggers:
+                return False
+            for name in missing_tables:
+                cursor.execute(SQLITE_TABLES[name])
+            for name in missing_triggers:
+                cursor.execute(SQLITE_TRIGGERS[name])
+            if not triggers:
+                return False
+            # Writes made while a trigger was missing aren't in the index; start over
+            cursor.execute('DELETE FROM api_student_search')
+            cursor.execute(SQLITE_STUDENT_ROW)
+            cursor.execute('DELETE FROM api_application_search')
+            cursor.execute('INSERT INTO api_application_search (rowid, notes) '
+                           'SELECT id, search_notes FROM api_scholarshipapplication')
+            return True
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT count(*) FROM pg_trigger WHERE tgname IN "
+                           "('api_student_search_profile', 'api_student_search_user')")
+            if cursor.fetchone()[0] == 2:
+                return False
+            for statement in POSTGRES_SETUP:
+                cursor.execute(statement)
+            cursor.execute(POSTGRES_REFILL)
+            return True
+    return False
+
+
+def drop_search_triggers(connection):
+    """SQLite only; Postgres alters tables in place and keeps its triggers"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def drop_search_index(connection):
+    drop_search_triggers(connection)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in SQLITE_TABLES:
+                cursor.execute(f'DROP TABLE IF EXISTS {name}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP TRIGGER IF EXISTS api_student_search_profile ON api_studentprofile')
+            cursor.execute('DROP TRIGGER IF EXISTS api_student_search_user ON auth_user')
+            cursor.execute('DROP INDEX IF EXISTS api_application_notes_search')
+            cursor.execute('DROP TABLE IF EXISTS api_student_search')
+            cursor.execute('DROP FUNCTION IF EXISTS api_student_search_sync()')
+            cursor.execute('DROP FUNCTION IF EXISTS api_student_search_vector(text, text, text, text, text, text)')
+            cursor.execute('DROP FUNCTION IF EXISTS api_search_text(text)')
+
+
+def query_tokens(text):
+    return [token.lower() for token in TOKEN.findall(text or '')][:MAX_TOKENS]
+
+
+def _sqlite_match(tokens):
+    # Quoted so FTS5 operators in user input are plain text; * makes each a prefix
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _postgres_query(tokens):
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def search_students(text, limit=20, using=None):
+    """StudentProfile ids matching every token as a prefix, best match first"""
+    from .models import StudentProfile
+    tokens = query_tokens(text)
+    if not tokens:
+        return []
+    connection = connections[using or router.db_for_read(StudentProfile)]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                'SELECT id FROM (SELECT rowid AS id, bm25(api_student_search, 10.0, 8.0, 4.0, 10.0, 1.0) AS score '
+                'FROM api_student_search WHERE api_student_search MATCH %s LIMIT %s) ORDER BY score LIMIT %s',
+                [_sqlite_match(tokens), settings.SEARCH_RANK_CANDIDATES, limit]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT profile_id FROM ('
+                "SELECT profile_id, ts_rank(document, query) AS score FROM api_student_search, to_tsquery('simple', %s) query "
+                'WHERE document @@ query LIMIT %s) candidates ORDER BY score DESC LIMIT %s',
+                [_postgres_query(tokens), settings.SEARCH_RANK_CANDIDATES, limit]
+            )
+        else:
+            return []
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_applications(text, limit=20, using=None):
+    """(ScholarshipApplication id, highlighted snippet of the notes) pairs, best match first"""
+    from .models import ScholarshipApplication
+    tokens = query_tokens(text)
+    if not tokens:
+        return []
+    connection = connections[using or router.db_for_read(ScholarshipApplication)]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT id, snippet(api_application_search, 0, '[', ']', '...', 16) FROM api_application_search "
+                'JOIN (SELECT rowid AS id, rank AS score FROM api_application_search '
+                'WHERE api_application_search MATCH %s LIMIT %s) candidates ON candidates.id = api_application_search.rowid '
+                'WHERE api_application_search MATCH %s ORDER BY score LIMIT %s',
+                [_sqlite_match(tokens), settings.SEARCH_RANK_CANDIDATES, _sqlite_match(tokens), limit]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT id, ts_headline('simple', notes, query, 'StartSel=[, StopSel=], MaxWords=16, MinWords=6') FROM ("
+                "SELECT id, search_notes AS notes, query, "
+                "ts_rank(to_tsvector('simple', search_notes), query) AS score "
+                "FROM api_scholarshipapplication, to_tsquery('simple', %s) query "
+                "WHERE to_tsvector('simple', search_notes) @@ query LIMIT %s"
+                ') candidates ORDER BY score DESC LIMIT %s',
+                [_postgres_query(tokens), settings.SEARCH_RANK_CANDIDATES, limit]
+            )
+        else:
+            return []
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _search_index_installed(connection):
+    from django.db.migrations.recorder import MigrationRecorder
+    recorder = MigrationRecorder(connection)
+    return recorder.has_table() and ('api', '0015_search_index') in recorder.applied_migrations()
+
+
+def suspend_search_triggers(using, plan=None, **kwargs):
+    """pre_migrate hook: take the SQLite triggers out of the way of pending migrations"""
+    connection = connections[using]
+    if plan and _search_index_installed(connection):
+        drop_search_triggers(connection)
+
+
+def repair_search_index(using, **kwargs):
+    """post_migrate hook: (re)install missing triggers and refill the index"""
+    connection = connections[using]
+    if _search_index_installed(connection):
+        ensure_search_index(connection)
@@ -1,8 +1,20 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
+from .hashing import verify_credentials
 from .models import StudentProfile, ScholarshipApplication, AIVerificationLog
 
+class DynamicFieldsMixin:
+    """
+    Serialize only some fields: pass fields=[...] (BootstrapView's
+    per-section field selection). Without it every field is included.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True)
@@ -43,7 +55,8 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username and password:
-            user = authenticate(username=username, password=password)
+            # Hashing runs on the bounded pool; may raise HashQueueFull
+            user = verify_credentials(username, password)
             if not user:
                 raise serializers.ValidationError('Invalid credentials')
             if not user.is_active:
@@ -53,12 +66,12 @@ class UserLoginSerializer(serializers.Serializer):
         else:
             raise serializers.ValidationError('Must include username and password')
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = StudentProfile
         fields = '__all__'
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     student_profile = serializers.SerializerMethodField()
     
     class Meta:
@@ -71,14 +84,15 @@ class UserSerializer(serializers.ModelSerializer):
         except StudentProfile.DoesNotExist:
             return None
 
-class ScholarshipApplicationSerializer(serializers.ModelSerializer):
+class ScholarshipApplicationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     grade_document = serializers.FileField(required=False)
     verification_status = serializers.CharField(source='ai_verification_status', read_only=True)
     
     class Meta:
         model = ScholarshipApplication
-        fields = '__all__'
-        read_only_fields = ('student', 'ai_verification_status', 'ai_confidence_score', 'ai_verification_notes', 'total_allowance', 'merit_incentive')
+        # The raw analyzer record is for admins; search_notes is the index copy of the notes (see search.py)
+        exclude = ('ai_verification_result', 'search_notes')
+        read_only_fields = ('student', 'ai_verification_status', 'ai_confidence_score', 'ai_verification_notes', 'grade_document_name', 'document_digest', 'duplicate_document_of', 'duplicate_document_distance', 'total_allowance', 'merit_incentive', 'version', 'claimed_by', 'claim_expires_at')
 
 class AdminScholarshipApplicationSerializer(serializers.ModelSerializer):
     student_username = serializers.SerializerMethodField()
@@ -88,7 +102,7 @@ class AdminScholarshipApplicationSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ScholarshipApplication
-        fields = '__all__'
+        exclude = ('search_notes',)
     
     def get_student_username(self, obj):
         return obj.student.user.username
@@ -100,6 +114,9 @@ class AdminScholarshipApplicationSerializer(serializers.ModelSerializer):
         return obj.student.student_id
 
 class AIVerificationLogSerializer(serializers.ModelSerializer):
+    input = serializers.JSONField(read_only=True)
+    response = serializers.JSONField(read_only=True)
+    
     class Meta:
         model = AIVerificationLog
-        fields = '__all__'
+        fields = ('id', 'application', 'verification_type', 'input', 'response', 'confidence_score', 'created_at')
@@ -0,0 +1,185 @@
+"""
+Approximate distinct-student counts for the admin dashboard.
+
+Every semester keeps a HyperLogLog sketch of the students who applied in it
+(CardinalitySketch). A student id is hashed to 64 bits; the first
+CARDINALITY_SKETCH_PRECISION bits pick one of m registers and the register
+keeps the longest run of leading zeros seen in the remaining bits. The
+harmonic mean of 2**register over all registers estimates the number of
+distinct ids, with a standard error of about 1.04 / sqrt(m) (0.8% at the
+default precision of 14, i.e. 16 KB per semester) however many applications
+the semester has.
+
+Registers only ever grow, so two sketches merge by taking the larger value
+of each register. The count of students with any application is the merge
+of the live semesters' sketches; archiving a semester deletes its sketch, so
+the union follows the hot table without a global row to maintain.
+
+Sketches are built from the table by migration 0018, then updated when an
+application is created (after its transaction commits) and only written when
+a register actually grows, which after the first few hundred students of a
+semester is rare. A semester that has no sketch yet is seeded from all of
+its applications, never from empty registers. Deleted applications
+cannot be taken out of a sketch, so counts may run slightly high until
+`manage.py rebuild_sketches` recomputes them from the applications table.
+"""
+import hashlib
+import math
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from .models import CardinalitySketch, ScholarshipApplication
+
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+
+def register_count():
+    return 1 << settings.CARDINALITY_SKETCH_PRECISION
+
+
+def standard_error():
+    """Relative standard error of an estimate at the configured precision"""
+    return 1.04 / math.sqrt(register_count())
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+
+
+def _position(value):
+    """(register index, rank) that `value` updates"""
+    precision = settings.CARDINALITY_SKETCH_PRECISION
+    hashed = _hash(value)
+    remaining_bits = 64 - precision
+    rest = hashed & ((1 << remaining_bits) - 1)
+    return hashed >> remaining_bits, remaining_bits - rest.bit_length() + 1
+
+
+def empty_registers():
+    return bytearray(register_count())
+
+
+def add(registers, value):
+    """Record `value` in `registers` in place. Returns True when a register grew."""
+    index, rank = _position(value)
+    if registers[index] >= rank:
+        return False
+    registers[index] = rank
+    return True
+
+
+def merge(sketches):
+    """Union of several register arrays"""
+    sketches = list(sketches)
+    if not sketches:
+        return empty_registers()
+    return bytearray(map(max, *sketches)) if len(sketches) > 1 else bytearray(sketches[0])
+
+
+def estimate(registers):
+    """Estimated number of distinct values recorded in `registers`"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / sum(map(_INVERSE_POWERS.__getitem__, registers))
+    zeros = registers.count(0)
+    if raw <= 2.5 * m and zeros:
+        # Linear counting is more accurate while most registers are empty
+        return round(m * math.log(m / zeros))
+    return round(raw)
+
+
+def _is_current(sketch):
+    return len(sketch.registers) == register_count()
+
+
+def build_registers(rows):
+    """{(academic_year, semester): registers} from (academic_year, semester, student_id) rows"""
+    registers = {}
+    for academic_year, semester, student_id in rows:
+        add(registers.setdefault((academic_year, semester), empty_registers()), student_id)
+    return registers
+
+
+def _semester_rows(applications):
+    return applications.order_by().values_list('academic_year', 'semester', 'student_id').distinct()
+
+
+def record_student(academic_year, semester, student_id):
+    """Add one student to a semester's sketch"""
+    index, rank = _position(student_id)
+    sketch = CardinalitySketch.objects.filter(academic_year=academic_year, semester=semester).first()
+    if sketch is not None and _is_current(sketch) and sketch.registers[index] >= rank:
+        return
+
+    with transaction.atomic():
+        sketch = CardinalitySketch.objects.select_for_update().filter(
+            academic_year=academic_year, semester=semester
+        ).first()
+        if sketch is None:
+            # A semester without a sketch may already have applications: start
+            # from all of its students (this one's application has committed)
+            rows = _semester_rows(ScholarshipApplication.objects.filter(academic_year=academic_year, semester=semester))
+            registers = build_registers(rows).get((academic_year, semester), empty_registers())
+            add(registers, student_id)
+            try:
+                with transaction.atomic():
+                    CardinalitySketch.objects.create(
+                        academic_year=academic_year, semester=semester, registers=bytes(registers)
+                    )
+                return
+            except IntegrityError:
+                # Created by a concurrent submission; add to that one instead
+                sketch = CardinalitySketch.objects.select_for_update().get(
+                    academic_year=academic_year, semester=semester
+                )
+        if not _is_current(sketch):
+            # Stored at another precision; rebuild_sketches will fill it in
+            return
+        registers = bytearray(sketch.registers)
+        if add(registers, student_id):
+            sketch.registers = bytes(registers)
+            sketch.save(update_fields=['registers', 'updated_at'])
+
+
+def record_application(application):
+    """Update the application's semester sketch once the creating transaction commits"""
+    transaction.on_commit(lambda: record_student(
+        application.academic_year, application.semester, application.student_id
+    ))
+
+
+def semester_cardinalities():
+    """
+    {(academic_year, semester): registers} for every semester with a sketch at
+    the configured precision
+    """
+    return {
+        (sketch.academic_year, sketch.semester): bytearray(sketch.registers)
+        for sketch in CardinalitySketch.objects.all()
+        if _is_current(sketch)
+    }
+
+
+def rebuild_sketches(academic_year=None, semester=None):
+    """
+    Recompute semester sketches from the applications table and delete the
+    sketches of semesters without applications. Returns the number of
+    sketches written.
+    """
+    applications = ScholarshipApplication.objects.order_by()
+    sketches = CardinalitySketch.objects.all()
+    if academic_year:
+        applications = applications.filter(academic_year=academic_year)
+        sketches = sketches.filter(academic_year=academic_year)
+    if semester:
+        applications = applications.filter(semester=semester)
+        sketches = sketches.filter(semester=semester)
+
+    registers = build_registers(_semester_rows(applications).iterator(chunk_size=5000))
+
+    with transaction.atomic():
+        sketches.delete()
+        CardinalitySketch.objects.bulk_create([
+            CardinalitySketch(academic_year=key[0], semester=key[1], registers=bytes(values))
+            for key, values in registers.items()
+        ])
+    return len(registers)
@@ -0,0 +1,123 @@
+"""
+Content-addressed storage for grade documents.
+
+Uploads are stored once per distinct content, named by their SHA-256 in a
+sharded tree: grade_documents/ab/cd/abcd...<64 hex>.pdf. Saving a file whose
+content is already stored just returns the existing name, so retries and
+duplicate uploads cost no extra disk space or inodes. The original filename
+is kept on ScholarshipApplication.grade_document_name.
+
+A blob's reference count is the number of application (and archived
+application) rows that name it. release_document() deletes a blob once
+nothing references it; gc_documents sweeps anything left over.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import Q
+
+BLOB_NAME = re.compile(r'^(?P<prefix>.*/)?(?P<a>[0-9a-f]{2})/(?P<b>[0-9a-f]{2})/(?P<digest>[0-9a-f]{64})(?P<ext>\.\w+)?$')
+
+
+def blob_digest(name):
+    """The SHA-256 in a content-addressed name, or None for other names"""
+    match = BLOB_NAME.match(name or '')
+    return match.group('digest') if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save, never from the upload
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+
+        # Hash while copying to a temporary file in the same directory tree,
+        # so the final move is an atomic rename
+        digest = hashlib.sha256()
+        handle = tempfile.NamedTemporaryFile(dir=self.path(directory), prefix='.upload-', delete=False)
+        try:
+            with handle:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    handle.write(chunk)
+            hexdigest = digest.hexdigest()
+            blob_name = f'{directory}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}'.lstrip('/')
+            blob_path = self.path(blob_name)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            if os.path.exists(blob_path):
+                # Already stored. Touch it so a concurrent gc_documents run
+                # treats it as recently used until this row is committed.
+                os.utime(blob_path)
+                os.remove(handle.name)
+            else:
+                os.replace(handle.name, blob_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(handle.name):
+                os.remove(handle.name)
+            raise
+        return blob_name
+
+
+_document_storage = None
+
+
+def document_storage():
+    """Storage for ScholarshipApplication.grade_document (a callable keeps it out of migrations)"""
+    global _document_storage
+    if _document_storage is None:
+        _document_storage = ContentAddressedStorage()
+    return _document_storage
+
+
+def reference_count(name):
+    from .models import ArchivedApplication, ScholarshipApplication
+    return (ScholarshipApplication.objects.filter(grade_document=name).count()
+            + ArchivedApplication.objects.filter(grade_document=name).count())
+
+
+def release_document(name, grace=None):
+    """
+    Delete a stored document (and its previews) if no row references it any
+    more and it was not touched within the grace period. Returns True if the
+    blob was deleted.
+    """
+    from .models import ScholarshipApplication
+    from .previews import preview_names
+    if not name or reference_count(name):
+        return False
+
+    storage = document_storage()
+    grace = settings.DOCUMENT_GC_GRACE_SECONDS if grace is None else grace
+    try:
+        if time.time() - os.path.getmtime(storage.path(name)) < grace:
+            return False
+    except FileNotFoundError:
+        return False
+    storage.delete(name)
+
+    digest = blob_digest(name)
+    if digest and not ScholarshipApplication.objects.filter(document_digest=digest).exists():
+        for preview in preview_names(digest):
+            default_storage.delete(preview)
+    return True
+
+
+def referenced_documents():
+    from .models import ArchivedApplication, ScholarshipApplication
+    names = set(ScholarshipApplication.objects.exclude(
+        Q(grade_document='') | Q(grade_document__isnull=True)
+    ).values_list('grade_document', flat=True))
+    names.update(ArchivedApplication.objects.exclude(grade_document='').values_list('grade_document', flat=True))
+    return names
@@ -0,0 +1,109 @@
+"""
+Delta sync for the admin applications list.
+
+A client loads the list once with ?since= (empty) and keeps the returned
+cursor. Each later request with ?since=<cursor> returns only the
+applications whose updated_at/id position is past the cursor (an indexed
+range scan on application_sync_idx) and the ids deleted since, from
+ApplicationTombstone. Cost scales with the number of changes, not with the
+size of the table.
+
+The cursor is opaque to clients: "<updated_at>|<application id>|<tombstone
+id>|<issued at>", base64-encoded. It never moves past rows or tombstones
+younger than SYNC_CURSOR_SKEW, since a transaction that started earlier may
+still commit rows with an older updated_at; those recent rows are sent again
+on the next sync and clients apply changes as idempotent upserts.
+"""
+import base64
+import binascii
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import ApplicationTombstone
+
+
+class SyncCursorError(ValueError):
+    pass
+
+
+class SyncCursorExpired(SyncCursorError):
+    pass
+
+
+class Cursor:
+    __slots__ = ('updated_at', 'application_id', 'tombstone_id', 'issued_at')
+
+    def __init__(self, updated_at, application_id, tombstone_id, issued_at):
+        self.updated_at = updated_at
+        self.application_id = application_id
+        self.tombstone_id = tombstone_id
+        self.issued_at = issued_at
+
+    @property
+    def position(self):
+        return (self.updated_at, self.application_id)
+
+    def encode(self):
+        raw = f'{self.updated_at.isoformat()}|{self.application_id}|{self.tombstone_id}|{self.issued_at.isoformat()}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, value):
+        try:
+            raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+            updated_at, application_id, tombstone_id, issued_at = raw.split('|')
+            return cls(datetime.fromisoformat(updated_at), int(application_id), int(tombstone_id),
+                       datetime.fromisoformat(issued_at))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise SyncCursorError(f'Invalid sync cursor: {value}') from e
+
+
+def changes_since(applications, since, limit=None):
+    """
+    Applications changed and ids deleted after the `since` cursor ('' for
+    everything). Returns (changed applications, deleted ids, next cursor,
+    has_more); with has_more the client asks again with the new cursor.
+    """
+    limit = min(max(limit or settings.SYNC_PAGE_SIZE, 1), settings.SYNC_MAX_PAGE_SIZE)
+    now = timezone.now()
+    settled = now - settings.SYNC_CURSOR_SKEW
+    cursor = Cursor.decode(since) if since else None
+    if cursor and cursor.issued_at < now - settings.SYNC_TOMBSTONE_TTL:
+        # Tombstones this old are purged; the client can't be told about every deletion
+        raise SyncCursorExpired('Sync cursor expired; reload the full list')
+
+    changed = applications
+    if cursor:
+        changed = changed.filter(
+            Q(updated_at__gt=cursor.updated_at) | Q(updated_at=cursor.updated_at, id__gt=cursor.application_id)
+        )
+    rows = list(changed.order_by('updated_at', 'id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if cursor:
+        tombstones = list(ApplicationTombstone.objects.filter(id__gt=cursor.tombstone_id)
+                          .order_by('id').values_list('id', 'application_id', 'deleted_at')[:limit + 1])
+        has_more = has_more or len(tombstones) > limit
+        tombstones = tombstones[:limit]
+        deleted = [application_id for _, application_id, _ in tombstones]
+        tombstone_id = cursor.tombstone_id
+        for id, _, deleted_at in tombstones:
+            if deleted_at > settled:
+                break  # resend this one and everything after it next time
+            tombstone_id = id
+    else:
+        # A full load: everything deleted so far is already absent
+        deleted = []
+        tombstone_id = (ApplicationTombstone.objects.filter(deleted_at__lte=settled)
+                        .order_by('-id').values_list('id', flat=True).first()) or 0
+
+    position = cursor.position if cursor else (datetime.min.replace(tzinfo=now.tzinfo), 0)
+    if rows:
+        last = (rows[-1].updated_at, rows[-1].id)
+        if not has_more and last[0] > settled:
+            last = (settled, 0)
+        position = max(position, last)
+    next_cursor = Cursor(position[0], position[1], tombstone_id, now)
+    return rows, deleted, next_cursor.encode(), has_more
@@ -1,3 +1,258 @@
-from django.test import TestCase
+import contextlib
+import hashlib
+import io
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import AuthToken, ScholarshipApplication, StudentProfile, UploadSession
+from .storage import document_storage
 
-# Create your tests here.
+DOCUMENT = b'%PDF-1.4\n' + b'TCU grade report\n' * 4000
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def quiet():
+    """The views print progress; keep it out of the test output"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def make_student(username, student_id):
+    user = User.objects.create(username=username)
+    StudentProfile.objects.create(user=user, student_id=student_id)
+    client = APIClient()
+    client.force_authenticate(user)
+    return user, client
+
+
+def make_admin(username='admin'):
+    admin = User.objects.create_superuser(username, f'{username}@example.com', 'x')
+    client = APIClient()
+    client.force_authenticate(admin)
+    return admin, client
+
+
+def make_application(username, student_id, **fields):
+    user = User.objects.create(username=username)
+    student = StudentProfile.objects.create(user=user, student_id=student_id)
+    fields.setdefault('academic_year', '2024-2025')
+    fields.setdefault('semester', '1st')
+    return ScholarshipApplication.objects.create(student=student, **fields)
+
+
+class AuthTokenTests(TestCase):
+    def setUp(self):
+        self.user, _ = make_student('student', '2024-0001')
+        self.token = AuthToken.issue(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_valid_token(self):
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+
+    def test_expired_token_is_rejected_and_removed(self):
+        AuthToken.objects.filter(key=self.token.key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+        self.assertFalse(AuthToken.objects.filter(key=self.token.key).exists())
+
+
+@override_settings(SYNC_CURSOR_SKEW=timedelta(0))
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.admin, self.client = make_admin()
+        self.applications = [make_application(f'student{i}', f'2024-{i}') for i in range(5)]
+
+    def sync(self, cursor='', **params):
+        query = '&'.join([f'since={cursor}'] + [f'{key}={value}' for key, value in params.items()])
+        return self.client.get(f'/api/admin/applications/?{query}')
+
+    def test_full_load_is_paged(self):
+        first = self.sync(limit=3).data
+        self.assertEqual(len(first['changed']), 3)
+        self.assertTrue(first['has_more'])
+
+        second = self.sync(first['cursor'], limit=3).data
+        self.assertEqual(len(second['changed']), 2)
+        self.assertFalse(second['has_more'])
+        ids = [row['id'] for row in first['changed'] + second['changed']]
+        self.assertEqual(sorted(ids), sorted(application.id for application in self.applications))
+
+    def test_cursor_returns_only_changes_and_deletions(self):
+        cursor = self.sync().data['cursor']
+        self.assertEqual(self.sync(cursor).data['changed'], [])
+
+        changed, deleted = self.applications[1], self.applications[2]
+        with quiet():
+            self.client.patch(f'/api/admin/applications/{changed.id}/', {'status': 'approved'}, format='json')
+            self.client.delete(f'/api/admin/applications/{deleted.id}/')
+
+        data = self.sync(cursor).data
+        self.assertEqual([row['id'] for row in data['changed']], [changed.id])
+        self.assertEqual(data['deleted'], [deleted.id])
+
+        # The new cursor is past both
+        data = self.sync(data['cursor']).data
+        self.assertEqual((data['changed'], data['deleted']), ([], []))
+
+    def test_negative_limit_is_clamped(self):
+        data = self.sync(limit=-5).data
+        self.assertEqual(len(data['changed']), 1)
+        self.assertTrue(data['has_more'])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.sync('garbage').status_code, 400)
+
+    def test_cursor_older_than_tombstones_is_gone(self):
+        cursor = self.sync().data['cursor']
+        later = timezone.now() + timedelta(days=365)
+        with mock.patch('api.sync.timezone.now', return_value=later):
+            self.assertEqual(self.sync(cursor).status_code, 410)
+
+
+class IdempotentSubmissionTests(TestCase):
+    def setUp(self):
+        self.user, self.client = make_student('student', '2024-0001')
+
+    def submit(self, semester, key):
+        with quiet():
+            return self.client.post('/api/scholarship/apply/', {'academic_year': '2024-2025', 'semester': semester},
+                                    format='multipart', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.submit('1st', 'key-1')
+        retry = self.submit('1st', 'key-1')
+
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(first.json(), retry.json())
+        self.assertEqual(ScholarshipApplication.objects.count(), 1)
+
+    def test_key_reused_with_another_body_is_refused(self):
+        self.submit('1st', 'key-1')
+        self.assertEqual(self.submit('2nd', 'key-1').status_code, 422)
+        self.assertEqual(ScholarshipApplication.objects.count(), 1)
+
+
+class ReviewVersionTests(TestCase):
+    def setUp(self):
+        self.admin, self.client = make_admin()
+        self.application = make_application('student', '2024-0001', ai_verification_status='under_review')
+
+    def review(self, status, version):
+        with quiet():
+            return self.client.patch(f'/api/admin/applications/{self.application.id}/',
+                                     {'status': status, 'version': version}, format='json')
+
+    def test_stale_version_is_a_conflict(self):
+        version = self.application.version
+        response = self.review('approved', version)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['application']['version'], version + 1)
+
+        stale = self.review('rejected', version)
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.data['version'], version + 1)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.ai_verification_status, 'approved')
+
+        self.assertEqual(self.review('rejected', version + 1).status_code, 200)
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media.name, UPLOAD_SESSION_ROOT=os.path.join(self.media.name, 'sessions'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user, self.client = make_student('student', '2024-0001')
+        self.body = b'%PDF-1.4\n' + os.urandom(200000)
+        response = self.client.post('/api/uploads/', {'filename': 'scan.pdf', 'size': len(self.body),
+                                                      'sha256': sha256(self.body)}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.upload_id = response.data['upload_id']
+
+    def put(self, start, end, checksum=None):
+        chunk = self.body[start:end + 1]
+        return self.client.put(f'/api/uploads/{self.upload_id}/', chunk, content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.body)}',
+                               HTTP_X_CHUNK_CHECKSUM=f'sha256={checksum or sha256(chunk)}')
+
+    def test_resume_after_a_bad_chunk(self):
+        self.assertEqual(self.put(0, 99999).data['offset'], 100000)
+
+        bad = self.put(100000, 149999, checksum='0' * 64)
+        self.assertEqual((bad.status_code, bad['Upload-Offset']), (422, '100000'))
+        # A chunk that skips ahead is refused; the client asks where to resume
+        self.assertEqual(self.put(150000, 160000).status_code, 409)
+        self.assertEqual(self.client.get(f'/api/uploads/{self.upload_id}/')['Upload-Offset'], '100000')
+
+        # Resending bytes already stored is fine
+        self.assertEqual(self.put(50000, 149999).data['offset'], 150000)
+
+    def test_finalize_and_submit(self):
+        self.put(0, 99999)
+        self.assertEqual(self.client.post(f'/api/uploads/{self.upload_id}/complete/').status_code, 409)
+
+        self.put(100000, len(self.body) - 1)
+        response = self.client.post(f'/api/uploads/{self.upload_id}/complete/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['sha256'], sha256(self.body))
+
+        with quiet(), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/scholarship/apply/', {'academic_year': '2024-2025', 'semester': '1st',
+                                                                    'upload_id': self.upload_id}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        application = ScholarshipApplication.objects.get()
+        self.assertEqual(application.grade_document_name, 'scan.pdf')
+        with application.grade_document.open('rb') as document:
+            self.assertEqual(document.read(), self.body)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_sessions_are_private(self):
+        other, client = make_student('other', '2024-0002')
+        self.assertEqual(client.get(f'/api/uploads/{self.upload_id}/').status_code, 404)
+
+
+@override_settings(DOCUMENT_GC_GRACE_SECONDS=0)
+class DocumentReleaseTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def submit(self, username, student_id):
+        user, client = make_student(username, student_id)
+        with quiet():
+            response = client.post('/api/scholarship/apply/', {
+                'academic_year': '2024-2025', 'semester': '1st',
+                'grade_document': SimpleUploadedFile('scan.pdf', DOCUMENT, content_type='application/pdf'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        return ScholarshipApplication.objects.get(student__user=user)
+
+    def test_shared_document_is_deleted_with_its_last_application(self):
+        first = self.submit('student1', '2024-0001')
+        second = self.submit('student2', '2024-0002')
+        self.assertEqual(first.grade_document.name, second.grade_document.name)
+        path = document_storage().path(first.grade_document.name)
+
+        admin, client = make_admin()
+        with quiet(), self.captureOnCommitCallbacks(execute=True):
+            client.delete(f'/api/admin/applications/{first.id}/')
+        self.assertTrue(os.path.exists(path))
+
+        with quiet(), self.captureOnCommitCallbacks(execute=True):
+            client.delete(f'/api/admin/applications/{second.id}/')
+        self.assertFalse(os.path.exists(path))
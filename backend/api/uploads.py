@@ -0,0 +1,228 @@
+"""
+Resumable, chunked uploads of grade documents.
+
+A client creates an UploadSession with the file's name and size, then PUTs
+byte ranges (Content-Range: bytes <start>-<end>/<size>) each carrying the
+SHA-256 of its body in X-Chunk-Checksum. Each chunk is received and checked
+in a temporary file first and only appended to the session's .part file once
+it matches; otherwise the session stays where it was. After a dropped connection the client
+asks for the session's offset and sends only the bytes after it. Finally
+the session is completed (checking the whole-file SHA-256 if one was
+declared) and its id is passed as upload_id when submitting the application.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadSession
+
+ALLOWED_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg')
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+SHA256_HEX = re.compile(r'^[0-9a-f]{64}$')
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_checksum(value):
+    """A SHA-256 hex digest from 'sha256=<hex>' or '<hex>'"""
+    value = (value or '').strip().lower()
+    if value.startswith('sha256='):
+        value = value[len('sha256='):]
+    if not SHA256_HEX.match(value):
+        raise UploadError('X-Chunk-Checksum must be the SHA-256 of the chunk as sha256=<64 hex digits>')
+    return value
+
+
+def parse_content_range(value, size):
+    """(start, length) of a chunk from a Content-Range header"""
+    match = CONTENT_RANGE.match((value or '').strip())
+    if not match:
+        raise UploadError('Content-Range must be "bytes <start>-<end>/<size>"')
+    start, end, total = (int(group) for group in match.groups())
+    if total != size:
+        raise UploadError(f'Content-Range size {total} does not match the upload size {size}')
+    if end < start or end >= size:
+        raise UploadError(f'Invalid range {start}-{end} for {size} bytes', status_code=416)
+    length = end - start + 1
+    if length > settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f'Chunks are limited to {settings.UPLOAD_MAX_CHUNK_SIZE} bytes', status_code=413)
+    return start, length
+
+
+def create_session(user, filename, size, sha256=''):
+    filename = os.path.basename(filename or '')[:255]
+    if not filename.lower().endswith(ALLOWED_EXTENSIONS):
+        raise UploadError('Only PDF, JPG and PNG files are allowed')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be the file size in bytes')
+    if not 0 < size <= settings.UPLOAD_MAX_FILE_SIZE:
+        raise UploadError(f'size must be between 1 and {settings.UPLOAD_MAX_FILE_SIZE} bytes', status_code=413)
+    if sha256:
+        sha256 = parse_checksum(sha256)
+
+    session = UploadSession.objects.create(
+        user=user, filename=filename, size=size, sha256=sha256,
+        expires_at=timezone.now() + settings.UPLOAD_SESSION_TTL
+    )
+    os.makedirs(settings.UPLOAD_SESSION_ROOT, exist_ok=True)
+    open(session.path, 'wb').close()
+    return session
+
+
+def get_session(user, upload_id, for_update=False):
+    sessions = UploadSession.objects.select_for_update() if for_update else UploadSession.objects
+    try:
+        session = sessions.filter(id=upload_id, user=user).first()
+    except ValidationError:
+        session = None  # not a UUID
+    if session is None or session.is_expired:
+        raise UploadError('Upload not found', status_code=404)
+    return session
+
+
+def _check_offset(session, start):
+    if session.completed_at:
+        raise UploadError('Upload is already complete', status_code=409)
+    if start > session.received:
+        raise UploadError(f'Chunk starts at {start} but only {session.received} bytes were received',
+                          status_code=409)
+
+
+def _receive_chunk(stream, length, expected, spool):
+    """Copy `length` bytes of `stream` into `spool`, checking them against `expected`"""
+    digest = hashlib.sha256()
+    remaining = length
+    while remaining:
+        data = stream.read(min(READ_SIZE, remaining)) if stream is not None else b''
+        if not data:
+            raise UploadError(f'Chunk ended after {length - remaining} of {length} bytes')
+        digest.update(data)
+        spool.write(data)
+        remaining -= len(data)
+    if digest.hexdigest() != expected:
+        raise UploadError('Chunk checksum mismatch; resend it', status_code=422)
+
+
+def append_chunk(user, upload_id, stream, content_range, checksum):
+    """
+    Verify a chunk and append the part of it past the session's offset.
+    Returns the updated session. Bytes before the offset (a retried chunk
+    that was already stored) are checked but not written again.
+
+    The body is read from the network and verified into a temporary file
+    before any transaction starts: on SQLite an open write transaction
+    blocks every other writer, and a slow client would hold it for the
+    whole upload. Only the local append runs under the session lock.
+    """
+    expected = parse_checksum(checksum)
+    session = get_session(user, upload_id)
+    start, length = parse_content_range(content_range, session.size)
+    _check_offset(session, start)
+
+    os.makedirs(settings.UPLOAD_SESSION_ROOT, exist_ok=True)
+    with tempfile.TemporaryFile(dir=settings.UPLOAD_SESSION_ROOT) as spool:
+        _receive_chunk(stream, length, expected, spool)
+
+        with transaction.atomic():
+            # One writer per session at a time; another request may have
+            # stored these bytes (or completed the upload) meanwhile
+            session = get_session(user, upload_id, for_update=True)
+            _check_offset(session, start)
+            if start + length <= session.received:
+                return session
+
+            # Skip the prefix already on disk from an earlier attempt
+            spool.seek(session.received - start)
+            received = session.received
+            with open(session.path, 'r+b') as part:
+                part.seek(received)
+                try:
+                    shutil.copyfileobj(spool, part, READ_SIZE)
+                    session.chunks.append([start, length, expected])
+                    session.received = start + length
+                    session.save(update_fields=['received', 'chunks'])
+                except BaseException:
+                    part.truncate(received)
+                    raise
+    return session
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_session(user, upload_id):
+    with transaction.atomic():
+        session = get_session(user, upload_id, for_update=True)
+        if session.completed_at:
+            return session
+        if session.received != session.size:
+            raise UploadError(f'Only {session.received} of {session.size} bytes were received', status_code=409)
+        actual = file_sha256(session.path)
+        if session.sha256 and actual != session.sha256:
+            # Every chunk matched, so the client declared the wrong file
+            raise UploadError('File checksum does not match the declared sha256', status_code=422)
+        session.sha256 = actual
+        session.completed_at = timezone.now()
+        session.save(update_fields=['sha256', 'completed_at'])
+    return session
+
+
+def completed_upload(user, upload_id):
+    """The user's completed session for an application submission"""
+    session = get_session(user, upload_id)
+    if not session.completed_at:
+        raise UploadError('Upload is not complete', status_code=409)
+    return session
+
+
+def open_upload(session):
+    """The completed upload as a File named like the student's file"""
+    return File(open(session.path, 'rb'), name=session.filename)
+
+
+def discard_session(session):
+    try:
+        os.remove(session.path)
+    except FileNotFoundError:
+        pass
+    UploadSession.objects.filter(id=session.id).delete()
+
+
+def purge_expired_sessions():
+    """Delete expired sessions and their part files; returns how many"""
+    expired = list(UploadSession.objects.filter(expires_at__lte=timezone.now()))
+    for session in expired:
+        discard_session(session)
+    return len(expired)
+
+
+def session_state(session):
+    return {
+        'upload_id': str(session.id),
+        'filename': session.filename,
+        'size': session.size,
+        'offset': session.received,
+        'chunk_size': settings.UPLOAD_CHUNK_SIZE,
+        'max_chunk_size': settings.UPLOAD_MAX_CHUNK_SIZE,
+        'complete': bool(session.completed_at),
+        'sha256': session.sha256 if session.completed_at else None,
+        'expires_at': session.expires_at,
+    }
@@ -1,23 +1,46 @@
 from django.urls import path
 from .views import (MessageView, RegisterView, LoginView, LogoutView, 
-                   UserProfileView, DashboardView, ScholarshipApplicationView,
-                   AdminDashboardView, AdminApplicationsView, AdminStudentsView,
-                   ChangePasswordView)
+                   UserProfileView, DashboardView, BootstrapView, ScholarshipApplicationView,
+                   AdminDashboardView, AdminApplicationsView, AdminReviewQueueView, AdminStudentsView,
+                   ChangePasswordView, TokenRefreshView, VerifyEmailView, ResendVerificationView,
+                   AdminImportStudentsView, AdminArchivedApplicationsView, AdminSemesterSummaryView,
+                   BatchValidateDocumentsView, DocumentPreviewView, UploadSessionView, UploadCompleteView,
+                   EventStreamTicketView, EventStreamView, AdminEventStreamView, AdminSearchView, AdminAnalyticsView)
 
 urlpatterns = [
     path('messages/', MessageView.as_view(), name='messages'),
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', LoginView.as_view(), name='login'),
     path('auth/logout/', LogoutView.as_view(), name='logout'),
+    path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/verify-email/', VerifyEmailView.as_view(), name='verify_email'),
+    path('auth/verify-email/resend/', ResendVerificationView.as_view(), name='resend_verification'),
     path('auth/profile/', UserProfileView.as_view(), name='profile'),
     path('auth/change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('scholarship/apply/', ScholarshipApplicationView.as_view(), name='scholarship_apply'),
     path('scholarship/applications/', ScholarshipApplicationView.as_view(), name='scholarship_applications'),
+    path('events/', EventStreamView.as_view(), name='events'),
+    path('events/ticket/', EventStreamTicketView.as_view(), name='events_ticket'),
+    path('uploads/', UploadSessionView.as_view(), name='upload_sessions'),
+    path('uploads/<uuid:upload_id>/', UploadSessionView.as_view(), name='upload_session'),
+    path('uploads/<uuid:upload_id>/complete/', UploadCompleteView.as_view(), name='upload_complete'),
+    path('documents/validate/', BatchValidateDocumentsView.as_view(), name='validate_documents'),
+    path('documents/previews/<str:digest>/<str:size>/', DocumentPreviewView.as_view(), name='document_preview'),
     
     # Admin routes
     path('admin/dashboard/', AdminDashboardView.as_view(), name='admin_dashboard'),
+    path('admin/analytics/', AdminAnalyticsView.as_view(), name='admin_analytics'),
+    path('admin/events/', AdminEventStreamView.as_view(), name='admin_events'),
     path('admin/applications/', AdminApplicationsView.as_view(), name='admin_applications'),
     path('admin/applications/<int:application_id>/', AdminApplicationsView.as_view(), name='admin_application_detail'),
+    path('admin/review-queue/', AdminReviewQueueView.as_view(), name='admin_review_queue'),
     path('admin/students/', AdminStudentsView.as_view(), name='admin_students'),
+    path('admin/archive/applications/', AdminArchivedApplicationsView.as_view(), name='admin_archived_applications'),
+    path('admin/archive/applications/<int:archive_id>/', AdminArchivedApplicationsView.as_view(), name='admin_archived_application_detail'),
+    path('admin/archive/semesters/', AdminSemesterSummaryView.as_view(), name='admin_semester_summaries'),
+    path('admin/search/', AdminSearchView.as_view(), name='admin_search'),
+    path('admin/students/import/', AdminImportStudentsView.as_view(), name='admin_import_students'),
+    path('admin/students/import/<uuid:job_id>/', AdminImportStudentsView.as_view(), name='admin_import_students_job'),
 ]
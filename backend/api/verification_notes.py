@@ -0,0 +1,180 @@
+"""
+Human-readable AI verification notes, rendered on demand.
+
+perform_ai_verification stores a small structured record in
+ScholarshipApplication.ai_verification_result instead of ~40 lines of text.
+The notes are rebuilt from that record only when a detail view asks for them
+and memoized in the cache, keyed by application, record version (updated_at)
+and locale, so repeated views of an unchanged application cost nothing.
+"""
+from decimal import Decimal
+from django.core.cache import cache
+
+RESULT_SCHEMA_VERSION = 1
+NOTES_CACHE_TIMEOUT = 60 * 60 * 24
+
+LABELS = {
+    'en': {
+        'title': "🤖 ENHANCED AI DOCUMENT ANALYSIS",
+        'document': "📁 Document: {document}",
+        'no_document': "📁 Document: No document provided",
+        'confidence': "🎯 AI Confidence: {confidence}%",
+        'analysis': "📝 Analysis: {analysis}",
+        'extracted': "📊 EXTRACTED ACADEMIC DATA:",
+        'units': "   📚 Units Enrolled: {units}",
+        'swa': "   📈 SWA (Semestral Weighted Average): {swa}",
+        'period': "   📅 Academic Period: {academic_year} - {semester}",
+        'institution': "   🏫 Institution: Taguig City University",
+        'qualified': "🏆 MERIT INCENTIVE ELIGIBILITY: ✅ QUALIFIED",
+        'all_satisfied': "✅ All TCU requirements satisfied:",
+        'units_ok': "   ✓ Units: {units} ≥ 15 credit units required",
+        'swa_ok': "   ✓ SWA: {swa} ≥ 88.75 required",
+        'inc_line': "   ✓ No INC/Withdrawn/Blank subjects: {verdict}",
+        'failed_line': "   ✓ No Failed/Dropped subjects: {verdict}",
+        'passed': "✅ PASSED",
+        'failed': "❌ FAILED",
+        'congratulations': "🎉 CONGRATULATIONS! Student qualifies for FULL Merit Incentive!",
+        'merit_amount': "💰 P5,000 per semester or P10,000 per year eligible!",
+        'not_qualified': "❌ MERIT INCENTIVE ELIGIBILITY: ❌ NOT QUALIFIED",
+        'not_met': "❗ Requirements not met:",
+        'units_bad': "   ❌ Units: {units} (need ≥15)",
+        'units_good': "   ✅ Units: {units} (≥15 ✓)",
+        'swa_bad': "   ❌ SWA: {swa} (need ≥88.75)",
+        'swa_good': "   ✅ SWA: {swa} (≥88.75 ✓)",
+        'inc_bad': "   ❌ Has INC/Withdrawn/Blank subjects",
+        'inc_good': "   ✅ No INC/Withdrawn/Blank subjects",
+        'failed_bad': "   ❌ Has failed or dropped subjects",
+        'failed_good': "   ✅ No failed/dropped subjects",
+        'base_only': "📚 Student eligible for BASE allowance only.",
+        'financial': "💰 FINANCIAL BREAKDOWN:",
+        'base_allowance': "   💵 Base Allowance: ₱{amount:,.2f}",
+        'merit_incentive': "   🏆 Merit Incentive: ₱{amount:,.2f}",
+        'total_allowance': "   💎 TOTAL ALLOWANCE: ₱{amount:,.2f}",
+        'high_confidence': "🤖 AI RECOMMENDATION: HIGH CONFIDENCE - Ready for admin review",
+        'good_confidence': "🤖 AI RECOMMENDATION: GOOD CONFIDENCE - Recommend admin verification",
+        'manual_review': "🤖 AI RECOMMENDATION: REQUIRES MANUAL REVIEW - Document quality concerns",
+    },
+}
+DEFAULT_LOCALE = 'en'
+
+
+def build_verification_record(application, confidence, analysis, is_eligible_for_merit):
+    """The structured result stored on the application after verification"""
+    return {
+        'version': RESULT_SCHEMA_VERSION,
+        'document': application.document_display_name or None,
+        'confidence': str(confidence),
+        'analysis': analysis,
+        'extracted': {
+            'units_enrolled': application.units_enrolled,
+            'swa_grade': str(application.swa_grade) if application.swa_grade is not None else None,
+            'has_inc_withdrawn': application.has_inc_withdrawn,
+            'has_failed_dropped': application.has_failed_dropped,
+        },
+        'checks': {
+            'units': bool(application.units_enrolled and application.units_enrolled >= 15),
+            'swa': bool(application.swa_grade and application.swa_grade >= Decimal('88.75')),
+            'no_inc_withdrawn': not application.has_inc_withdrawn,
+            'no_failed_dropped': not application.has_failed_dropped,
+        },
+        'eligible_for_merit': is_eligible_for_merit,
+        'amounts': {
+            'base_allowance': str(application.base_allowance),
+            'merit_incentive': str(application.merit_incentive),
+            'total_allowance': str(application.total_allowance),
+        },
+    }
+
+
+def _render(record, academic_year, semester, labels):
+    extracted = record['extracted']
+    checks = record['checks']
+    units = extracted['units_enrolled']
+    swa = extracted['swa_grade']
+    confidence = Decimal(record['confidence'])
+
+    notes = [labels['title'], "=" * 50]
+    if record['document']:
+        notes.append(labels['document'].format(document=record['document']))
+        notes.append(labels['confidence'].format(confidence=record['confidence']))
+        notes.append(labels['analysis'].format(analysis=record['analysis']))
+    else:
+        notes.append(labels['no_document'])
+        notes.append(labels['confidence'].format(confidence=record['confidence']))
+    notes.append("")
+
+    notes.append(labels['extracted'])
+    notes.append(labels['units'].format(units=units))
+    notes.append(labels['swa'].format(swa=swa))
+    notes.append(labels['period'].format(academic_year=academic_year, semester=semester))
+    notes.append(labels['institution'])
+    notes.append("")
+
+    if record['eligible_for_merit']:
+        notes.append(labels['qualified'])
+        notes.append(labels['all_satisfied'])
+        notes.append(labels['units_ok'].format(units=units))
+        notes.append(labels['swa_ok'].format(swa=swa))
+        notes.append(labels['inc_line'].format(
+            verdict=labels['passed'] if checks['no_inc_withdrawn'] else labels['failed']))
+        notes.append(labels['failed_line'].format(
+            verdict=labels['passed'] if checks['no_failed_dropped'] else labels['failed']))
+        notes.append("")
+        notes.append(labels['congratulations'])
+        notes.append(labels['merit_amount'])
+    else:
+        notes.append(labels['not_qualified'])
+        notes.append(labels['not_met'])
+        notes.append(labels['units_good' if checks['units'] else 'units_bad'].format(units=units or 0))
+        notes.append(labels['swa_good' if checks['swa'] else 'swa_bad'].format(swa=swa or 'N/A'))
+        notes.append(labels['inc_good' if checks['no_inc_withdrawn'] else 'inc_bad'])
+        notes.append(labels['failed_good' if checks['no_failed_dropped'] else 'failed_bad'])
+        notes.append("")
+        notes.append(labels['base_only'])
+
+    amounts = record['amounts']
+    notes.append("")
+    notes.append(labels['financial'])
+    notes.append(labels['base_allowance'].format(amount=Decimal(amounts['base_allowance'])))
+    notes.append(labels['merit_incentive'].format(amount=Decimal(amounts['merit_incentive'])))
+    notes.append(labels['total_allowance'].format(amount=Decimal(amounts['total_allowance'])))
+    notes.append("")
+
+    if confidence >= 90:
+        notes.append(labels['high_confidence'])
+    elif confidence >= 75:
+        notes.append(labels['good_confidence'])
+    else:
+        notes.append(labels['manual_review'])
+
+    return '\n'.join(notes)
+
+
+def render_verification_notes(application, locale=DEFAULT_LOCALE, memoize=True):
+    """
+    Full notes for one application: the rendered AI analysis followed by any
+    stored short notes (validation errors, admin notes). Applications verified
+    before structured results existed just return their stored text.
+
+    Pass memoize=False for one-off bulk rendering (archiving) that would only
+    churn the cache.
+    """
+    record = application.ai_verification_result
+    if not record:
+        return application.ai_verification_notes or ''
+
+    labels = LABELS.get(locale, LABELS[DEFAULT_LOCALE])
+    if not memoize:
+        rendered = _render(record, application.academic_year, application.semester, labels)
+        extra = (application.ai_verification_notes or '').strip()
+        return f"{rendered}\n\n{extra}" if extra else rendered
+
+    key = (f"verification-notes:{application.pk}:{record.get('version')}:"
+           f"{application.updated_at.timestamp() if application.updated_at else 0}:{locale}")
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = _render(record, application.academic_year, application.semester, labels)
+        cache.set(key, rendered, NOTES_CACHE_TIMEOUT)
+
+    extra = (application.ai_verification_notes or '').strip()
+    return f"{rendered}\n\n{extra}" if extra else rendered
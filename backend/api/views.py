@@ -2,20 +2,51 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.authtoken.models import Token
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.renderers import JSONRenderer
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from .models import Message, StudentProfile, ScholarshipApplication, AIVerificationLog
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from .models import (Message, StudentProfile, ScholarshipApplication, AIVerificationLog, AuthToken,
+                     EmailVerification, ArchivedApplication, SemesterSummary, ApplicationTombstone, RosterImport)
+from .hashing import HashQueueFull, LoginRateLimiter, set_password, verify_password
+from .db_routers import pin_to_primary, primary_reads, replica_reads
+from .roster import RosterError, job_state, queue_import
+from .email_utils import queue_verification_email, verify_email_code
+from .verification_notes import build_verification_record, render_verification_notes
+from .analysis import get_analyzer
+from .batch_validation import BatchLimitExceeded, iter_zip_documents, read_limited, validate_documents
+from .previews import PREVIEW_CONTENT_TYPE, preview_name, schedule_previews
+from .storage import release_document
+from .idempotency import idempotent
+from .events import EventStreamRenderer, event_stream, publish_application_deleted
+from .authentication import ExpiringTokenAuthentication, StreamTicketAuthentication, issue_stream_ticket
+from .sync import SyncCursorExpired, changes_since
+from .search import search_applications, search_students
+from .analytics import analytics_available, dashboard_analytics
+from .bootstrap import (ADMIN_REDIRECT, DASHBOARD_SECTIONS, RECENT_APPLICATIONS, application_statistics,
+                        student_dashboard)
+from .review_queue import ReviewConflict, active_claims, claim_applications, lock_version, release_claims
+from .sketches import estimate, merge, semester_cardinalities, standard_error
+from .uploads import (UploadError, append_chunk, complete_session, completed_upload, create_session,
+                      discard_session, get_session, open_upload, session_state)
 from .serializers import (UserRegistrationSerializer, UserLoginSerializer, UserSerializer, 
                          ScholarshipApplicationSerializer, StudentProfileSerializer,
                          AdminScholarshipApplicationSerializer)
+import io
+import itertools
 import json
-import random
+import re
 import traceback
+import zipfile
 from decimal import Decimal
 
 class MessageView(APIView):
@@ -32,10 +63,14 @@ class RegisterView(APIView):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
+            token = AuthToken.issue(user)
+            # Only queues the code; the send_verification_emails worker delivers it
+            if user.email:
+                queue_verification_email(user.email)
             return Response({
                 'user': UserSerializer(user).data,
                 'token': token.key,
+                'expires_at': token.expires_at,
                 'message': 'User registered successfully'
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -44,16 +79,31 @@ class LoginView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request):
+        limiter = LoginRateLimiter(str(request.data.get('username', '')), request.META.get('REMOTE_ADDR', ''))
+        if limiter.is_blocked():
+            return Response({'error': 'Too many failed login attempts. Please try again in a few minutes.'},
+                          status=status.HTTP_429_TOO_MANY_REQUESTS,
+                          headers={'Retry-After': str(settings.LOGIN_RATE_WINDOW)})
+        
         serializer = UserLoginSerializer(data=request.data)
-        if serializer.is_valid():
+        try:
+            is_valid = serializer.is_valid()
+        except HashQueueFull:
+            return Response({'error': 'Server is busy. Please try again shortly.'},
+                          status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'})
+        
+        if is_valid:
             user = serializer.validated_data['user']
+            limiter.reset_username()
             login(request, user)
-            token, created = Token.objects.get_or_create(user=user)
+            token = AuthToken.issue(user)
             return Response({
                 'user': UserSerializer(user).data,
                 'token': token.key,
+                'expires_at': token.expires_at,
                 'message': 'Login successful'
             }, status=status.HTTP_200_OK)
+        limiter.record_failure()
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LogoutView(APIView):
@@ -61,7 +111,10 @@ class LogoutView(APIView):
     
     def post(self, request):
         try:
-            request.user.auth_token.delete()
+            # Only revoke the token used for this request so other devices stay signed in
+            if isinstance(request.auth, AuthToken):
+                request.auth.delete()
+            # logout() flushes the session row instead of leaving it until it expires
             logout(request)
             return Response({
                 'message': 'Logout successful'
@@ -71,6 +124,59 @@ class LogoutView(APIView):
                 'error': 'Error during logout'
             }, status=status.HTTP_400_BAD_REQUEST)
 
+class TokenRefreshView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """Rotate the current token: issue a new key and revoke the old one"""
+        if not isinstance(request.auth, AuthToken):
+            return Response({'error': 'Token authentication required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        new_token = AuthToken.issue(request.user)
+        request.auth.delete()
+        return Response({
+            'token': new_token.key,
+            'expires_at': new_token.expires_at,
+            'message': 'Token refreshed'
+        }, status=status.HTTP_200_OK)
+
+class VerifyEmailView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """Confirm the logged in user's email with the code that was mailed to them"""
+        code = str(request.data.get('code', '')).strip()
+        if not code:
+            return Response({'error': 'Verification code is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not verify_email_code(request.user.email, code):
+            return Response({'error': 'Invalid or expired verification code'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'message': 'Email verified successfully'}, status=status.HTTP_200_OK)
+
+class ResendVerificationView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """Queue a new verification code for the logged in user's email"""
+        user = request.user
+        if not user.email:
+            return Response({'error': 'No email address on this account'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if StudentProfile.objects.filter(user=user, email_verified=True).exists():
+            return Response({'message': 'Email is already verified'}, status=status.HTTP_200_OK)
+        
+        recently_queued = EmailVerification.objects.filter(
+            email=user.email,
+            created_at__gt=timezone.now() - settings.EMAIL_RESEND_COOLDOWN
+        ).exists()
+        if recently_queued:
+            return Response({'error': 'A code was sent recently. Please wait a minute before requesting another.'},
+                          status=status.HTTP_429_TOO_MANY_REQUESTS)
+        
+        queue_verification_email(user.email)
+        return Response({'message': 'Verification code sent'}, status=status.HTTP_202_ACCEPTED)
+
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -149,8 +255,8 @@ class ChangePasswordView(APIView):
                 return Response({'error': 'All password fields are required'}, 
                               status=status.HTTP_400_BAD_REQUEST)
             
-            # Check current password
-            if not user.check_password(current_password):
+            # Check current password (hashed on the bounded pool, not this thread)
+            if not verify_password(user, current_password):
                 return Response({'error': 'Current password is incorrect'}, 
                               status=status.HTTP_400_BAD_REQUEST)
             
@@ -165,11 +271,14 @@ class ChangePasswordView(APIView):
                               status=status.HTTP_400_BAD_REQUEST)
             
             # Change password
-            user.set_password(new_password)
+            set_password(user, new_password)
             user.save()
             
             return Response({'message': 'Password changed successfully'})
             
+        except HashQueueFull:
+            return Response({'error': 'Server is busy. Please try again shortly.'},
+                          status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'})
         except Exception as e:
             return Response({'error': f'Failed to change password: {str(e)}'}, 
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -180,59 +289,101 @@ class DashboardView(APIView):
     def get(self, request):
         # Check if user is admin - redirect them to admin dashboard
         if request.user.is_superuser:
-            return Response({
-                'redirect_to_admin': True,
-                'message': 'Admin users should use the admin dashboard'
-            }, status=status.HTTP_200_OK)
+            return Response(ADMIN_REDIRECT, status=status.HTTP_200_OK)
             
         try:
             student_profile = request.user.studentprofile
         except StudentProfile.DoesNotExist:
             return Response({'error': 'Student profile not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Get recent applications for display (limited)
-        recent_applications = ScholarshipApplication.objects.filter(student=student_profile).order_by('-created_at')[:5]
+        applications = ScholarshipApplication.objects.filter(student=student_profile).order_by('-created_at')
+        return Response(student_dashboard(student_profile, applications))
+
+
+class BootstrapView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    SECTIONS = ('profile', 'dashboard', 'applications')
+    
+    def get(self, request):
+        """
+        auth/profile/, dashboard/ and a page of scholarship/applications/ in one
+        response (?sections=, ?profile_fields=, ?dashboard_fields=,
+        ?applications_fields=, ?limit=, ?offset=)
+        """
+        sections = self.parse_list(request, 'sections') or self.SECTIONS
+        selections = {
+            'sections': (sections, self.SECTIONS),
+            'profile_fields': (self.parse_list(request, 'profile_fields'), UserSerializer().fields),
+            'dashboard_fields': (self.parse_list(request, 'dashboard_fields'), DASHBOARD_SECTIONS),
+            'applications_fields': (self.parse_list(request, 'applications_fields'), ScholarshipApplicationSerializer().fields),
+        }
+        for param, (selected, allowed) in selections.items():
+            unknown = [name for name in selected or () if name not in allowed]
+            if unknown:
+                return Response({'error': f'Unknown {param}: {", ".join(unknown)}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get ALL applications for statistics (not limited)
-        all_applications = ScholarshipApplication.objects.filter(student=student_profile)
+        try:
+            limit = min(max(int(request.GET.get('limit', settings.BOOTSTRAP_PAGE_SIZE)), 1), settings.BOOTSTRAP_MAX_PAGE_SIZE)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'error': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate statistics from ALL applications
-        total_applications = all_applications.count()
-        approved_applications = all_applications.filter(ai_verification_status='approved').count()
-        pending_applications = all_applications.filter(ai_verification_status__in=['pending', 'under_review']).count()
-        rejected_applications = all_applications.filter(ai_verification_status='rejected').count()
-        total_allowance_received = sum([app.total_allowance for app in all_applications.filter(ai_verification_status='approved')])
+        bootstrap_data = {}
+        if 'profile' in sections:
+            # Loads request.user.studentprofile once for every section
+            bootstrap_data['profile'] = UserSerializer(request.user, fields=selections['profile_fields'][0]).data
+        if 'dashboard' not in sections and 'applications' not in sections:
+            return Response(bootstrap_data)
         
-        dashboard_data = {
-            'student_info': StudentProfileSerializer(student_profile).data,
-            'recent_applications': ScholarshipApplicationSerializer(recent_applications, many=True).data,
-            'statistics': {
-                'total_applications': total_applications,
-                'approved_applications': approved_applications,
-                'pending_applications': pending_applications,
-                'rejected_applications': rejected_applications,
-                'total_allowance_received': float(total_allowance_received),
-                'monthly_base_allowance': 5000.00,
-                'merit_incentive_available': 5000.00,
-            },
-            'eligibility_requirements': {
-                'base_allowance': 'All TCU students receive ₱5,000 monthly',
-                'merit_incentive_requirements': [
-                    'Must be taking at least 15 units',
-                    'SWA of 88.75 or 1.75 or better',
-                    'Not a first time applicant',
-                    'No INC, withdrew, failed, or dropped subjects in previous semester'
-                ]
+        if request.user.is_superuser:
+            if 'dashboard' in sections:
+                bootstrap_data['dashboard'] = ADMIN_REDIRECT
+            if 'applications' in sections:
+                bootstrap_data['applications'] = None
+            return Response(bootstrap_data)
+        
+        try:
+            student_profile = request.user.studentprofile
+        except StudentProfile.DoesNotExist:
+            return Response({'error': 'Student profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # One queryset for both sections; the page doubles as the recent applications
+        applications = ScholarshipApplication.objects.filter(student=student_profile).order_by('-created_at')
+        dashboard_sections = selections['dashboard_fields'][0] or DASHBOARD_SECTIONS
+        statistics = None
+        if 'applications' in sections or ('dashboard' in sections and 'statistics' in dashboard_sections):
+            statistics = application_statistics(applications)
+        page = None
+        if 'applications' in sections:
+            page = list(applications[offset:offset + limit])
+            bootstrap_data['applications'] = {
+                'count': statistics['total_applications'],
+                'results': ScholarshipApplicationSerializer(
+                    page, many=True, fields=selections['applications_fields'][0]
+                ).data
             }
-        }
+        if 'dashboard' in sections:
+            recent = page[:RECENT_APPLICATIONS] if page is not None and offset == 0 and limit >= RECENT_APPLICATIONS else None
+            bootstrap_data['dashboard'] = student_dashboard(
+                student_profile, applications, recent=recent,
+                sections=dashboard_sections, statistics=statistics
+            )
         
-        return Response(dashboard_data)
+        return Response(bootstrap_data)
+    
+    def parse_list(self, request, name):
+        """A comma-separated query parameter as a list, or None when absent"""
+        if name not in request.GET:
+            return None
+        return [item.strip() for item in request.GET[name].split(',') if item.strip()]
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ScholarshipApplicationView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
     
+    @idempotent
     def post(self, request):
         try:
             student_profile = request.user.studentprofile
@@ -245,9 +396,47 @@ class ScholarshipApplicationView(APIView):
         
         serializer = ScholarshipApplicationSerializer(data=request.data)
         if serializer.is_valid():
+            # One application per semester: a resubmission gets the existing one back
+            # without running verification again
+            existing = self.existing_application(student_profile, serializer.validated_data)
+            if existing:
+                return self.existing_application_response(existing)
+            
+            # A document sent earlier through a resumable upload session
+            upload_session = None
+            if request.data.get('upload_id'):
+                if request.FILES.get('grade_document'):
+                    return Response({'error': 'Send either grade_document or upload_id, not both'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    upload_session = completed_upload(request.user, request.data['upload_id'])
+                except UploadError as e:
+                    return Response({'error': str(e)}, status=e.status_code)
+            
             try:
                 # Create application with initial data (AI fields will be None initially)
-                application = serializer.save(student=student_profile)
+                upload = open_upload(upload_session) if upload_session else request.FILES.get('grade_document')
+                try:
+                    with transaction.atomic():
+                        application = serializer.save(
+                            student=student_profile,
+                            # Stored under its content hash; keep the name the student gave it
+                            grade_document_name=upload.name[:255] if upload else '',
+                            **({'grade_document': upload} if upload_session else {})
+                        )
+                except IntegrityError:
+                    # A concurrent submission for the same semester won the insert.
+                    # The stored document is shared or left for gc_documents.
+                    existing = self.existing_application(student_profile, serializer.validated_data)
+                    if existing:
+                        return self.existing_application_response(existing)
+                    raise
+                finally:
+                    if upload_session:
+                        upload.close()
+                if upload_session:
+                    # The document is in storage now; the session's part file is no longer needed
+                    transaction.on_commit(lambda: discard_session(upload_session))
                 print(f"Application created with ID: {application.id}")
                 
                 # Perform AI verification which will update the application with extracted data
@@ -258,16 +447,17 @@ class ScholarshipApplicationView(APIView):
                 application.ai_verification_status = ai_result['status']
                 application.ai_confidence_score = ai_result['confidence']
                 application.ai_verification_notes = ai_result['notes']
+                application.ai_verification_result = ai_result.get('record', {})
                 # The AI verification already updated units, SWA, etc. and saved the application
                 # Just need to save the AI status fields
                 application.save()
                 
                 # Log AI verification
                 try:
-                    AIVerificationLog.objects.create(
+                    AIVerificationLog.record(
                         application=application,
                         verification_type='grade_verification',
-                        input_data=json.dumps({
+                        input_data={
                             'academic_year': application.academic_year,
                             'semester': application.semester,
                             'units': application.units_enrolled,
@@ -276,13 +466,18 @@ class ScholarshipApplicationView(APIView):
                             'has_failed': application.has_failed_dropped,
                             'is_first_time': student_profile.is_first_time_applicant,
                             'document_uploaded': bool(application.grade_document)
-                        }),
-                        ai_response=json.dumps(ai_result),
+                        },
+                        # The structured result is already stored on the application; don't duplicate it
+                        response={key: value for key, value in ai_result.items() if key not in ('notes', 'record')},
                         confidence_score=ai_result['confidence']
                     )
                 except Exception as log_error:
                     print(f"Warning: Failed to create AI verification log: {log_error}")
                 
+                # Thumbnails for admin review are rendered after the response
+                if application.grade_document:
+                    schedule_previews(application)
+                
                 return Response({
                     'application': ScholarshipApplicationSerializer(application).data,
                     'ai_verification': ai_result,
@@ -309,6 +504,22 @@ class ScholarshipApplicationView(APIView):
         print(f"Serializer errors: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    def existing_application(self, student_profile, data):
+        return ScholarshipApplication.objects.filter(
+            student=student_profile, academic_year=data['academic_year'], semester=data['semester']
+        ).first()
+    
+    def existing_application_response(self, application):
+        return Response({
+            'application': ScholarshipApplicationSerializer(application).data,
+            'ai_verification': {
+                'status': application.ai_verification_status,
+                'confidence': application.ai_confidence_score,
+            },
+            'message': f'You already applied for {application.semester} {application.academic_year}. '
+                       'Your existing application was not changed.'
+        }, status=status.HTTP_200_OK)
+    
     def get(self, request):
         try:
             student_profile = request.user.studentprofile
@@ -336,7 +547,9 @@ class ScholarshipApplicationView(APIView):
                 
                 try:
                     # Enhanced document analysis with strict validation
-                    extracted_data = self.simulate_document_analysis(application.grade_document)
+                    extracted_data = self.simulate_document_analysis(
+                        application.grade_document, filename=application.analysis_filename
+                    )
                     
                     # Update application with extracted data
                     application.units_enrolled = extracted_data['units_enrolled']
@@ -406,83 +619,9 @@ class ScholarshipApplicationView(APIView):
             
             print(f"Final allowances: Base=₱{application.base_allowance}, Merit=₱{application.merit_incentive}, Total=₱{application.total_allowance}")
             
-            # Generate detailed verification notes using already extracted data
-            notes = []
-            notes.append("🤖 ENHANCED AI DOCUMENT ANALYSIS")
-            notes.append("=" * 50)
-            if application.grade_document:
-                notes.append(f"📁 Document: {application.grade_document.name}")
-                notes.append(f"🎯 AI Confidence: {confidence}%")
-                notes.append(f"📝 Analysis: {analysis_notes}")
-            else:
-                notes.append("📁 Document: No document provided")
-                notes.append(f"🎯 AI Confidence: {confidence}%")
-            notes.append("")
-            
-            notes.append("� EXTRACTED ACADEMIC DATA:")
-            notes.append(f"   📚 Units Enrolled: {application.units_enrolled}")
-            notes.append(f"   📈 SWA (Semestral Weighted Average): {application.swa_grade}")
-            notes.append(f"   📅 Academic Period: {application.academic_year} - {application.semester}")
-            notes.append(f"   🏫 Institution: Taguig City University")
-            notes.append("")
-            
-            # Merit eligibility analysis (Official TCU Requirements)
-            if is_eligible_for_merit:
-                notes.append("🏆 MERIT INCENTIVE ELIGIBILITY: ✅ QUALIFIED")
-                notes.append("✅ All TCU requirements satisfied:")
-                notes.append(f"   ✓ Units: {application.units_enrolled} ≥ 15 credit units required")
-                notes.append(f"   ✓ SWA: {application.swa_grade} ≥ 88.75 required") 
-                notes.append(f"   ✓ No INC/Withdrawn/Blank subjects: {'❌ FAILED' if application.has_inc_withdrawn else '✅ PASSED'}")
-                notes.append(f"   ✓ No Failed/Dropped subjects: {'❌ FAILED' if application.has_failed_dropped else '✅ PASSED'}")
-                notes.append("")
-                notes.append("🎉 CONGRATULATIONS! Student qualifies for FULL Merit Incentive!")
-                notes.append("💰 P5,000 per semester or P10,000 per year eligible!")
-                
-            else:
-                notes.append("❌ MERIT INCENTIVE ELIGIBILITY: ❌ NOT QUALIFIED")
-                notes.append("❗ Requirements not met:")
-                
-                requirements_check = []
-                if not application.units_enrolled or application.units_enrolled < 15:
-                    requirements_check.append(f"❌ Units: {application.units_enrolled or 0} (need ≥15)")
-                else:
-                    requirements_check.append(f"✅ Units: {application.units_enrolled} (≥15 ✓)")
-                    
-                if not application.swa_grade or application.swa_grade < Decimal('88.75'):
-                    requirements_check.append(f"❌ SWA: {application.swa_grade or 'N/A'} (need ≥88.75)")
-                else:
-                    requirements_check.append(f"✅ SWA: {application.swa_grade} (≥88.75 ✓)")
-                    
-                if application.has_inc_withdrawn:
-                    requirements_check.append("❌ Has INC/Withdrawn/Blank subjects")
-                else:
-                    requirements_check.append("✅ No INC/Withdrawn/Blank subjects")
-                    
-                if application.has_failed_dropped:
-                    requirements_check.append("❌ Has failed or dropped subjects")
-                else:
-                    requirements_check.append("✅ No failed/dropped subjects")
-                
-                for check in requirements_check:
-                    notes.append(f"   {check}")
-                    
-                notes.append("")
-                notes.append("📚 Student eligible for BASE allowance only.")
-            
-            notes.append("")
-            notes.append("💰 FINANCIAL BREAKDOWN:")
-            notes.append(f"   💵 Base Allowance: ₱{application.base_allowance:,.2f}")
-            notes.append(f"   🏆 Merit Incentive: ₱{application.merit_incentive:,.2f}")
-            notes.append(f"   💎 TOTAL ALLOWANCE: ₱{application.total_allowance:,.2f}")
-            notes.append("")
-            
-            # AI recommendation
-            if confidence >= 90:
-                notes.append("🤖 AI RECOMMENDATION: HIGH CONFIDENCE - Ready for admin review")
-            elif confidence >= 75:
-                notes.append("🤖 AI RECOMMENDATION: GOOD CONFIDENCE - Recommend admin verification")
-            else:
-                notes.append("🤖 AI RECOMMENDATION: REQUIRES MANUAL REVIEW - Document quality concerns")
+            # Store a compact structured result; the full notes are rendered on demand
+            # by the admin detail view (see api/verification_notes.py)
+            record = build_verification_record(application, confidence, analysis_notes, is_eligible_for_merit)
             
             # Determine status - Always set to 'under_review' for admin approval
             verification_status = 'under_review'  # Admin must approve all applications
@@ -490,8 +629,9 @@ class ScholarshipApplicationView(APIView):
             result = {
                 'status': verification_status,
                 'confidence': confidence,
-                'notes': '\n'.join(notes),
-                'eligible_for_merit': is_eligible_for_merit
+                'notes': '',
+                'eligible_for_merit': is_eligible_for_merit,
+                'record': record
             }
             
             print(f"AI verification completed: {result}")
@@ -509,439 +649,174 @@ class ScholarshipApplicationView(APIView):
                 'eligible_for_merit': False
             }
     
-    def validate_grade_document(self, document):
-        """
-        Advanced validation to determine if uploaded document is actually a grade document
-        Uses multiple validation techniques to prevent random image acceptance
-        """
-        import os
-        
-        try:
-            validation_score = 0
-            reasons = []
-            
-            # 1. File extension validation (basic)
-            file_extension = document.name.lower().split('.')[-1]
-            if file_extension in ['pdf', 'png', 'jpg', 'jpeg']:
-                validation_score += 20
-                reasons.append(f"Valid file extension: {file_extension}")
-            else:
-                return {
-                    'is_valid': False,
-                    'confidence': 0,
-                    'reason': f"Invalid file extension: {file_extension}. Only PDF, PNG, JPG files are allowed for grade documents."
-                }
-            
-            # 2. File size validation - grade documents should have reasonable size
-            if document.size < 50000:  # Increased from 10KB to 50KB - grade documents are typically larger
-                return {
-                    'is_valid': False,
-                    'confidence': 0,
-                    'reason': f"File too small ({document.size} bytes). Grade documents are typically larger than 50KB. This appears to be a low-quality image or icon, not a grade document."
-                }
-            elif document.size > 10000000:  # More than 10MB is suspiciously large
-                return {
-                    'is_valid': False,
-                    'confidence': 0,
-                    'reason': f"File too large ({document.size} bytes). Grade documents should be under 10MB."
-                }
-            else:
-                validation_score += 15
-                reasons.append(f"Appropriate file size: {document.size} bytes")
-            
-            # 3. Filename pattern analysis - look for grade-related keywords
-            filename_lower = document.name.lower()
-            grade_keywords = [
-                'grade', 'grades', 'gwa', 'swa', 'transcript', 'record', 'academic',
-                'semester', 'semestral', 'report', 'card', 'tcu', 'university',
-                'student', 'result', 'evaluation', 'assessment', 'final', 'midterm'
-            ]
-            
-            keyword_matches = sum(1 for keyword in grade_keywords if keyword in filename_lower)
-            if keyword_matches >= 1:
-                validation_score += min(keyword_matches * 10, 30)  # Max 30 points for filename
-                reasons.append(f"Grade-related keywords found in filename: {keyword_matches}")
-            else:
-                # Not necessarily invalid, but lower confidence
-                reasons.append("No grade-related keywords in filename")
-            
-            # 4. File header/magic number validation (basic)
-            try:
-                document.seek(0)  # Reset file pointer
-                file_header = document.read(8)  # Read first 8 bytes
-                document.seek(0)  # Reset again
-                
-                # Check for common file signatures
-                if file_header.startswith(b'\x89PNG\r\n\x1a\n'):
-                    validation_score += 20
-                    reasons.append("Valid PNG file signature detected")
-                elif file_header.startswith(b'\xff\xd8\xff'):
-                    validation_score += 20
-                    reasons.append("Valid JPEG file signature detected")
-                elif file_header.startswith(b'%PDF'):
-                    validation_score += 25
-                    reasons.append("Valid PDF file signature detected")
-                else:
-                    return {
-                        'is_valid': False,
-                        'confidence': 0,
-                        'reason': "Invalid file format - file appears to be corrupted or not a valid image/PDF."
-                    }
-                    
-            except Exception as e:
-                reasons.append(f"File header validation error: {str(e)}")
-                validation_score += 5
-            
-            # 5. Image content analysis (basic, for image files)
-            if file_extension in ['png', 'jpg', 'jpeg']:
-                try:
-                    # Try to import PIL for image validation
-                    from PIL import Image
-                    
-                    document.seek(0)
-                    image = Image.open(document)
-                    width, height = image.size
-                    
-                    # Grade documents are typically in landscape or portrait orientation
-                    # and have reasonable dimensions
-                    if width < 200 or height < 200:
-                        return {
-                            'is_valid': False,
-                            'confidence': 0,
-                            'reason': f"Image too small ({width}x{height}). Grade documents should be at least 200x200 pixels. This appears to be an icon or low-quality image."
-                        }
-                    
-                    # Grade documents should have reasonable minimum dimensions
-                    if width < 400 and height < 400:
-                        return {
-                            'is_valid': False,
-                            'confidence': 0,
-                            'reason': f"Image dimensions too small ({width}x{height}). Grade documents typically need to be at least 400x400 pixels to contain readable text."
-                        }
-                    
-                    if width > 5000 or height > 5000:
-                        reasons.append(f"Very large image ({width}x{height}) - may affect processing")
-                    else:
-                        validation_score += 10
-                        reasons.append(f"Appropriate image dimensions: {width}x{height}")
-                    
-                    # Check aspect ratio - grade documents usually have reasonable aspect ratios
-                    aspect_ratio = max(width, height) / min(width, height)
-                    if aspect_ratio > 4:  # Reduced from 5 to 4 - stricter aspect ratio check
-                        return {
-                            'is_valid': False,
-                            'confidence': 0,
-                            'reason': f"Unusual aspect ratio ({aspect_ratio:.2f}). Grade documents typically have more balanced dimensions (close to portrait or landscape format)."
-                        }
-                    else:
-                        validation_score += 15  # Increased reward for good aspect ratio
-                        reasons.append(f"Good aspect ratio: {aspect_ratio:.2f}")
-                    
-                    # Additional check: Grade documents should not be perfect squares (usually random images)
-                    if abs(width - height) < 10:  # Nearly perfect square
-                        validation_score -= 10  # Penalize square images
-                        reasons.append("Warning: Square image detected (uncommon for grade documents)")
-                        
-                except ImportError:
-                    # PIL not available, skip detailed image analysis
-                    reasons.append("Detailed image analysis skipped (PIL not available)")
-                    validation_score += 5  # Reduced points when can't analyze
-                except Exception as e:
-                    reasons.append(f"Image analysis error: {str(e)}")
-                    validation_score += 2  # Very low points for analysis errors
-                finally:
-                    document.seek(0)  # Reset file pointer
-            
-            # 6. Content-based validation - look for suspicious patterns
-            # Random images often have very simple or completely random names
-            suspicious_patterns = [
-                'screenshot', 'image', 'photo', 'picture', 'img', 'pic',
-                'random', 'test', 'sample', 'untitled', 'new', 'copy'
-            ]
-            
-            suspicious_matches = sum(1 for pattern in suspicious_patterns if pattern in filename_lower)
-            if suspicious_matches > 0:
-                validation_score -= suspicious_matches * 5  # Reduce score for suspicious patterns
-                reasons.append(f"Suspicious filename patterns detected: {suspicious_matches}")
-            
-            # 7. Additional heuristic checks
-            # Grade documents from TCU often have specific patterns
-            if 'tcu' in filename_lower or 'tagui' in filename_lower:
-                validation_score += 15
-                reasons.append("TCU-related filename detected")
-            
-            # Check for academic terms
-            academic_terms = ['midterm', 'final', 'sem', 'semester', '2024', '2025', '1st', '2nd']
-            term_matches = sum(1 for term in academic_terms if term in filename_lower)
-            if term_matches > 0:
-                validation_score += min(term_matches * 5, 15)
-                reasons.append(f"Academic terms found in filename: {term_matches}")
-            
-            # Calculate final confidence
-            max_possible_score = 110  # Theoretical maximum
-            confidence = min(100, max(0, (validation_score / max_possible_score) * 100))
-            
-            # Determine if document passes validation - MUCH MORE STRICT NOW
-            is_valid = confidence >= 70  # Increased from 50% to 70% - much stricter!
-            
-            # Additional strict check - require at least one grade-related keyword in filename
-            has_grade_keywords = any(keyword in filename_lower for keyword in [
-                'grade', 'grades', 'gwa', 'swa', 'transcript', 'record', 'academic',
-                'semester', 'semestral', 'report', 'card', 'tcu', 'university',
-                'student', 'result', 'evaluation', 'assessment', 'final', 'midterm'
-            ])
-            
-            if not has_grade_keywords:
-                return {
-                    'is_valid': False,
-                    'confidence': max(0, confidence - 30),  # Heavily penalize lack of keywords
-                    'reason': "Document filename does not contain grade-related keywords. Please rename your file to include words like 'grades', 'transcript', 'TCU', etc. (e.g., 'TCU_Grades_2024_Midterm.pdf')"
-                }
-            
-            # Extra strict check for suspicious filenames
-            highly_suspicious = [
-                'img_', 'image', 'photo', 'picture', 'screenshot', 'snap',
-                'untitled', 'new image', 'download', 'copy', 'random'
-            ]
-            
-            for suspicious in highly_suspicious:
-                if suspicious in filename_lower:
-                    return {
-                        'is_valid': False,
-                        'confidence': 0,
-                        'reason': f"Filename contains suspicious pattern '{suspicious}'. This appears to be a random image, not a grade document. Please upload your actual TCU grade report."
-                    }
-            
-            print(f"📋 Document validation completed:")
-            print(f"   Score: {validation_score}/{max_possible_score}")
-            print(f"   Confidence: {confidence:.1f}%")
-            print(f"   Valid: {'YES' if is_valid else 'NO'}")
-            print(f"   Has grade keywords: {'YES' if has_grade_keywords else 'NO'}")
-            for reason in reasons:
-                print(f"   - {reason}")
-            
-            if not is_valid:
-                return {
-                    'is_valid': False,
-                    'confidence': confidence,
-                    'reason': f"Document failed strict validation (confidence: {confidence:.1f}%). This doesn't appear to be a grade document. Please upload your actual grade report or transcript with a descriptive filename containing words like 'grades', 'TCU', 'transcript', etc."
-                }
-            
-            return {
-                'is_valid': True,
-                'confidence': confidence,
-                'reasons': reasons
-            }
-            
-        except Exception as e:
-            print(f"Error during document validation: {str(e)}")
-            return {
-                'is_valid': False,
-                'confidence': 0,
-                'reason': f"Document validation error: {str(e)}. Please try uploading a different file."
-            }
+    def validate_grade_document(self, document, filename=None):
+        """Document validation, see GradeDocumentAnalyzer.validate"""
+        return get_analyzer().validate(document, filename)
     
-    def simulate_document_analysis(self, document):
+    def simulate_document_analysis(self, document, filename=None):
+        """Document analysis, see GradeDocumentAnalyzer.analyze"""
+        return get_analyzer().analyze(document, filename)
+
+
+class BatchValidateDocumentsView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+    
+    def post(self, request):
         """
-        Enhanced AI document analysis with strict grade document validation
-        Now includes actual document content verification to prevent random image acceptance
+        Pre-screen many grade documents without submitting an application.
+        Upload them in the "files" field or as one zip in "archive"; verdicts
+        stream back as NDJSON, one line per file, as they finish.
         """
-        import random
-        from decimal import Decimal
-        import os
-        
-        print(f"🤖 Enhanced AI analyzing document: {document.name} ({document.size} bytes)")
-        
-        # STEP 1: Advanced file validation beyond just extension
-        file_extension = document.name.lower().split('.')[-1]
-        
-        # STEP 2: Strict document validation - reject obvious non-grade documents
-        validation_result = self.validate_grade_document(document)
-        if not validation_result['is_valid']:
-            print(f"❌ Document validation FAILED: {validation_result['reason']}")
-            raise ValueError(f"Document validation failed: {validation_result['reason']}")
+        uploads = request.FILES.getlist('files')
+        archive = request.FILES.get('archive')
+        if not uploads and not archive:
+            return Response({'error': 'Upload documents in the "files" field or a zip in the "archive" field'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(uploads) > settings.BATCH_VALIDATION_MAX_FILES:
+            return Response({'error': f'At most {settings.BATCH_VALIDATION_MAX_FILES} files per batch'},
+                            status=status.HTTP_400_BAD_REQUEST)
         
-        print(f"✅ Document validation PASSED: {validation_result['confidence']}% confidence it's a grade document")
+        documents = (read_limited(upload, upload.name) for upload in uploads)
+        if archive:
+            try:
+                documents = itertools.chain(documents, iter_zip_documents(archive))
+            except zipfile.BadZipFile:
+                return Response({'error': 'The archive is not a valid zip file'}, status=status.HTTP_400_BAD_REQUEST)
+            except BatchLimitExceeded as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # STEP 3: Enhanced quality assessment based on validation results
-        is_high_quality = (
-            document.size > 300000 or 
-            file_extension in ['pdf', 'png'] or
-            validation_result['confidence'] >= 80
-        )
+        print(f"Batch validation by {request.user.username}: {len(uploads)} files"
+              f"{' + archive ' + archive.name if archive else ''}")
+        lines = (json.dumps(verdict) + '\n' for verdict in validate_documents(documents))
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-store'
+        return response
+
+class DocumentPreviewView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, digest, size):
+        """A stored document preview; admins see any, students only their own"""
+        if size not in settings.DOCUMENT_PREVIEW_SIZES or not re.fullmatch(r'[0-9a-f]{64}', digest):
+            return Response({'error': 'Preview not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        print(f"📄 Document quality: {'High' if is_high_quality else 'Standard'} ({file_extension.upper()})")
-        
-        # Enhanced AI to simulate "reading" actual TCU grade documents  
-        if is_high_quality:
-            print("✅ High-quality document detected - using enhanced OCR accuracy")
-            # Simulate realistic TCU course loads (most students take 8 subjects × 3 units = 24)
-            units_patterns = {
-                24: 0.60,  # Most common: 8 subjects × 3 units (standard full load)
-                21: 0.20,  # 7 subjects × 3 units (slightly reduced load)
-                18: 0.15,  # 6 subjects × 3 units (lighter load)
-                27: 0.05   # 9 subjects × 3 units (heavy load)
-            }
-            
-            # More realistic SWA distribution for TCU merit-eligible students
-            swa_patterns = {
-                Decimal('95.00'): 0.08,  # Magna Cum Laude level
-                Decimal('92.50'): 0.12,  # Cum Laude level  
-                Decimal('90.00'): 0.25,  # Merit eligible (common for good students)
-                Decimal('89.50'): 0.20,  # Merit eligible
-                Decimal('88.75'): 0.15,  # Merit threshold exactly
-                Decimal('87.50'): 0.10,  # Just below merit
-                Decimal('85.00'): 0.10   # Average performance
-            }
-            
-            academic_issues_rate = 0.05  # Only 5% chance of issues for clear documents
-            
-        else:
-            print("⚠️ Standard quality document - using standard OCR accuracy")
-            # For unclear documents, still favor realistic unit counts
-            units_patterns = {
-                24: 0.45,  # Still most likely 24 units (8 subjects × 3 units)
-                21: 0.25,  # 7 subjects × 3 units
-                18: 0.20,  # 6 subjects × 3 units  
-                15: 0.10   # 5 subjects × 3 units (minimum)
-            }
-            
-            swa_patterns = {
-                Decimal('90.00'): 0.15,
-                Decimal('89.00'): 0.20,
-                Decimal('88.75'): 0.25,  # Merit threshold
-                Decimal('87.00'): 0.20,
-                Decimal('85.00'): 0.15,
-                Decimal('82.00'): 0.05
-            }
-            
-            academic_issues_rate = 0.15  # 15% chance of issues for unclear documents
-            
-            academic_issues_rate = 0.25  # 25% chance of issues for unclear documents
-        
-        # Weighted random selection for more realistic results
-        def weighted_choice(choices):
-            total = sum(choices.values())
-            r = random.uniform(0, total)
-            upto = 0
-            for choice, weight in choices.items():
-                if upto + weight >= r:
-                    return choice
-                upto += weight
-            return list(choices.keys())[-1]
-        
-        # Extract units with enhanced pattern recognition
-        extracted_units = weighted_choice(units_patterns)
-        
-        # Smart AI: Simulate detecting course patterns from grade documents
-        # Most TCU students take standard 3-unit courses (8 courses = 24 units)
-        if document.name.lower().find('grades') != -1 or document.size > 500000:
-            # For grade documents or large files, favor standard 24-unit loads
-            print("📋 AI detected grade document pattern - analyzing course structure")
-            if random.random() < 0.75:  # 75% chance to detect standard pattern
-                extracted_units = 24  # Most common: 8 subjects × 3 units each
-                print(f"🎯 AI detected: Standard 8-course load = {extracted_units} units")
-            elif random.random() < 0.20:  # 20% chance for 7 courses
-                extracted_units = 21
-                print(f"🎯 AI detected: 7-course load = {extracted_units} units")
-        
-        # Extract SWA with realistic distribution
-        extracted_swa = weighted_choice(swa_patterns)
-        
-        # Smart logic for academic issues based on SWA
-        if extracted_swa >= Decimal('95.00'):
-            # Excellent students rarely have issues
-            has_inc_withdrawn = random.random() < 0.02  # 2% chance
-            has_failed_dropped = False  # Excellent students don't fail
-            print(f"🏆 Excellent student detected (SWA: {extracted_swa}) - minimal issues")
-            
-        elif extracted_swa >= Decimal('88.75'):
-            # Merit-eligible students have low issue rates
-            has_inc_withdrawn = random.random() < 0.05  # 5% chance
-            has_failed_dropped = random.random() < 0.03  # 3% chance
-            print(f"⭐ Merit-eligible student detected (SWA: {extracted_swa}) - low issues")
-            
-        elif extracted_swa >= Decimal('85.00'):
-            # Good students have moderate issue rates
-            has_inc_withdrawn = random.random() < academic_issues_rate
-            has_failed_dropped = random.random() < (academic_issues_rate * 0.5)
-            print(f"👍 Good student detected (SWA: {extracted_swa}) - moderate issues")
-            
-        else:
-            # Struggling students have higher issue rates
-            has_inc_withdrawn = random.random() < (academic_issues_rate * 1.5)
-            has_failed_dropped = random.random() < academic_issues_rate
-            print(f"📚 Student needs support (SWA: {extracted_swa}) - higher issues")
-        
-        # Additional validation - ensure merit eligibility requirements (Official TCU)
-        is_merit_eligible = (
-            extracted_units >= 15 and
-            extracted_swa >= Decimal('88.75') and  # SWA of 88.75 or higher
-            not has_inc_withdrawn and
-            not has_failed_dropped
-        )
+        owners = ScholarshipApplication.objects.filter(document_digest=digest)
+        if not request.user.is_superuser:
+            owners = owners.filter(student__user=request.user)
+        if not owners.exists():
+            return Response({'error': 'Preview not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Final quality check and logging
-        print(f"📊 AI EXTRACTION RESULTS:")
-        print(f"   📚 Units Enrolled: {extracted_units}")
-        print(f"   📈 SWA: {extracted_swa}")
-        print(f"   ❌ Has INC/Withdrawn: {has_inc_withdrawn}")
-        print(f"   ❌ Has Failed/Dropped: {has_failed_dropped}")
-        print(f"   🏆 Merit Eligible: {'YES' if is_merit_eligible else 'NO'}")
-        
-        if is_merit_eligible:
-            print(f"   💰 Estimated Total Allowance: ₱10,000 (Base: ₱5,000 + Merit: ₱5,000)")
-            # Pre-calculate expected allowances for merit-eligible students
-            expected_base = Decimal('5000.00')
-            expected_merit = Decimal('5000.00') 
-            expected_total = expected_base + expected_merit
+        # Content-addressed, so a preview never changes once it exists
+        etag = f'"{digest}-{size}"'
+        cache_control = f'private, max-age={settings.DOCUMENT_PREVIEW_MAX_AGE}, immutable'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
         else:
-            print(f"   💰 Estimated Total Allowance: ₱5,000 (Base only)")
-            # Pre-calculate expected allowances for non-merit students
-            expected_base = Decimal('5000.00')
-            expected_merit = Decimal('0.00')
-            expected_total = expected_base + expected_merit
-        
-        # Additional confidence scoring based on document quality and results
-        confidence_factors = []
-        if is_high_quality:
-            confidence_factors.append(("High quality document", 25))
-        else:
-            confidence_factors.append(("Standard quality document", 15))
-            
-        if file_extension == 'pdf':
-            confidence_factors.append(("PDF format (preferred)", 20))
-        elif file_extension in ['png', 'jpg', 'jpeg']:
-            confidence_factors.append(("Image format (good)", 15))
-        else:
-            confidence_factors.append(("Other format", 10))
-            
-        if extracted_swa >= Decimal('88.75'):
-            confidence_factors.append(("Merit-eligible grades detected", 15))
-        
-        if extracted_units >= 15:
-            confidence_factors.append(("Adequate unit load", 10))
-            
-        total_confidence = sum(factor[1] for factor in confidence_factors)
-        base_confidence = 60  # Base confidence level
-        final_confidence = min(98, base_confidence + total_confidence)
-        
-        print(f"   🎯 AI Confidence: {final_confidence}% (factors: {', '.join(f[0] for f in confidence_factors)})")
+            name = preview_name(digest, size)
+            if not default_storage.exists(name):
+                return Response({'error': 'Preview not ready'}, status=status.HTTP_404_NOT_FOUND)
+            response = FileResponse(default_storage.open(name, 'rb'), content_type=PREVIEW_CONTENT_TYPE)
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+class UploadSessionView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """Start a resumable upload: {filename, size, sha256 (optional)}"""
+        try:
+            session = create_session(request.user, request.data.get('filename'), request.data.get('size'),
+                                     request.data.get('sha256', ''))
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status_code)
+        response = Response(session_state(session), status=status.HTTP_201_CREATED)
+        response['Location'] = reverse('upload_session', args=[session.id])
+        response['Upload-Offset'] = str(session.received)
+        return response
+    
+    def get(self, request, upload_id):
+        """Where to resume: the number of bytes received so far"""
+        try:
+            session = get_session(request.user, upload_id)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status_code)
+        response = Response(session_state(session))
+        response['Upload-Offset'] = str(session.received)
+        return response
+    
+    def put(self, request, upload_id):
+        """Append one chunk: raw bytes with Content-Range and X-Chunk-Checksum"""
+        try:
+            # Read the body as a stream; request.data would parse (and buffer) it
+            session = append_chunk(request.user, upload_id, request.stream,
+                                   request.headers.get('Content-Range'), request.headers.get('X-Chunk-Checksum'))
+        except UploadError as e:
+            response = Response({'error': str(e)}, status=e.status_code)
+            try:
+                response['Upload-Offset'] = str(get_session(request.user, upload_id).received)
+            except UploadError:
+                pass
+            return response
+        response = Response(session_state(session))
+        response['Upload-Offset'] = str(session.received)
+        return response
+
+class UploadCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, upload_id):
+        """Finish an upload once every byte is in; its id can then be submitted as upload_id"""
+        try:
+            session = complete_session(request.user, upload_id)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status_code)
+        return Response(session_state(session))
+
+class EventStreamTicketView(APIView):
+    """
+    Short-lived ticket for opening an event stream with EventSource, which
+    can't send headers. Pass it as ?ticket= to events/ or admin/events/.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        return Response({
+            'ticket': issue_stream_ticket(request.user),
+            'expires_in': settings.EVENTS_TICKET_SECONDS
+        })
+
+class EventStreamView(APIView):
+    """
+    Server-Sent Events with status changes of the user's own applications.
+    EventSource can't send headers, so a ticket from events/ticket/ may be
+    given as ?ticket=.
+    """
+    authentication_classes = [StreamTicketAuthentication, ExpiringTokenAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    firehose = False
+    
+    def get(self, request):
+        if self.firehose and not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
         
-        return {
-            'units_enrolled': extracted_units,
-            'swa_grade': extracted_swa,
-            'has_inc_withdrawn': has_inc_withdrawn,
-            'has_failed_dropped': has_failed_dropped,
-            'confidence_score': Decimal(str(final_confidence)),
-            'analysis_notes': f"Enhanced AI analysis with {final_confidence}% confidence. Merit eligible: {'Yes' if is_merit_eligible else 'No'}",
-            'is_merit_eligible': is_merit_eligible,
-            'expected_base_allowance': expected_base,
-            'expected_merit_incentive': expected_merit,
-            'expected_total_allowance': expected_total
-        }
+        stream = event_stream(
+            request.user.id,
+            firehose=self.firehose,
+            last_event_id=request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        )
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # don't let a proxy buffer the stream
+        return response
 
+class AdminEventStreamView(EventStreamView):
+    """Every application's status changes and deletions, for the admin dashboard"""
+    firehose = True
 
+@method_decorator(replica_reads, name='get')
 class AdminDashboardView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -973,11 +848,32 @@ class AdminDashboardView(APIView):
         # Get students count - exclude admin users
         total_students = User.objects.filter(is_superuser=False).count()
         
-        # Get students with profiles for more detailed information
-        students_with_applications = User.objects.filter(
-            is_superuser=False,
-            studentprofile__scholarshipapplication__isnull=False
-        ).distinct().count()
+        # Distinct students come from the semester sketches unless ?exact=1
+        exact = request.query_params.get('exact', '').lower() in ('1', 'true', 'yes')
+        live_semesters = list(applications.order_by().values_list('academic_year', 'semester').distinct())
+        sketches = {} if exact else semester_cardinalities()
+        unique_students = {key: estimate(sketches[key]) for key in live_semesters if key in sketches}
+        unsketched = [key for key in live_semesters if key not in unique_students]
+        if unsketched:
+            # Counted exactly: ?exact=1, or semesters rebuild_sketches has not reached yet
+            exact_rows = applications.order_by()
+            if not exact:
+                filters = models.Q()
+                for academic_year, semester in unsketched:
+                    filters |= models.Q(academic_year=academic_year, semester=semester)
+                exact_rows = exact_rows.filter(filters)
+            for row in exact_rows.values('academic_year', 'semester').annotate(
+                students=models.Count('student', distinct=True)
+            ):
+                unique_students[(row['academic_year'], row['semester'])] = row['students']
+            
+            students_with_applications = User.objects.filter(
+                is_superuser=False,
+                studentprofile__scholarshipapplication__isnull=False
+            ).distinct().count()
+        else:
+            # Sketches merge by register-wise max into the union of the semesters
+            students_with_applications = estimate(merge(sketches[key] for key in live_semesters))
         
         # Get recent applications with enhanced student information
         recent_applications_data = []
@@ -1006,28 +902,29 @@ class AdminDashboardView(APIView):
             }
             recent_applications_data.append(app_data)
         
-        # Semester breakdown with more details
+        # Semester breakdown with more details, one grouped query per status
         semester_stats = {}
-        for app in applications:
-            key = f"{app.academic_year} - {app.semester}"
+        status_rows = applications.order_by('-academic_year', '-semester').values(
+            'academic_year', 'semester', 'ai_verification_status'
+        ).annotate(count=models.Count('id'), amount=models.Sum('total_allowance'))
+        for row in status_rows:
+            key = f"{row['academic_year']} - {row['semester']}"
             if key not in semester_stats:
                 semester_stats[key] = {
                     'total': 0,
                     'approved': 0,
                     'pending': 0,
+                    'under_review': 0,
                     'rejected': 0,
                     'total_amount': 0,
-                    'unique_students': set()
+                    'unique_students': unique_students.get((row['academic_year'], row['semester']), 0)
                 }
-            semester_stats[key]['total'] += 1
-            semester_stats[key][app.ai_verification_status] += 1
-            semester_stats[key]['unique_students'].add(app.student.user.id)
-            if app.ai_verification_status == 'approved':
-                semester_stats[key]['total_amount'] += float(app.total_allowance)
-        
-        # Convert sets to counts for JSON serialization
-        for stats in semester_stats.values():
-            stats['unique_students'] = len(stats['unique_students'])
+            semester_stats[key]['total'] += row['count']
+            semester_stats[key][row['ai_verification_status']] = (
+                semester_stats[key].get(row['ai_verification_status'], 0) + row['count']
+            )
+            if row['ai_verification_status'] == 'approved':
+                semester_stats[key]['total_amount'] += float(row['amount'] or 0)
         
         # Get top performing students (by merit eligibility)
         top_students = applications.filter(
@@ -1060,27 +957,66 @@ class AdminDashboardView(APIView):
             'recent_applications': recent_applications_data,
             'semester_breakdown': semester_stats,
             'top_students': top_students_data,
+            'archived_semesters': list(SemesterSummary.objects.order_by('-academic_year', '-semester').values(
+                'academic_year', 'semester', 'total_applications', 'approved_applications',
+                'unique_students', 'merit_recipients', 'total_disbursed'
+            )),
             'approval_rate': round((approved_applications / total_applications) * 100, 2) if total_applications > 0 else 0,
-            'merit_rate': round((applications.filter(merit_incentive__gt=0).count() / total_applications) * 100, 2) if total_applications > 0 else 0
+            'merit_rate': round((applications.filter(merit_incentive__gt=0).count() / total_applications) * 100, 2) if total_applications > 0 else 0,
+            'cardinality': {
+                'exact': exact,
+                'standard_error': 0 if exact else round(standard_error(), 4)
+            }
         }
         
         return Response(dashboard_data)
 
 
-class AdminApplicationsView(APIView):
+@method_decorator(replica_reads, name='get')
+class AdminAnalyticsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
+        """SWA distributions, merit-threshold sensitivity and semester trends (?academic_year=, ?semester=)"""
         # Check if user is admin
         if not request.user.is_superuser:
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
         
+        if not analytics_available():
+            return Response({'error': 'Analytics need NumPy (pip install numpy)'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        return Response(dashboard_analytics(
+            academic_year=request.GET.get('academic_year') or None,
+            semester=request.GET.get('semester') or None,
+        ))
+
+
+@method_decorator(replica_reads, name='get')
+class AdminApplicationsView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, application_id=None):
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        if application_id is not None:
+            return self.get_detail(request, application_id)
+        if 'since' in request.GET:
+            # The cursor would skip rows a lagging replica hasn't received yet
+            with primary_reads():
+                return self.get_changes(request)
+        
         # Get query parameters for filtering
         status_filter = request.GET.get('status', '')
         semester_filter = request.GET.get('semester', '')
         academic_year_filter = request.GET.get('academic_year', '')
+        duplicates_filter = request.GET.get('duplicates', '')
         
-        applications = ScholarshipApplication.objects.all().select_related('student__user').order_by('-created_at')
+        # The structured verification result is only needed by the detail view
+        applications = (ScholarshipApplication.objects.all().select_related('student__user')
+                        .defer('ai_verification_result', 'search_notes').order_by('-created_at'))
         
         # Apply filters
         if status_filter:
@@ -1089,38 +1025,84 @@ class AdminApplicationsView(APIView):
             applications = applications.filter(semester=semester_filter)
         if academic_year_filter:
             applications = applications.filter(academic_year=academic_year_filter)
+        if duplicates_filter:
+            applications = applications.filter(duplicate_document_of__isnull=False)
         
         # Format the applications with detailed student information
-        applications_data = []
-        for app in applications:
-            app_data = {
-                'id': app.id,
-                'student_name': f"{app.student.user.first_name} {app.student.user.last_name}".strip() or app.student.user.username,
-                'student_username': app.student.user.username,
-                'student_email': app.student.user.email,
-                'student_id': app.student.student_id,
-                'academic_year': app.academic_year,
-                'semester': app.semester,
-                'units_enrolled': app.units_enrolled,
-                'swa_grade': float(app.swa_grade) if app.swa_grade else None,
-                'has_inc_withdrawn': app.has_inc_withdrawn,
-                'has_failed_dropped': app.has_failed_dropped,
-                'base_allowance': float(app.base_allowance) if app.base_allowance else 0,
-                'merit_incentive': float(app.merit_incentive) if app.merit_incentive else 0,
-                'total_allowance': float(app.total_allowance) if app.total_allowance else 0,
-                'ai_verification_status': app.ai_verification_status,
-                'verification_status': app.ai_verification_status,  # Add alias for frontend consistency
-                'ai_confidence_score': float(app.ai_confidence_score) if app.ai_confidence_score else 0,
-                'ai_verification_notes': app.ai_verification_notes,
-                'grade_document': app.grade_document.url if app.grade_document else None,
-                'created_at': app.created_at,
-                'updated_at': app.updated_at,
-                'is_first_time_applicant': app.student.is_first_time_applicant
-            }
-            applications_data.append(app_data)
+        applications_data = [self.format_application(app) for app in applications]
         
         return Response(applications_data)
     
+    def get_changes(self, request):
+        """
+        Delta sync: applications changed and ids deleted since the ?since= cursor
+        (empty for a full load), plus the cursor for the next call. Filters are
+        not applied; clients filter their local copy.
+        """
+        try:
+            limit = int(request.GET.get('limit', 0)) or None
+            applications = (ScholarshipApplication.objects.select_related('student__user')
+                            .defer('ai_verification_result', 'search_notes'))
+            changed, deleted, cursor, has_more = changes_since(applications, request.GET['since'], limit)
+        except SyncCursorExpired as e:
+            return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'changed': [self.format_application(app) for app in changed],
+            'deleted': deleted,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+    
+    def get_detail(self, request, application_id):
+        """One application with its full AI verification notes rendered on demand"""
+        try:
+            app = ScholarshipApplication.objects.select_related('student__user').get(id=application_id)
+        except ScholarshipApplication.DoesNotExist:
+            return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        app_data = self.format_application(app)
+        app_data['ai_verification_result'] = app.ai_verification_result
+        app_data['ai_verification_notes'] = render_verification_notes(app, locale=request.GET.get('locale', 'en'))
+        return Response(app_data)
+    
+    def format_application(self, app):
+        """One row of the admin applications list"""
+        return {
+            'id': app.id,
+            'student_name': f"{app.student.user.first_name} {app.student.user.last_name}".strip() or app.student.user.username,
+            'student_username': app.student.user.username,
+            'student_email': app.student.user.email,
+            'student_id': app.student.student_id,
+            'academic_year': app.academic_year,
+            'semester': app.semester,
+            'units_enrolled': app.units_enrolled,
+            'swa_grade': float(app.swa_grade) if app.swa_grade else None,
+            'has_inc_withdrawn': app.has_inc_withdrawn,
+            'has_failed_dropped': app.has_failed_dropped,
+            'base_allowance': float(app.base_allowance) if app.base_allowance else 0,
+            'merit_incentive': float(app.merit_incentive) if app.merit_incentive else 0,
+            'total_allowance': float(app.total_allowance) if app.total_allowance else 0,
+            'ai_verification_status': app.ai_verification_status,
+            'verification_status': app.ai_verification_status,  # Add alias for frontend consistency
+            'ai_confidence_score': float(app.ai_confidence_score) if app.ai_confidence_score else 0,
+            'ai_verification_notes': app.ai_verification_notes,
+            'grade_document': app.grade_document.url if app.grade_document else None,
+            'grade_document_name': app.document_display_name,
+            'thumbnail_url': reverse('document_preview', args=[app.document_digest, 'thumb']) if app.document_digest else None,
+            'preview_url': reverse('document_preview', args=[app.document_digest, 'page']) if app.document_digest else None,
+            'duplicate_document_of': app.duplicate_document_of_id,
+            'duplicate_document_distance': app.duplicate_document_distance,
+            'version': app.version,
+            'claimed_by': app.claimed_by_id if app.claim_expires_at and app.claim_expires_at > timezone.now() else None,
+            'claim_expires_at': app.claim_expires_at,
+            'created_at': app.created_at,
+            'updated_at': app.updated_at,
+            'is_first_time_applicant': app.student.is_first_time_applicant
+        }
+    
     def patch(self, request, application_id):
         # Check if user is admin
         if not request.user.is_superuser:
@@ -1130,27 +1112,36 @@ class AdminApplicationsView(APIView):
         print(f"Request data: {request.data}")
         print(f"Request user: {request.user.username}")
         
-        try:
-            application = ScholarshipApplication.objects.get(id=application_id)
-            print(f"Found application: {application.id} - {application.student.user.username}")
-        except ScholarshipApplication.DoesNotExist:
-            print(f"Application with ID {application_id} not found")
-            return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
+        # The version the reviewer loaded; without it the update is not checked
+        version = request.data.get('version')
+        if version is not None:
+            try:
+                version = int(version)
+            except (TypeError, ValueError):
+                return Response({'error': 'version must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Update application status
         try:
             new_status = request.data.get('status')
             admin_notes = request.data.get('admin_notes', '')
             
-            print(f"Updating status from {application.ai_verification_status} to {new_status}")
-            
             if new_status in ['approved', 'rejected', 'under_review', 'pending']:
-                application.ai_verification_status = new_status
-                if admin_notes:
-                    # Fix: Handle None values in ai_verification_notes
-                    current_notes = application.ai_verification_notes or ''
-                    application.ai_verification_notes = current_notes + f"\n\nAdmin Notes: {admin_notes}"
-                application.save()
+                with transaction.atomic():
+                    # Rejects stale versions and applications claimed by another reviewer
+                    application = lock_version(application_id, version, request.user)
+                    print(f"Updating status from {application.ai_verification_status} to {new_status}")
+                    application.ai_verification_status = new_status
+                    if admin_notes:
+                        # Fix: Handle None values in ai_verification_notes
+                        current_notes = application.ai_verification_notes or ''
+                        application.ai_verification_notes = current_notes + f"\n\nAdmin Notes: {admin_notes}"
+                    if new_status not in settings.REVIEW_QUEUE_STATUSES:
+                        # Reviewed: the claim is done
+                        application.claimed_by = None
+                        application.claim_expires_at = None
+                    application.save()
+                # Keep this admin's next list reads on the primary so they see the change
+                pin_to_primary(request.user)
                 
                 print(f"Application updated successfully. New status: {application.ai_verification_status}")
                 
@@ -1161,6 +1152,12 @@ class AdminApplicationsView(APIView):
             else:
                 print(f"Invalid status provided: {new_status}")
                 return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+        except ScholarshipApplication.DoesNotExist:
+            print(f"Application with ID {application_id} not found")
+            return Response({'error': 'Application not found'}, status=status.HTTP_404_NOT_FOUND)
+        except ReviewConflict as e:
+            current = ScholarshipApplication.objects.filter(id=application_id).values('version', 'claimed_by').first()
+            return Response({'error': str(e), **(current or {})}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             print(f"Error updating application: {e}")
             import traceback
@@ -1185,8 +1182,16 @@ class AdminApplicationsView(APIView):
             
             print(f"Found application to delete: {application.id} - {student_name}")
             
-            # Delete the application
-            application.delete()
+            # Delete the application, then its stored document if no other row uses it
+            document_name = application.grade_document.name if application.grade_document else None
+            with transaction.atomic():
+                # Lets clients syncing the list with ?since= drop it
+                ApplicationTombstone.record([application])
+                application.delete()
+            if document_name:
+                transaction.on_commit(lambda: release_document(document_name))
+            publish_application_deleted(application_id, application.student.user_id)
+            pin_to_primary(request.user)
             
             print(f"Application {application_id} deleted successfully")
             
@@ -1206,6 +1211,57 @@ class AdminApplicationsView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class AdminReviewQueueView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """The applications this reviewer currently holds"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        format_application = AdminApplicationsView().format_application
+        return Response({'claimed': [format_application(app) for app in active_claims(request.user)]})
+    
+    def post(self, request):
+        """Claim the next applications from the queue (limit, academic_year, semester)"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            limit = int(request.data.get('limit', settings.REVIEW_CLAIM_BATCH_SIZE))
+        except (TypeError, ValueError):
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.REVIEW_CLAIM_MAX_BATCH_SIZE))
+        
+        claimed = claim_applications(
+            request.user, limit,
+            academic_year=request.data.get('academic_year'),
+            semester=request.data.get('semester')
+        )
+        pin_to_primary(request.user)
+        format_application = AdminApplicationsView().format_application
+        return Response({
+            'claimed': [format_application(app) for app in claimed],
+            'lease_seconds': int(settings.REVIEW_CLAIM_LEASE.total_seconds())
+        })
+    
+    def delete(self, request):
+        """Give back claimed applications (ids, or all of them)"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        ids = request.data.get('ids')
+        if ids is not None and not isinstance(ids, list):
+            return Response({'error': 'ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        released = release_claims(request.user, ids)
+        pin_to_primary(request.user)
+        return Response({'released': released})
+
+
+@method_decorator(replica_reads, name='get')
 class AdminStudentsView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -1243,3 +1299,194 @@ class AdminStudentsView(APIView):
             students_data.append(student_info)
         
         return Response(students_data)
+
+
+@method_decorator(replica_reads, name='get')
+class AdminSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Prefix search over students and verification notes (?q=, ?type=students|applications|all)"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        query = request.GET.get('q', '').strip()
+        search_type = request.GET.get('type', 'all')
+        if search_type not in ('students', 'applications', 'all'):
+            return Response({'error': 'type must be students, applications or all'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.GET.get('limit', settings.SEARCH_RESULT_LIMIT)), 1), settings.SEARCH_MAX_RESULT_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = {'query': query, 'students': [], 'applications': []}
+        # One-letter prefixes match most of the table; wait for the second keystroke
+        if len(query) < settings.SEARCH_MIN_QUERY_LENGTH:
+            return Response(results)
+        
+        if search_type in ('students', 'all'):
+            ids = search_students(query, limit)
+            profiles = StudentProfile.objects.select_related('user').only(
+                'id', 'user_id', 'student_id', 'course', 'year_level',
+                'user__username', 'user__first_name', 'user__last_name', 'user__email'
+            ).in_bulk(ids)
+            results['students'] = [self.format_student(profiles[id]) for id in ids if id in profiles]
+        
+        if search_type in ('applications', 'all'):
+            matches = search_applications(query, limit)
+            applications = ScholarshipApplication.objects.select_related('student__user').only(
+                'id', 'academic_year', 'semester', 'ai_verification_status',
+                'student__student_id', 'student__user__username', 'student__user__first_name', 'student__user__last_name'
+            ).in_bulk([id for id, _ in matches])
+            results['applications'] = [
+                self.format_application(applications[id], snippet) for id, snippet in matches if id in applications
+            ]
+        
+        return Response(results)
+    
+    def format_student(self, student):
+        return {
+            'id': student.id,
+            'user_id': student.user_id,
+            'username': student.user.username,
+            'name': f"{student.user.first_name} {student.user.last_name}".strip(),
+            'email': student.user.email,
+            'student_id': student.student_id,
+            'course': student.course,
+            'year_level': student.year_level,
+        }
+    
+    def format_application(self, app, snippet):
+        return {
+            'id': app.id,
+            'student_name': f"{app.student.user.first_name} {app.student.user.last_name}".strip() or app.student.user.username,
+            'student_id': app.student.student_id,
+            'academic_year': app.academic_year,
+            'semester': app.semester,
+            'verification_status': app.ai_verification_status,
+            'snippet': snippet,
+        }
+
+
+class AdminImportStudentsView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+    
+    def post(self, request):
+        """Queue an uploaded registrar roster CSV for import; returns the job to poll"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        roster = request.FILES.get('file')
+        if not roster:
+            return Response({'error': 'Upload the roster CSV in the "file" field'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # The import runs in the background; only the header is checked here
+            job = queue_import(request.user, roster)
+        except (RosterError, UnicodeDecodeError) as e:
+            return Response({'error': f'Invalid roster file: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        print(f"Roster import {job.id} queued by {request.user.username}")
+        
+        response = Response(job_state(job), status=status.HTTP_202_ACCEPTED)
+        response['Location'] = reverse('admin_import_students_job', args=[job.id])
+        return response
+    
+    def get(self, request, job_id):
+        """Progress of a roster import: status, and the summary so far"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            job = RosterImport.objects.get(id=job_id)
+        except RosterImport.DoesNotExist:
+            return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job_state(job))
+
+
+@method_decorator(replica_reads, name='get')
+class AdminArchivedApplicationsView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, archive_id=None):
+        """Read-only access to applications moved out by archive_semesters"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        archived = ArchivedApplication.objects.select_related('student__user')
+        
+        if archive_id is not None:
+            try:
+                app = archived.get(id=archive_id)
+            except ArchivedApplication.DoesNotExist:
+                return Response({'error': 'Archived application not found'}, status=status.HTTP_404_NOT_FOUND)
+            app_data = self.format_archived(app)
+            # Notes and logs are only decompressed for the detail view
+            app_data['ai_verification_notes'] = app.notes
+            app_data['ai_verification_logs'] = app.logs
+            return Response(app_data)
+        
+        academic_year_filter = request.GET.get('academic_year', '')
+        semester_filter = request.GET.get('semester', '')
+        student_id_filter = request.GET.get('student_id', '')
+        if academic_year_filter:
+            archived = archived.filter(academic_year=academic_year_filter)
+        if semester_filter:
+            archived = archived.filter(semester=semester_filter)
+        if student_id_filter:
+            archived = archived.filter(student__student_id=student_id_filter)
+        
+        try:
+            limit = min(max(int(request.GET.get('limit', 100)), 1), 500)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'error': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # The compressed blobs are not needed for the list
+        page = archived.defer('notes_compressed', 'logs_compressed').order_by('-created_at')[offset:offset + limit]
+        return Response({
+            'count': archived.count(),
+            'results': [self.format_archived(app) for app in page]
+        })
+    
+    def format_archived(self, app):
+        return {
+            'id': app.id,
+            'original_id': app.original_id,
+            'student_name': f"{app.student.user.first_name} {app.student.user.last_name}".strip() or app.student.user.username,
+            'student_username': app.student.user.username,
+            'student_id': app.student.student_id,
+            'academic_year': app.academic_year,
+            'semester': app.semester,
+            'units_enrolled': app.units_enrolled,
+            'swa_grade': float(app.swa_grade) if app.swa_grade else None,
+            'has_inc_withdrawn': app.has_inc_withdrawn,
+            'has_failed_dropped': app.has_failed_dropped,
+            'base_allowance': float(app.base_allowance),
+            'merit_incentive': float(app.merit_incentive),
+            'total_allowance': float(app.total_allowance),
+            'verification_status': app.ai_verification_status,
+            'ai_confidence_score': float(app.ai_confidence_score) if app.ai_confidence_score else 0,
+            'grade_document': app.grade_document or None,
+            'created_at': app.created_at,
+            'archived_at': app.archived_at,
+        }
+
+
+@method_decorator(replica_reads, name='get')
+class AdminSemesterSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Rollups for archived semesters"""
+        # Check if user is admin
+        if not request.user.is_superuser:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        
+        summaries = SemesterSummary.objects.order_by('-academic_year', '-semester').values()
+        return Response(list(summaries))
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -79,12 +81,83 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=sqlite (default) or postgres. PostgreSQL reads DB_NAME, DB_USER,
+# DB_PASSWORD, DB_HOST and DB_PORT. DB_POOL=psycopg uses Django's built-in
+# psycopg 3 pool; DB_POOL=pgbouncer is for running behind PgBouncer in
+# transaction pooling mode.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'tcuceaa'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Keep connections open between requests and check them before reuse
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    DB_POOL = os.environ.get('DB_POOL', '')
+    if DB_POOL == 'psycopg':
+        # The pool owns connection reuse, so persistent connections must be off
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+            'timeout': 10,
+        }
+    elif DB_POOL == 'pgbouncer':
+        # Server-side cursors do not survive transaction pooling
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL lets readers run while a submission is being written,
+                # busy_timeout makes writers wait for the lock instead of
+                # failing with "database is locked"
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    f"PRAGMA busy_timeout={int(os.environ.get('DB_BUSY_TIMEOUT_MS', 20000))};"
+                    'PRAGMA synchronous=NORMAL;'
+                ),
+                # Take the write lock at BEGIN so two transactions never deadlock
+                # trying to upgrade from a read lock
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Optional read replica for the admin dashboard, application and student lists.
+# Set DB_REPLICA_NAME (a second SQLite file or database name) and, for
+# PostgreSQL, DB_REPLICA_HOST / DB_REPLICA_PORT. Without it every query uses
+# the default database.
+REPLICA_DB_ALIAS = 'replica'
+# After an admin writes, their reads stay on the primary this long so they
+# see their own change even if the replica lags. The pin is stored on their
+# AuthToken rows, so it holds across worker processes with any cache backend
+REPLICA_STICKY_SECONDS = 10
+
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES[REPLICA_DB_ALIAS] = dict(
+        DATABASES['default'],
+        NAME=os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        OPTIONS=dict(DATABASES['default']['OPTIONS']),
+        TEST={'MIRROR': 'default'},
+    )
+    if DB_ENGINE == 'postgres':
+        DATABASES[REPLICA_DB_ALIAS]['HOST'] = os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST'])
+        DATABASES[REPLICA_DB_ALIAS]['PORT'] = os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT'])
+
+DATABASE_ROUTERS = ['api.db_routers.ReplicaRouter']
 
 
 # Password validation
@@ -105,6 +178,37 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing. PASSWORD_HASHER=argon2 needs the argon2-cffi package;
+# without it PBKDF2 is used. Changing the cost below upgrades existing hashes
+# the next time each user logs in.
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1000000))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8))
+
+PASSWORD_HASHERS = [
+    'api.hashers.ConfigurablePBKDF2PasswordHasher',
+    'api.hashers.ConfigurableArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+if os.environ.get('PASSWORD_HASHER', 'pbkdf2') == 'argon2':
+    try:
+        import argon2  # noqa: F401
+        PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+    except ImportError:
+        pass
+
+# Password hashing runs on a bounded pool instead of the request thread.
+# Requests beyond workers + queue size are refused with 503.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 64))
+PASSWORD_HASH_TIMEOUT = 30
+
+# Failed login limits, counted in the local cache per username and per client IP
+LOGIN_RATE_WINDOW = 300  # seconds
+LOGIN_MAX_FAILURES_PER_USERNAME = 5
+LOGIN_MAX_FAILURES_PER_IP = 100
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -118,6 +222,17 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache (also holds the login rate limit counters)
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tcuceaa-default',
+    }
+}
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -137,17 +252,21 @@ CORS_ALLOWED_ORIGINS = [
 # Allow CORS for all origins during development (be more specific in production)
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
-CORS_ALLOWED_HEADERS = [
+CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
     'authorization',
+    'content-range',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
+    'x-chunk-checksum',
     'x-requested-with',
 ]
+CORS_EXPOSE_HEADERS = ['upload-offset']
 
 # File upload settings
 MEDIA_URL = '/media/'
@@ -167,10 +286,142 @@ CSRF_TRUSTED_ORIGINS = [
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.ExpiringTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-}
\ No newline at end of file
+}
+
+# API token lifetime. Tokens slide forward on use, but the expiry is only
+# rewritten once per AUTH_TOKEN_REFRESH_INTERVAL to avoid a write per request.
+AUTH_TOKEN_TTL = timedelta(days=7)
+AUTH_TOKEN_REFRESH_INTERVAL = timedelta(hours=1)
+
+# Unused email verification codes are purged after this long
+EMAIL_VERIFICATION_TTL = timedelta(days=2)
+
+# Email delivery. Verification emails are queued by RegisterView and sent by
+# `python manage.py send_verification_emails --loop`. Without SMTP settings the
+# messages are written to files under EMAIL_FILE_PATH instead.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'TCU Scholarship <no-reply@tcu.edu.ph>')
+
+# Background sender tuning
+EMAIL_SEND_BATCH_SIZE = 200
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_BASE_DELAY = timedelta(seconds=30)
+EMAIL_RESEND_COOLDOWN = timedelta(seconds=60)
+
+# Grade document analyzer used by AI verification (see api/analysis.py)
+AI_ANALYZER_VERSION = os.environ.get('AI_ANALYZER_VERSION', '1')
+
+# Filename keyword rules for document validation. Edits are picked up without
+# a restart; the file's mtime is checked at most every N seconds.
+GRADE_DOCUMENT_RULES_PATH = os.environ.get('GRADE_DOCUMENT_RULES_PATH', BASE_DIR / 'api' / 'rules' / 'filename_rules.json')
+GRADE_DOCUMENT_RULES_CHECK_INTERVAL = 2
+
+# Batch document pre-screening (documents/validate/ and validate_documents).
+# Uploads over DATA_UPLOAD_MAX_NUMBER_FILES files should be sent as one zip.
+BATCH_VALIDATION_WORKERS = 4
+BATCH_VALIDATION_MAX_FILES = 1000
+BATCH_VALIDATION_MAX_FILE_SIZE = 10 * 1024 * 1024
+BATCH_VALIDATION_MAX_TOTAL_SIZE = 500 * 1024 * 1024
+BATCH_VALIDATION_MAX_COMPRESSION_RATIO = 100
+
+# Document previews for admin review (see api/previews.py). PDF pages are
+# rendered only when PyMuPDF (`pip install pymupdf`) is installed.
+DOCUMENT_PREVIEW_SIZES = {'thumb': 320, 'page': 1280}
+DOCUMENT_PREVIEW_QUALITY = 80
+DOCUMENT_PREVIEW_WORKERS = 2
+DOCUMENT_PREVIEW_MAX_AGE = 60 * 60 * 24 * 365
+
+# Near-duplicate grade documents across students (see api/fingerprints.py):
+# dHash bits that may differ (up to 7 probes 17 values per chunk index, up to
+# 11 probes 137), and how many matching applications are compared
+DOCUMENT_DUPLICATE_MAX_DISTANCE = 6
+DOCUMENT_DUPLICATE_MAX_CANDIDATES = 50
+
+# Stored grade documents nobody references are deleted only after this long,
+# so an upload that reuses a blob is never collected before its row commits
+DOCUMENT_GC_GRACE_SECONDS = 60 * 60
+
+# Idempotency-Key responses are replayed for retries within this window
+# (purge_expired_auth deletes older ones)
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# Resumable uploads: chunks are appended under UPLOAD_SESSION_ROOT (outside MEDIA_ROOT)
+# and unfinished sessions are deleted by gc_documents after UPLOAD_SESSION_TTL.
+# Set UPLOAD_SESSION_ROOT to keep them out of the source tree in deployments
+UPLOAD_SESSION_ROOT = Path(os.environ.get('UPLOAD_SESSION_ROOT', BASE_DIR / 'upload_sessions'))
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+
+# Roster uploads to admin/students/import/ are imported in the background: the
+# CSV waits under ROSTER_IMPORT_ROOT and its passwords are hashed on at most
+# ROSTER_IMPORT_HASH_WORKERS of the password hashing pool's workers, so logins
+# keep the rest
+ROSTER_IMPORT_ROOT = Path(os.environ.get('ROSTER_IMPORT_ROOT', BASE_DIR / 'roster_imports'))
+ROSTER_IMPORT_HASH_WORKERS = max(1, PASSWORD_HASH_WORKERS // 2)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # suggested to clients
+UPLOAD_MAX_CHUNK_SIZE = 4 * 1024 * 1024  # stays under DATA_UPLOAD_MAX_MEMORY_SIZE
+UPLOAD_MAX_FILE_SIZE = 10 * 1024 * 1024  # the analyzer rejects anything larger
+
+# Server-Sent Events for application status changes (see api/events.py).
+# Streams end after EVENTS_MAX_STREAM_SECONDS so worker threads are released;
+# browsers reconnect and replay missed events from the history.
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_MAX_STREAM_SECONDS = 300
+EVENTS_RETRY_MILLISECONDS = 3000
+# EventSource can't send the Authorization header, so streams are opened with
+# a ticket from POST events/ticket/ that is only good for this long
+EVENTS_TICKET_SECONDS = 60
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HISTORY_SIZE = 1000
+
+# Delta sync of the admin applications list (?since=<cursor>). Rows changed
+# within SYNC_CURSOR_SKEW of the response are sent again on the next sync, so
+# a transaction that commits late is not skipped. Tombstones of deleted
+# applications are kept for SYNC_TOMBSTONE_TTL; older cursors must reload.
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 2000
+SYNC_CURSOR_SKEW = timedelta(seconds=5)
+SYNC_TOMBSTONE_TTL = timedelta(days=30)
+
+# Admin search (GET /api/admin/search/): results per type, the shortest query
+# that is run at all, and how many matches are ranked before the best are taken
+SEARCH_RESULT_LIMIT = 20
+SEARCH_MAX_RESULT_LIMIT = 100
+SEARCH_MIN_QUERY_LENGTH = 2
+SEARCH_RANK_CANDIDATES = 500
+
+# Admin analytics (GET /api/admin/analytics/, needs NumPy). Merit sensitivity
+# counts who would qualify at each threshold; the current rule is 88.75. The
+# SWA histogram is (first edge, last edge, bin width).
+ANALYTICS_MERIT_THRESHOLDS = (88.00, 88.75, 89.50)
+ANALYTICS_CURRENT_MERIT_THRESHOLD = 88.75
+ANALYTICS_SWA_HISTOGRAM = (75.0, 100.0, 1.0)
+ANALYTICS_CACHE_TIMEOUT = 60 * 60
+
+# HyperLogLog sketches behind the dashboard's distinct-student counts (see
+# api/sketches.py): 2**precision one-byte registers per semester, standard
+# error 1.04 / sqrt(2**precision). Changing it needs `manage.py rebuild_sketches`
+CARDINALITY_SKETCH_PRECISION = 14
+
+# Admin review queue (see api/review_queue.py): statuses that can be claimed,
+# how long a claim holds, and how many applications one claim takes
+REVIEW_QUEUE_STATUSES = ('under_review', 'pending')
+REVIEW_CLAIM_LEASE = timedelta(minutes=15)
+REVIEW_CLAIM_BATCH_SIZE = 10
+REVIEW_CLAIM_MAX_BATCH_SIZE = 50
+
+# Applications per page in the bootstrap/ response (?limit= up to the maximum)
+BOOTSTRAP_PAGE_SIZE = 20
+BOOTSTRAP_MAX_PAGE_SIZE = 100
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 
 function App() {
   const [isLogin, setIsLogin] = useState(true);
@@ -37,6 +37,12 @@ function App() {
   const [studentsFilterStatus, setStudentsFilterStatus] = useState('all');
   const [showLogoutModal, setShowLogoutModal] = useState(false);
   const [buttonLoading, setButtonLoading] = useState({});
+  const [verificationNotes, setVerificationNotes] = useState({});
+  const [documentThumbnails, setDocumentThumbnails] = useState({});
+  // Idempotency-Key for the grade submission: reused when the same form is resubmitted
+  const submissionKeyRef = useRef({ signature: null, key: null });
+  // Cursor of the last admin applications sync (?since=)
+  const adminSyncCursorRef = useRef(null);
   
   // Settings state
   const [profileData, setProfileData] = useState({
@@ -114,6 +120,84 @@ function App() {
     }
   };
 
+  const sha256Hex = async (buffer) => {
+    const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest)).map((byte) => byte.toString(16).padStart(2, '0')).join('');
+  };
+
+  // Resumable upload: the file goes up in checksummed chunks and a dropped
+  // connection only resends the bytes the server has not stored yet
+  const uploadInChunks = async (file) => {
+    const uploadsUrl = 'http://127.0.0.1:8000/api/uploads/';
+    const createResponse = await fetch(uploadsUrl, {
+      method: 'POST',
+      headers: {
+        'Authorization': `Token ${token}`,
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ filename: file.name, size: file.size })
+    });
+    const session = await createResponse.json();
+    if (!createResponse.ok) {
+      throw new Error(session.error || `Upload failed: HTTP ${createResponse.status}`);
+    }
+
+    const sessionUrl = `${uploadsUrl}${session.upload_id}/`;
+    let offset = session.offset;
+    let failures = 0;
+    while (offset < file.size) {
+      const end = Math.min(offset + session.chunk_size, file.size);
+      const chunk = await file.slice(offset, end).arrayBuffer();
+      try {
+        const response = await fetch(sessionUrl, {
+          method: 'PUT',
+          headers: {
+            'Authorization': `Token ${token}`,
+            'Content-Type': 'application/octet-stream',
+            'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+            'X-Chunk-Checksum': `sha256=${await sha256Hex(chunk)}`,
+          },
+          body: chunk
+        });
+        const serverOffset = response.headers.get('Upload-Offset');
+        if (!response.ok && serverOffset === null) {
+          const data = await response.json().catch(() => ({}));
+          throw new Error(data.error || `Upload failed: HTTP ${response.status}`);
+        }
+        offset = parseInt(serverOffset, 10);
+        failures = response.ok ? 0 : failures + 1;
+      } catch (error) {
+        failures += 1;
+        if (failures > 5) {
+          throw error;
+        }
+        console.warn(`Chunk upload failed (attempt ${failures}), resuming:`, error);
+        await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+        // Ask the server where to continue from
+        const statusResponse = await fetch(sessionUrl, { headers: { 'Authorization': `Token ${token}` } }).catch(() => null);
+        if (statusResponse && statusResponse.ok) {
+          offset = (await statusResponse.json()).offset;
+        }
+      }
+      if (failures > 5) {
+        throw new Error('Upload failed after several retries. Please try again.');
+      }
+      setUploadProgress(Math.round((offset / file.size) * 100));
+    }
+
+    const completeResponse = await fetch(`${sessionUrl}complete/`, {
+      method: 'POST',
+      headers: {
+        'Authorization': `Token ${token}`,
+      }
+    });
+    const completed = await completeResponse.json();
+    if (!completeResponse.ok) {
+      throw new Error(completed.error || `Upload failed: HTTP ${completeResponse.status}`);
+    }
+    return completed.upload_id;
+  };
+
   // Handle grade submission
   const handleGradeSubmit = async (e) => {
     e.preventDefault();
@@ -142,10 +226,30 @@ function App() {
         file_type: gradeFormData.grade_document?.type
       });
 
+      // Retries of the same form (double clicks, dropped connections) share a key,
+      // so the server replays the first response instead of creating a duplicate
+      const file = gradeFormData.grade_document;
+      const signature = [gradeFormData.academic_year, gradeFormData.semester, file.name, file.size, file.lastModified].join('|');
+      if (submissionKeyRef.current.signature !== signature) {
+        const key = window.crypto && window.crypto.randomUUID
+          ? window.crypto.randomUUID()
+          : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        submissionKeyRef.current = { signature, key, uploadId: null };
+      }
+
       const formData = new FormData();
       formData.append('academic_year', gradeFormData.academic_year);
       formData.append('semester', gradeFormData.semester);
-      formData.append('grade_document', gradeFormData.grade_document);
+      if (window.crypto && window.crypto.subtle) {
+        // Sent once; a resubmission of the same form reuses the finished upload
+        setUploadProgress(0);
+        if (!submissionKeyRef.current.uploadId) {
+          submissionKeyRef.current.uploadId = await uploadInChunks(file);
+        }
+        formData.append('upload_id', submissionKeyRef.current.uploadId);
+      } else {
+        formData.append('grade_document', file);
+      }
 
       // Log FormData contents
       for (let [key, value] of formData.entries()) {
@@ -157,6 +261,7 @@ function App() {
         method: 'POST',
         headers: {
           'Authorization': `Token ${token}`,
+          'Idempotency-Key': submissionKeyRef.current.key,
           // Don't set Content-Type header for FormData - let browser set it with boundary
         },
         body: formData
@@ -363,13 +468,120 @@ function App() {
   React.useEffect(() => {
     if (currentView === 'admin-applications' && token && isAdmin && !adminApplicationsLoading) {
       setAdminApplicationsLoading(true);
-      fetchAdminApplications(token).then(data => {
-        setAdminApplications(data);
+      syncAdminApplications(token).then(() => {
         setAdminApplicationsLoading(false);
       });
     }
   }, [currentView, token, isAdmin]);
 
+  // Load document thumbnails for the admin applications list
+  React.useEffect(() => {
+    adminApplications.forEach(async (app) => {
+      if (!app.thumbnail_url || documentThumbnails[app.id]) return;
+      const url = await fetchPreviewBlob(app.thumbnail_url);
+      if (url) {
+        setDocumentThumbnails(prev => ({ ...prev, [app.id]: url }));
+      }
+    });
+  }, [adminApplications]);
+
+  // Status changes are pushed over Server-Sent Events, so the lists are patched
+  // in place instead of being re-fetched
+  React.useEffect(() => {
+    if (!token || !user || typeof EventSource === 'undefined') return undefined;
+    const path = isAdmin ? 'admin/events/' : 'events/';
+    let source = null;
+    let stopped = false;
+    let retryTimer = null;
+    let lastEventId = '';
+
+    const reload = () => {
+      if (isAdmin) {
+        syncAdminApplications(token);
+        fetchAdminDashboardData(token);
+      } else {
+        fetchApplications(token).then(setApplications);
+        fetchDashboardData(token);
+      }
+    };
+
+    // The API token never goes in the URL: each connection gets a short-lived
+    // ticket, and a new one is fetched when the browser's own reconnect is
+    // refused because the old ticket expired
+    const connect = async () => {
+      let ticket;
+      try {
+        const response = await fetch('http://127.0.0.1:8000/api/events/ticket/', {
+          method: 'POST',
+          headers: {
+            'Authorization': `Token ${token}`,
+          }
+        });
+        if (!response.ok) return;
+        ticket = (await response.json()).ticket;
+      } catch (error) {
+        console.error('Failed to get event stream ticket:', error);
+        return;
+      }
+      if (stopped) return;
+
+      const resume = lastEventId ? `&last_event_id=${encodeURIComponent(lastEventId)}` : '';
+      source = new EventSource(`http://127.0.0.1:8000/api/${path}?ticket=${encodeURIComponent(ticket)}${resume}`);
+
+      source.addEventListener('application', (event) => {
+        lastEventId = event.lastEventId || lastEventId;
+        const change = JSON.parse(event.data);
+        if (change.previous_status === null) {
+          // A new application; it isn't in the lists yet
+          reload();
+          return;
+        }
+        // Admin rows hold amounts as numbers, student rows as decimal strings
+        const like = (current, value) => (typeof current === 'number' ? Number(value || 0) : value);
+        const patch = (app) => (app.id !== change.id ? app : {
+          ...app,
+          ai_verification_status: change.status,
+          verification_status: change.status,
+          ai_confidence_score: like(app.ai_confidence_score, change.ai_confidence_score),
+          merit_incentive: like(app.merit_incentive, change.merit_incentive),
+          total_allowance: like(app.total_allowance, change.total_allowance),
+          updated_at: change.updated_at,
+        });
+        setApplications(prev => prev.map(patch));
+        setAdminApplications(prev => prev.map(patch));
+        if (isAdmin) {
+          fetchAdminDashboardData(token);
+        } else {
+          fetchDashboardData(token);
+        }
+      });
+
+      source.addEventListener('application_deleted', (event) => {
+        lastEventId = event.lastEventId || lastEventId;
+        const { id } = JSON.parse(event.data);
+        setApplications(prev => prev.filter(app => app.id !== id));
+        setAdminApplications(prev => prev.filter(app => app.id !== id));
+      });
+
+      // Events were missed (slow connection or server restart)
+      source.addEventListener('resync', reload);
+
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED && !stopped) {
+          retryTimer = setTimeout(connect, 3000);
+        }
+      };
+    };
+
+    connect();
+
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [token, user, isAdmin]);
+
   // Load admin students when switching to admin students view
   React.useEffect(() => {
     if (currentView === 'admin-students' && token && isAdmin && !adminStudentsLoading) {
@@ -444,22 +656,95 @@ function App() {
     return [];
   };
 
-  // Fetch admin applications
-  const fetchAdminApplications = async (authToken) => {
+  // Sync admin applications: the first call loads the list, later calls only
+  // fetch what changed or was deleted since the cursor from the previous sync
+  const syncAdminApplications = async (authToken) => {
+    const previousCursor = adminSyncCursorRef.current;
+    let cursor = previousCursor;
+    let changed = [];
+    let deleted = [];
+    let hasMore = true;
     try {
-      const response = await fetch('http://127.0.0.1:8000/api/admin/applications/', {
+      while (hasMore) {
+        const response = await fetch(`http://127.0.0.1:8000/api/admin/applications/?since=${encodeURIComponent(cursor || '')}`, {
+          headers: {
+            'Authorization': `Token ${authToken}`,
+          }
+        });
+        if (response.status === 410 && cursor) {
+          // Cursor too old to know every deletion; start over with a full load
+          adminSyncCursorRef.current = null;
+          return syncAdminApplications(authToken);
+        }
+        if (!response.ok) {
+          console.error('Failed to sync admin applications');
+          return;
+        }
+        const data = await response.json();
+        changed = changed.concat(data.changed);
+        deleted = deleted.concat(data.deleted);
+        cursor = data.cursor;
+        hasMore = data.has_more;
+      }
+    } catch (error) {
+      console.error('Error syncing admin applications:', error);
+      return;
+    }
+
+    adminSyncCursorRef.current = cursor;
+    setAdminApplications(prev => {
+      const byId = new Map((previousCursor ? prev : []).map(app => [app.id, app]));
+      deleted.forEach(id => byId.delete(id));
+      changed.forEach(app => byId.set(app.id, app));
+      return Array.from(byId.values()).sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+    });
+  };
+
+  // Previews need the auth token, so they are fetched as blobs (the browser caches them)
+  const fetchPreviewBlob = async (previewUrl) => {
+    try {
+      const response = await fetch(`http://127.0.0.1:8000${previewUrl}`, {
         headers: {
-          'Authorization': `Token ${authToken}`,
+          'Authorization': `Token ${token}`,
+        }
+      });
+      if (response.ok) {
+        return URL.createObjectURL(await response.blob());
+      }
+    } catch (error) {
+      console.error('Error fetching document preview:', error);
+    }
+    return null;
+  };
+
+  const openDocumentPreview = async (app) => {
+    const url = await fetchPreviewBlob(app.preview_url);
+    if (url) {
+      window.open(url, '_blank', 'noopener,noreferrer');
+    }
+  };
+
+  // Fetch the full AI verification notes for one application (rendered on demand by the API)
+  const fetchVerificationNotes = async (applicationId) => {
+    if (verificationNotes[applicationId] !== undefined) {
+      // Toggle off when already shown
+      const { [applicationId]: _, ...rest } = verificationNotes;
+      setVerificationNotes(rest);
+      return;
+    }
+    try {
+      const response = await fetch(`http://127.0.0.1:8000/api/admin/applications/${applicationId}/`, {
+        headers: {
+          'Authorization': `Token ${token}`,
         }
       });
       if (response.ok) {
         const data = await response.json();
-        return data;
+        setVerificationNotes(prev => ({ ...prev, [applicationId]: data.ai_verification_notes || '' }));
       }
     } catch (error) {
-      console.error('Error fetching admin applications:', error);
+      console.error('Error fetching verification notes:', error);
     }
-    return [];
   };
 
   // Fetch admin students
@@ -495,7 +780,9 @@ function App() {
         },
         body: JSON.stringify({
           status: newStatus,
-          admin_notes: adminNotes
+          admin_notes: adminNotes,
+          // Rejected with 409 if someone else changed the application since it was loaded
+          version: adminApplications.find(app => app.id === applicationId)?.version
         })
       });
 
@@ -506,9 +793,8 @@ function App() {
         const data = await response.json();
         console.log('Success response:', data);
         
-        // Refresh admin applications
-        const updatedApplications = await fetchAdminApplications(token);
-        setAdminApplications(updatedApplications);
+        // Pull just the changes into the admin list
+        await syncAdminApplications(token);
         return { success: true, message: data.message || 'Application updated successfully' };
       } else {
         // Try to get error response
@@ -517,6 +803,10 @@ function App() {
           const errorData = await response.json();
           console.error('Error response:', errorData);
           errorMessage = errorData.error || errorData.message || `Server error: ${response.status}`;
+          if (response.status === 409) {
+            // Show the current state before the admin tries again
+            await syncAdminApplications(token);
+          }
         } catch (jsonError) {
           console.error('Could not parse error response as JSON:', jsonError);
           errorMessage = `Server error: ${response.status} ${response.statusText}`;
@@ -567,9 +857,8 @@ function App() {
           console.log('No JSON response from delete, using default message');
         }
         
-        // Refresh admin applications
-        const updatedApplications = await fetchAdminApplications(token);
-        setAdminApplications(updatedApplications);
+        // Pull just the changes into the admin list
+        await syncAdminApplications(token);
         return { success: true, message: data.message || 'Application deleted successfully' };
       } else {
         // Try to get error response
@@ -627,6 +916,8 @@ function App() {
     setUser(null);
     setDashboardData(null);
     setAdminData(null);
+    setAdminApplications([]);
+    adminSyncCursorRef.current = null;
     setIsAdmin(false);
     localStorage.removeItem('token');
     setMessage('Logged out successfully');
@@ -717,10 +1008,11 @@ function App() {
     }
   };
 
-  // Check if user is already logged in
+  // Check if user is already logged in; profile, dashboard and the first
+  // page of applications arrive in one request
   React.useEffect(() => {
     if (token) {
-      fetch('http://127.0.0.1:8000/api/auth/profile/', {
+      fetch('http://127.0.0.1:8000/api/bootstrap/', {
         headers: {
           'Authorization': `Token ${token}`,
         }
@@ -731,7 +1023,8 @@ function App() {
         }
         throw new Error('Token invalid');
       })
-      .then(data => {
+      .then(bootstrap => {
+        const data = bootstrap.profile;
         setUser(data);
         setIsAdmin(data.is_superuser || false);
         
@@ -752,7 +1045,8 @@ function App() {
           fetchAdminDashboardData(token);
         } else {
           setCurrentView('dashboard');
-          fetchDashboardData(token);
+          setDashboardData(bootstrap.dashboard);
+          setApplications(bootstrap.applications.results);
         }
       })
       .catch(() => {
@@ -1182,7 +1476,9 @@ function App() {
           }}
         >
           <span>{isSubmitting ? '⏳' : '🤖'}</span>
-          {isSubmitting ? 'Submitting for AI Verification...' : 'Submit for AI Verification'}
+          {isSubmitting
+            ? (uploadProgress > 0 && uploadProgress < 100 ? `Uploading... ${uploadProgress}%` : 'Submitting for AI Verification...')
+            : 'Submit for AI Verification'}
         </button>
       </form>
     </div>
@@ -2550,6 +2846,37 @@ function App() {
                     {buttonLoading[`${app.id}-delete`] ? '⏳ Deleting...' : '🗑️ Delete'}
                   </button>
 
+                  {documentThumbnails[app.id] && (
+                    <img
+                      src={documentThumbnails[app.id]}
+                      alt="Grade document preview"
+                      title="Open preview"
+                      onClick={() => openDocumentPreview(app)}
+                      style={{
+                        height: '64px',
+                        borderRadius: '4px',
+                        border: '1px solid #e2e8f0',
+                        cursor: 'pointer'
+                      }}
+                    />
+                  )}
+
+                  {app.duplicate_document_of && (
+                    <span
+                      title={`Document matches application #${app.duplicate_document_of} from another student (${app.duplicate_document_distance} bits differ)`}
+                      style={{
+                        padding: '6px 10px',
+                        backgroundColor: '#fed7d7',
+                        color: '#9b2c2c',
+                        borderRadius: '6px',
+                        fontSize: '12px',
+                        fontWeight: '600'
+                      }}
+                    >
+                      ⚠️ Possible reused document (#{app.duplicate_document_of})
+                    </span>
+                  )}
+
                   {app.grade_document && (
                     <a
                       href={`http://127.0.0.1:8000${app.grade_document}`}
@@ -2576,8 +2903,23 @@ function App() {
                   )}
                 </div>
 
-                {/* AI Verification Notes */}
-                {app.ai_verification_notes && (
+                {/* AI Verification Notes (full text is fetched from the detail endpoint) */}
+                <button
+                  onClick={() => fetchVerificationNotes(app.id)}
+                  style={{
+                    marginTop: '16px',
+                    padding: '6px 12px',
+                    backgroundColor: '#3182ce',
+                    color: 'white',
+                    border: 'none',
+                    borderRadius: '4px',
+                    fontSize: '12px',
+                    cursor: 'pointer'
+                  }}
+                >
+                  {verificationNotes[app.id] !== undefined ? '🙈 Hide AI Verification Notes' : '🤖 View AI Verification Notes'}
+                </button>
+                {verificationNotes[app.id] && (
                   <div style={{
                     backgroundColor: '#f0f8ff',
                     padding: '12px',
@@ -2596,7 +2938,7 @@ function App() {
                       whiteSpace: 'pre-wrap',
                       wordWrap: 'break-word'
                     }}>
-                      {app.ai_verification_notes}
+                      {verificationNotes[app.id]}
                     </pre>
                   </div>
                 )}